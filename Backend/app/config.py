@@ -7,12 +7,96 @@ class Settings:
     # MongoDB Configuration
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "skill_swap_platform")
+    # Connection pool and timeouts; size MAX_POOL_SIZE for the number of workers per host
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+    # Connections opened at startup, concurrently with index creation
+    MONGODB_WARM_CONNECTIONS: int = int(os.getenv("MONGODB_WARM_CONNECTIONS", "10"))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGODB_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000"))
+    MONGODB_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))
+    # Wire compression, in order of preference; ones whose library isn't installed are skipped
+    MONGODB_COMPRESSORS: str = os.getenv("MONGODB_COMPRESSORS", "zstd,snappy,zlib")
+    # Fail startup if any controller query plan uses a collection scan
+    VERIFY_QUERY_PLANS: bool = os.getenv("VERIFY_QUERY_PLANS", "False").lower() == "true"
     
     # Cloudinary Configuration
     CLOUDINARY_CLOUD_NAME: str = os.getenv("CLOUDINARY_CLOUD_NAME", "")
     CLOUDINARY_API_KEY: str = os.getenv("CLOUDINARY_API_KEY", "")
     CLOUDINARY_API_SECRET: str = os.getenv("CLOUDINARY_API_SECRET", "")
     
+    # Local image storage, used when Cloudinary is not configured
+    MEDIA_ROOT: str = os.getenv("MEDIA_ROOT", "media")
+    PUBLIC_BASE_URL: str = os.getenv("PUBLIC_BASE_URL", "http://localhost:8000")
+    
+    # Cloudinary calls run on a bounded thread pool; beyond concurrency + queue, uploads get 503
+    UPLOAD_MAX_CONCURRENCY: int = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "4"))
+    UPLOAD_MAX_QUEUE: int = int(os.getenv("UPLOAD_MAX_QUEUE", "16"))
+    # Larger profile photos are rejected with 413; uploads are read in chunks of UPLOAD_CHUNK_SIZE
+    UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+    
+    # Profile photos are resized locally (in a process pool) before upload
+    IMAGE_TARGET_SIZE: int = int(os.getenv("IMAGE_TARGET_SIZE", "400"))
+    IMAGE_OUTPUT_FORMAT: str = os.getenv("IMAGE_OUTPUT_FORMAT", "WEBP")  # WEBP or JPEG
+    IMAGE_QUALITY: int = int(os.getenv("IMAGE_QUALITY", "82"))
+    IMAGE_PROCESS_WORKERS: int = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+    
+    # Admin authorization cache
+    ADMIN_CACHE_MAX_SIZE: int = int(os.getenv("ADMIN_CACHE_MAX_SIZE", "10000"))
+    ADMIN_CACHE_TTL_SECONDS: float = float(os.getenv("ADMIN_CACHE_TTL_SECONDS", "60"))
+    ADMIN_CACHE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("ADMIN_CACHE_NEGATIVE_TTL_SECONDS", "10"))
+    
+    # Size limits for POST /users/batch-get and /users/batch-create
+    USER_BATCH_GET_MAX_SIZE: int = int(os.getenv("USER_BATCH_GET_MAX_SIZE", "200"))
+    USER_BATCH_CREATE_MAX_SIZE: int = int(os.getenv("USER_BATCH_CREATE_MAX_SIZE", "1000"))
+    
+    # Read-through user document cache; set USER_CACHE_REDIS_URL to share it across workers
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "50000"))
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+    USER_CACHE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+    USER_CACHE_REDIS_URL: str = os.getenv("USER_CACHE_REDIS_URL", "")
+    
+    # Broadcast fan-out: inbox entries per insert_many and pause between chunks
+    BROADCAST_CHUNK_SIZE: int = int(os.getenv("BROADCAST_CHUNK_SIZE", "1000"))
+    BROADCAST_CHUNK_PAUSE_SECONDS: float = float(os.getenv("BROADCAST_CHUNK_PAUSE_SECONDS", "0.05"))
+    
+    # Days of daily buckets kept for GET /admin/stats
+    STATS_DAILY_BUCKET_DAYS: int = int(os.getenv("STATS_DAILY_BUCKET_DAYS", "30"))
+    
+    # Per-caller token buckets (x-clerk-user-id, or the client IP for anonymous requests); set RATE_LIMIT_REDIS_URL to share them across workers.
+    # Off by default: behind a proxy, set FORWARDED_ALLOW_IPS first or every request shares the proxy's bucket
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "False").lower() == "true"
+    RATE_LIMIT_RATE_PER_SECOND: float = float(os.getenv("RATE_LIMIT_RATE_PER_SECOND", "10"))
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "40"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL", "")
+    # Per-worker load shedding (503) on requests in flight or operations waiting for a MongoDB connection; 0 disables
+    LOAD_SHED_MAX_IN_FLIGHT: int = int(os.getenv("LOAD_SHED_MAX_IN_FLIGHT", "512"))
+    LOAD_SHED_MAX_POOL_WAITING: int = int(os.getenv("LOAD_SHED_MAX_POOL_WAITING", "200"))
+    LOAD_SHED_RETRY_AFTER_SECONDS: int = int(os.getenv("LOAD_SHED_RETRY_AFTER_SECONDS", "1"))
+    
+    # Per-route and per-MongoDB-command metrics exposed at /metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    
+    # How often each worker re-reads recently updated users into its in-memory match and search indexes
+    INDEX_REFRESH_SECONDS: float = float(os.getenv("INDEX_REFRESH_SECONDS", "30"))
+    
+    # Use MongoDB $text search while the in-memory search index is loading
+    SEARCH_TEXT_FALLBACK: bool = os.getenv("SEARCH_TEXT_FALLBACK", "True").lower() == "true"
+    
+    # Server (run.py); WEB_CONCURRENCY, keep-alive, backlog and drain timeout apply to --prod only
+    HOST: str = os.getenv("HOST", "0.0.0.0")
+    PORT: int = int(os.getenv("PORT", "8000"))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+    # Longer than a typical load balancer idle timeout, so the proxy closes idle connections first
+    SERVER_KEEP_ALIVE_SECONDS: int = int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "75"))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "30"))
+    # Comma-separated reverse proxy addresses trusted to set X-Forwarded-For ("*" trusts any peer)
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    
     # App Configuration
     APP_NAME: str = "Skill Swap Platform API"
     VERSION: str = "1.0.0"
@@ -1,14 +1,42 @@
 # type: ignore
 from fastapi import HTTPException
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
 from ..database.mongo import get_collection
-from ..models.user import UserModel
-from ..models.swap import SwapModel
 from ..schemas.user_schema import UserOut
 from ..schemas.swap_schema import SwapOut
-from ..schemas.admin_schema import AdminBroadcast, AdminUserBanRequest
+from ..schemas.admin_schema import AdminBroadcast, AdminUserBanRequest, BroadcastOut
+from ..services.matching_service import skill_match_index
+from ..services.search_service import user_search_index
+from ..services.broadcast_service import schedule_delivery
+from ..services.stats_service import get_stats, rebuild_stats, record_user_banned
+from ..services.user_cache import user_cache
+from ..utils.auth import admin_role_cache, admin_role_generation, cache_admin_role, invalidate_admin_role
+from ..utils.pagination import fetch_page
+from ..utils.single_flight import read_flights
+from ..utils.serialization import compile_encoder, schema_projection
+from ..utils.export import stream_documents, EXPORT_FORMATS, DEFAULT_EXPORT_BATCH_SIZE, MAX_EXPORT_BATCH_SIZE
+
+encode_user_out = compile_encoder(UserOut)
+encode_swap_out = compile_encoder(SwapOut)
+encode_broadcast_out = compile_encoder(BroadcastOut)
+# created_at is needed to build the next-page cursor
+USER_OUT_PROJECTION = schema_projection(UserOut, extra=["created_at"])
+SWAP_OUT_PROJECTION = schema_projection(SwapOut)
+
+USER_EXPORT_FIELDS = [
+    "_id", "clerk_id", "username", "fullname", "email", "address", "profile_url",
+    "skills_offered", "skills_wanted", "availability", "is_public", "is_banned",
+    "ban_reason", "rating", "rating_count", "role", "created_at", "updated_at"
+]
+
+SWAP_EXPORT_FIELDS = [
+    "_id", "requester_id", "receiver_id", "requester_message", "status",
+    "requester_feedback", "requester_rating", "receiver_feedback", "receiver_rating",
+    "created_at", "updated_at"
+]
 
 class AdminController:
     def __init__(self):
@@ -23,162 +51,153 @@ class AdminController:
     def swaps_collection(self):
         return get_collection(self.swaps_collection_name)  # type: ignore
 
-    async def get_all_users(self) -> List[UserOut]:
-        """List all users (admin only)."""
-        users = []
-        cursor = self.users_collection.find()
-        
-        async for user in cursor:
-            try:
-                user_model = UserModel.from_dict(user)
-                user_dict = user_model.dict()
-                
-                # Skip admin users
-                user_role = user_dict.get("role", "user").lower()
-                if user_role in ["admin", "administrator"]:
-                    continue
-                
-                # Ensure all required fields are present
-                user_out_data = {
-                    "id": user_dict.get("id", ""),
-                    "username": user_dict.get("username", ""),
-                    "fullname": user_dict.get("fullname", ""),
-                    "email": user_dict.get("email", ""),
-                    "clerk_id": user_dict.get("clerk_id", ""),
-                    "address": user_dict.get("address"),
-                    "profile_url": user_dict.get("profile_url"),
-                    "skills_offered": user_dict.get("skills_offered", []),
-                    "skills_wanted": user_dict.get("skills_wanted", []),
-                    "availability": user_dict.get("availability"),
-                    "is_public": user_dict.get("is_public", True),
-                    "is_banned": user_dict.get("is_banned", False),
-                    "rating": user_dict.get("rating"),
-                    "role": user_dict.get("role", "user"),
-                    "ratings": user_dict.get("ratings", [])
-                }
-                
-                user_out = UserOut(**user_out_data)
-                users.append(user_out)
-            except Exception as e:
-                # Skip users with invalid data
-                print(f"Error processing user {user.get('_id', 'unknown')}: {e}")
-                continue
-        
-        return users
-
-    async def ban_user(self, ban_request: AdminUserBanRequest) -> UserOut:
-        """Ban a user (admin only)."""
-        try:
-            user = await self.users_collection.find_one({"_id": ObjectId(ban_request.user_id)})
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            update_data = {
-                "is_banned": True,
-                "updated_at": datetime.utcnow()
-            }
-            
-            if ban_request.reason:
-                update_data["ban_reason"] = ban_request.reason
-            
-            result = await self.users_collection.update_one(
-                {"_id": ObjectId(ban_request.user_id)},
-                {"$set": update_data}
-            )
-            
-            if result.matched_count == 0:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            # Get updated user
-            updated_user = await self.users_collection.find_one({"_id": ObjectId(ban_request.user_id)})
-            if not updated_user:
-                raise HTTPException(status_code=404, detail="User not found after update")
-            
-            user_model = UserModel.from_dict(updated_user)
-            user_dict = user_model.dict()
-            
-            # Ensure all required fields are present
-            user_out_data = {
-                "id": user_dict.get("id", ""),
-                "username": user_dict.get("username", ""),
-                "fullname": user_dict.get("fullname", ""),
-                "email": user_dict.get("email", ""),
-                "clerk_id": user_dict.get("clerk_id", ""),
-                "address": user_dict.get("address"),
-                "profile_url": user_dict.get("profile_url"),
-                "skills_offered": user_dict.get("skills_offered", []),
-                "skills_wanted": user_dict.get("skills_wanted", []),
-                "availability": user_dict.get("availability"),
-                "is_public": user_dict.get("is_public", True),
-                "is_banned": user_dict.get("is_banned", False),
-                "rating": user_dict.get("rating"),
-                "role": user_dict.get("role", "user"),
-                "ratings": user_dict.get("ratings", [])
-            }
-            
-            return UserOut(**user_out_data)
-        except Exception as e:
+    async def get_all_users(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[dict], Optional[str]]:
+        """List one page of users (admin only), encoded as UserOut, plus the next-page cursor."""
+        # Skip admin users in the query so every page is full
+        docs, next_cursor = await fetch_page(self.users_collection, {
+            "role": {"$not": {"$regex": "^(admin|administrator)$", "$options": "i"}}
+        }, cursor, limit, projection=USER_OUT_PROJECTION)
+        return [encode_user_out(user) for user in docs], next_cursor
+
+    async def ban_user(self, ban_request: AdminUserBanRequest) -> dict:
+        """Ban a user (admin only); returns the user encoded as UserOut."""
+        if not ObjectId.is_valid(ban_request.user_id):
             raise HTTPException(status_code=400, detail="Invalid user ID")
 
-    async def get_all_swaps(self) -> List[SwapOut]:
-        """View all swap requests (admin only)."""
-        swaps = []
-        cursor = self.swaps_collection.find().sort("created_at", -1)
-        
-        async for swap in cursor:
-            try:
-                swap_model = SwapModel.from_dict(swap)
-                swap_dict = swap_model.dict()
-                
-                # Ensure all required fields are present
-                swap_out_data = {
-                    "id": swap_dict.get("id", ""),
-                    "requester_id": swap_dict.get("requester_id", ""),
-                    "receiver_id": swap_dict.get("receiver_id", ""),
-                    "requester_message": swap_dict.get("requester_message", ""),
-                    "status": swap_dict.get("status", "pending"),
-                    "requester_feedback": swap_dict.get("requester_feedback"),
-                    "requester_rating": swap_dict.get("requester_rating"),
-                    "receiver_feedback": swap_dict.get("receiver_feedback"),
-                    "receiver_rating": swap_dict.get("receiver_rating"),
-                    "created_at": swap_dict.get("created_at"),
-                    "updated_at": swap_dict.get("updated_at")
-                }
-                
-                swap_out = SwapOut(**swap_out_data)
-                swaps.append(swap_out)
-            except Exception as e:
-                # Skip swaps with invalid data
-                print(f"Error processing swap {swap.get('_id', 'unknown')}: {e}")
-                continue
-        
-        return swaps
+        update_data = {
+            "is_banned": True,
+            "updated_at": datetime.utcnow()
+        }
+
+        if ban_request.reason:
+            update_data["ban_reason"] = ban_request.reason
+
+        # One round trip: the pre-update document says whether this write is
+        # the one that banned the user, and with the $set applied it is the response
+        previous = await self.users_collection.find_one_and_update(
+            {"_id": ObjectId(ban_request.user_id)},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+
+        if not previous:
+            raise HTTPException(status_code=404, detail="User not found")
+        if not previous.get("is_banned"):
+            await record_user_banned()
+        updated_user = {**previous, **update_data}
 
-    async def send_broadcast(self, broadcast_data: AdminBroadcast) -> dict:
-        """Send a platform-wide message (admin only)."""
-        # In a real implementation, this would send notifications to all users
-        # For now, we'll just store it in a broadcasts collection
+        skill_match_index.upsert(updated_user)
+        user_search_index.upsert(updated_user)
+        invalidate_admin_role(updated_user.get("clerk_id"))
+        await user_cache.invalidate(updated_user.get("clerk_id"))
+        return encode_user_out(updated_user)
+
+    async def get_all_swaps(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[dict], Optional[str]]:
+        """View one page of swap requests (admin only), encoded as SwapOut, plus the next-page cursor."""
+        docs, next_cursor = await fetch_page(self.swaps_collection, {}, cursor, limit, projection=SWAP_OUT_PROJECTION)
+        return [encode_swap_out(swap) for swap in docs], next_cursor
+
+    @staticmethod
+    def _export_query(created_from: Optional[datetime], created_to: Optional[datetime]) -> dict:
+        query = {}
+        if created_from or created_to:
+            query["created_at"] = {}
+            if created_from:
+                query["created_at"]["$gte"] = created_from
+            if created_to:
+                query["created_at"]["$lt"] = created_to
+        return query
+
+    @staticmethod
+    def _export_batch_size(fmt: str, batch_size: Optional[int]) -> int:
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported export format: {fmt}")
+        return max(1, min(batch_size or DEFAULT_EXPORT_BATCH_SIZE, MAX_EXPORT_BATCH_SIZE))
+
+    def export_users(self, fmt: str = "csv", batch_size: Optional[int] = None,
+                     created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                     banned: Optional[bool] = None) -> AsyncIterator[bytes]:
+        """Stream users straight from the cursor as NDJSON or CSV (admin only)."""
+        batch_size = self._export_batch_size(fmt, batch_size)
+        query = self._export_query(created_from, created_to)
+        if banned is not None:
+            query["is_banned"] = banned
+        projection = {field: 1 for field in USER_EXPORT_FIELDS}
+        cursor = self.users_collection.find(query, projection).batch_size(batch_size)
+        return stream_documents(cursor, USER_EXPORT_FIELDS, fmt, batch_size)
+
+    def export_swaps(self, fmt: str = "csv", batch_size: Optional[int] = None,
+                     created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                     status: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Stream swaps straight from the cursor as NDJSON or CSV (admin only)."""
+        batch_size = self._export_batch_size(fmt, batch_size)
+        query = self._export_query(created_from, created_to)
+        if status:
+            query["status"] = status
+        projection = {field: 1 for field in SWAP_EXPORT_FIELDS}
+        cursor = self.swaps_collection.find(query, projection).batch_size(batch_size)
+        return stream_documents(cursor, SWAP_EXPORT_FIELDS, fmt, batch_size)
+
+    async def send_broadcast(self, broadcast_data: AdminBroadcast, admin_id: str = "admin") -> dict:
+        """Queue a platform-wide message for delivery to every user's inbox (admin only)."""
         broadcasts_collection = get_collection("broadcasts")
         
         broadcast = {
             "title": broadcast_data.title,
             "message": broadcast_data.message,
             "created_at": datetime.utcnow(),
-            "sent_by": "admin"  # In real app, this would be the admin's ID
+            "sent_by": admin_id,
+            "status": "queued",
+            # From collection metadata, not a scan; the delivery task stores the exact count
+            "total_recipients": await self.users_collection.estimated_document_count(),
+            "delivered": 0
         }
         
         result = await broadcasts_collection.insert_one(broadcast)
+        schedule_delivery(result.inserted_id)
         
         return {
-            "message": "Broadcast sent successfully",
+            "message": "Broadcast queued for delivery",
             "broadcast_id": str(result.inserted_id),
-            "title": broadcast_data.title
+            "title": broadcast_data.title,
+            "total_recipients": broadcast["total_recipients"]
         }
 
+    async def get_broadcast(self, broadcast_id: str) -> dict:
+        """Delivery progress for a broadcast (admin only)."""
+        if not ObjectId.is_valid(broadcast_id):
+            raise HTTPException(status_code=400, detail="Invalid broadcast ID")
+        broadcast = await get_collection("broadcasts").find_one(
+            {"_id": ObjectId(broadcast_id)},
+            {"last_user_id": 0, "lease_until": 0, "lease_owner": 0}
+        )
+        if not broadcast:
+            raise HTTPException(status_code=404, detail="Broadcast not found")
+        return encode_broadcast_out(broadcast)
+
+    async def get_stats(self) -> dict:
+        """Dashboard counters from the precomputed stats documents (admin only)."""
+        return await get_stats()
+
+    async def rebuild_stats(self, apply: bool = True) -> dict:
+        """Recount the stats from the collections and report drift; apply overwrites the counters (admin only)."""
+        return await rebuild_stats(apply)
+
     async def is_admin(self, clerk_id: str) -> bool:
-        """Check if a user is an admin."""
+        """Check if a user is an (unbanned) admin, using the admin-role cache."""
+        found, cached = admin_role_cache.get(clerk_id)
+        if found:
+            return cached
+        # Concurrent checks for the same user share one query
+        return await read_flights.do(("admin", clerk_id), self._load_is_admin, clerk_id)
+
+    async def _load_is_admin(self, clerk_id: str) -> bool:
+        generation = admin_role_generation()
         admin = await self.users_collection.find_one({
             "clerk_id": clerk_id,
-            "role": {"$in": ["admin", "Admin"]}
-        })
-        return admin is not None
+            "role": {"$in": ["admin", "Admin"]},
+            "is_banned": {"$ne": True}
+        }, {"_id": 1})
+        is_admin = admin is not None
+        cache_admin_role(clerk_id, is_admin, generation)
+        return is_admin
@@ -1,11 +1,26 @@
 # type: ignore
+import asyncio
+import logging
 from fastapi import HTTPException
-from typing import List
+from typing import List, Optional, Tuple
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
 from ..database.mongo import get_collection
-from ..models.swap import SwapModel
-from ..schemas.swap_schema import SwapCreate, SwapUpdate, SwapOut
+from ..models.swap import SwapModel, SWAP_TRANSITIONS
+from ..schemas.swap_schema import SwapCreate, SwapUpdate, SwapOut, SwapOutWithNames
+from ..services.rating_service import record_rating
+from ..services.stats_service import record_swap_created, record_swap_transition
+from ..services.user_cache import user_cache
+from ..utils.pagination import fetch_page
+from ..utils.etag import weak_etag, etag_matches
+from ..utils.single_flight import read_flights
+from ..utils.serialization import compile_encoder, schema_projection
+
+logger = logging.getLogger(__name__)
+
+encode_swap_out = compile_encoder(SwapOutWithNames)
+SWAP_OUT_PROJECTION = schema_projection(SwapOut)
 
 class SwapController:
     def __init__(self):
@@ -15,10 +30,27 @@ class SwapController:
     def collection(self):
         return get_collection(self.collection_name)  # type: ignore
 
+    async def _resolve_names(self, clerk_ids) -> dict:
+        """Map clerk_ids to fullnames from the user cache; misses are loaded with one $in query."""
+        users = await user_cache.get_many(clerk_ids)
+        return {clerk_id: user.get("fullname") for clerk_id, user in users.items()}
+
+    @staticmethod
+    def _swaps_changed(*user_ids):
+        """Keep swap-list reads that started before a write from being shared with later callers."""
+        for user_id in user_ids:
+            read_flights.forget("swaps", str(user_id))
+
+    @staticmethod
+    def _apply_names(swap_dict: dict, names: dict) -> dict:
+        """Fill requester_name/receiver_name on a swap dict from a name map."""
+        swap_dict["requester_name"] = names.get(swap_dict.get("requester_id"))
+        swap_dict["receiver_name"] = names.get(swap_dict.get("receiver_id"))
+        return swap_dict
+
     async def create_swap_request(self, requester_id: str, swap_data: SwapCreate) -> dict:
         """Send a swap request to another user. Expects receiver_id as clerk_id (string)."""
-        users_collection = get_collection("users")
-        receiver = await users_collection.find_one({"clerk_id": swap_data.receiver_id})
+        receiver = await user_cache.get(swap_data.receiver_id)
         if not receiver:
             raise HTTPException(status_code=404, detail="Receiver not found")
         receiver_clerk_id = receiver.get("clerk_id")
@@ -39,163 +71,152 @@ class SwapController:
         swap_dict = swap_model.to_dict()
         result = await self.collection.insert_one(swap_dict)
         swap_dict["_id"] = result.inserted_id
-        # Fetch requester and receiver names
-        requester = await users_collection.find_one({"clerk_id": requester_id})
-        requester_name = requester.get("fullname") if requester else None
-        receiver_name = receiver.get("fullname")
+        self._swaps_changed(requester_id, receiver_clerk_id)
+        await record_swap_created()
         swap_out = SwapOut(**SwapModel.from_dict(swap_dict).dict())
         swap_response = swap_out.dict()
-        swap_response["requester_name"] = requester_name
-        swap_response["receiver_name"] = receiver_name
+        # The receiver is already loaded, so only the requester needs resolving
+        names = await self._resolve_names([requester_id])
+        names[receiver_clerk_id] = receiver.get("fullname")
+        self._apply_names(swap_response, names)
         return swap_response
 
-    async def get_user_swaps(self, user_id: str) -> List[dict]:
-        """Get all swaps (sent & received) for user."""
-        swaps = []
-        cursor = self.collection.find({
+    async def get_user_swaps(self, user_id: str, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of swaps (sent & received) for user, encoded with names, plus the next-page cursor."""
+        # Concurrent reads of the same page share one query
+        return await read_flights.do(("swaps", user_id, "page", cursor, limit), self._load_user_swaps, user_id, cursor, limit)
+
+    async def _load_user_swaps(self, user_id: str, cursor: Optional[str], limit: Optional[int]) -> Tuple[List[dict], Optional[str]]:
+        docs, next_cursor = await fetch_page(self.collection, {
             "$or": [
                 {"requester_id": user_id},
                 {"receiver_id": user_id}
             ]
-        }).sort("created_at", -1)
-        users_collection = get_collection("users")
-        async for swap in cursor:
-            try:
-                if isinstance(swap.get("receiver_id"), ObjectId):
-                    swap["receiver_id"] = str(swap["receiver_id"])
-                swap_out = SwapOut(**SwapModel.from_dict(swap).dict())
-                swap_dict = swap_out.dict()
-                # Fetch names
-                requester = await users_collection.find_one({"clerk_id": swap_out.requester_id})
-                receiver = await users_collection.find_one({"clerk_id": swap_out.receiver_id})
-                swap_dict["requester_name"] = requester.get("fullname") if requester else None
-                swap_dict["receiver_name"] = receiver.get("fullname") if receiver else None
-                swaps.append(swap_dict)
-            except Exception as e:
-                print(f"Error processing swap {swap.get('_id', 'unknown')}: {e}")
-                continue
-        return swaps
+        }, cursor, limit, projection=SWAP_OUT_PROJECTION)
+        # The encoder also turns legacy ObjectId participant ids into strings
+        swaps = [encode_swap_out(swap) for swap in docs]
+        # Resolve every participant name with a single query
+        clerk_ids = set()
+        for swap_dict in swaps:
+            clerk_ids.add(swap_dict["requester_id"])
+            clerk_ids.add(swap_dict["receiver_id"])
+        names = await self._resolve_names(clerk_ids)
+        for swap_dict in swaps:
+            self._apply_names(swap_dict, names)
+        return swaps, next_cursor
 
-    async def accept_swap(self, swap_id: str, user_id: str) -> dict:
-        """Accept a swap request."""
-        try:
-            swap = await self.collection.find_one({"_id": ObjectId(swap_id)})
-            if not swap:
-                raise HTTPException(status_code=404, detail="Swap not found")
-            
-            # Handle legacy swaps where receiver_id might be ObjectId
-            receiver_id = swap["receiver_id"]
-            if isinstance(receiver_id, ObjectId):
-                # Convert ObjectId to string for comparison
-                receiver_id = str(receiver_id)
-            
-            if receiver_id != user_id:
-                raise HTTPException(status_code=403, detail="Only receiver can accept swap")
-            
-            if swap["status"] != "pending":
-                raise HTTPException(status_code=400, detail="Swap is not pending")
-            
-            result = await self.collection.update_one(
-                {"_id": ObjectId(swap_id)},
-                {
-                    "$set": {
-                        "status": "accepted",
-                        "updated_at": datetime.utcnow()
-                    }
-                }
+    async def get_user_swaps_etag(self, user_id: str) -> str:
+        """
+        ETag over all of a user's swaps: newest updated_at plus count, from
+        the covering indexes. The list embeds participant names, so the
+        participants' own updated_at (from the user cache) counts too.
+        """
+        return await read_flights.do(("swaps", user_id, "etag"), self._load_user_swaps_etag, user_id)
+
+    async def _load_user_swaps_etag(self, user_id: str) -> str:
+        result = await self.collection.aggregate([
+            {"$match": {"$or": [{"requester_id": user_id}, {"receiver_id": user_id}]}},
+            {"$group": {
+                "_id": None,
+                "updated_at": {"$max": "$updated_at"},
+                "count": {"$sum": 1},
+                "requesters": {"$addToSet": "$requester_id"},
+                "receivers": {"$addToSet": "$receiver_id"}
+            }}
+        ]).to_list(length=1)
+        if not result:
+            return weak_etag(None, 0)
+        participants = await user_cache.get_many(set(result[0]["requesters"]) | set(result[0]["receivers"]))
+        stamps = [result[0].get("updated_at")] + [user.get("updated_at") for user in participants.values()]
+        stamps = [stamp for stamp in stamps if isinstance(stamp, datetime)]
+        return weak_etag(max(stamps) if stamps else None, result[0]["count"])
+
+    async def get_user_swaps_conditional(self, user_id: str, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                         if_none_match: Optional[str] = None) -> Tuple[Optional[List[dict]], Optional[str], str]:
+        """
+        get_user_swaps plus the list ETag. A matching If-None-Match skips the
+        page query and returns (None, None, etag).
+        """
+        if if_none_match:
+            etag = await self.get_user_swaps_etag(user_id)
+            if etag_matches(if_none_match, etag):
+                return None, None, etag
+            swaps, next_cursor = await self.get_user_swaps(user_id, cursor, limit)
+        else:
+            (swaps, next_cursor), etag = await asyncio.gather(
+                self.get_user_swaps(user_id, cursor, limit),
+                self.get_user_swaps_etag(user_id)
             )
-            
-            if result.matched_count == 0:
-                raise HTTPException(status_code=404, detail="Swap not found")
-            
-            # Get updated swap
-            updated_swap = await self.collection.find_one({"_id": ObjectId(swap_id)})
-            swap_out = SwapOut(**SwapModel.from_dict(updated_swap).dict())
-            
-            return {
-                "message": "Swap accepted successfully",
-                "swap_id": swap_out.id,
-                "requester_clerk_id": swap_out.requester_id,
-                "receiver_clerk_id": swap_out.receiver_id,
-                "status": swap_out.status,
-                "swap_details": swap_out
-            }
-        except Exception as e:
+        return swaps, next_cursor, etag
+
+    async def _transition(self, swap_id: str, user_id: str, action: str) -> dict:
+        """
+        Apply a SWAP_TRANSITIONS entry in one conditional find_one_and_update
+        and return the updated swap. Only when nothing matched is the swap
+        re-read to report 404 / 403 / 400.
+        """
+        transition = SWAP_TRANSITIONS[action]
+        if not ObjectId.is_valid(swap_id):
             raise HTTPException(status_code=400, detail="Invalid swap ID")
+        swap_object_id = ObjectId(swap_id)
+        
+        # Legacy swaps may store participant ids as ObjectId
+        actor_ids = [user_id]
+        if ObjectId.is_valid(user_id):
+            actor_ids.append(ObjectId(user_id))
+        
+        updated_swap = await self.collection.find_one_and_update(
+            {
+                "_id": swap_object_id,
+                transition["actor"]: {"$in": actor_ids},
+                "status": transition["from"]
+            },
+            {
+                "$set": {
+                    "status": transition["to"],
+                    "updated_at": datetime.utcnow()
+                }
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        if updated_swap:
+            self._swaps_changed(updated_swap["requester_id"], updated_swap["receiver_id"])
+            await record_swap_transition(transition["from"], transition["to"])
+            return updated_swap
+        
+        swap = await self.collection.find_one(
+            {"_id": swap_object_id},
+            {transition["actor"]: 1, "status": 1}
+        )
+        if not swap:
+            raise HTTPException(status_code=404, detail="Swap not found")
+        if str(swap.get(transition["actor"])) != user_id:
+            raise HTTPException(status_code=403, detail=transition["forbidden"])
+        raise HTTPException(status_code=400, detail=transition["invalid_state"])
+
+    async def accept_swap(self, swap_id: str, user_id: str) -> dict:
+        """Accept a swap request."""
+        updated_swap = await self._transition(swap_id, user_id, "accept")
+        swap_out = SwapOut(**SwapModel.from_dict(updated_swap).dict())
+        
+        return {
+            "message": "Swap accepted successfully",
+            "swap_id": swap_out.id,
+            "requester_clerk_id": swap_out.requester_id,
+            "receiver_clerk_id": swap_out.receiver_id,
+            "status": swap_out.status,
+            "swap_details": swap_out
+        }
 
     async def reject_swap(self, swap_id: str, user_id: str) -> SwapOut:
         """Reject a swap request."""
-        try:
-            swap = await self.collection.find_one({"_id": ObjectId(swap_id)})
-            if not swap:
-                raise HTTPException(status_code=404, detail="Swap not found")
-            
-            # Handle legacy swaps where receiver_id might be ObjectId
-            receiver_id = swap["receiver_id"]
-            if isinstance(receiver_id, ObjectId):
-                # Convert ObjectId to string for comparison
-                receiver_id = str(receiver_id)
-            
-            if receiver_id != user_id:
-                raise HTTPException(status_code=403, detail="Only receiver can reject swap")
-            
-            if swap["status"] != "pending":
-                raise HTTPException(status_code=400, detail="Swap is not pending")
-            
-            result = await self.collection.update_one(
-                {"_id": ObjectId(swap_id)},
-                {
-                    "$set": {
-                        "status": "rejected",
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
-            
-            if result.matched_count == 0:
-                raise HTTPException(status_code=404, detail="Swap not found")
-            
-            # Get updated swap
-            updated_swap = await self.collection.find_one({"_id": ObjectId(swap_id)})
-            return SwapOut(**SwapModel.from_dict(updated_swap).dict())
-        except Exception as e:
-            raise HTTPException(status_code=400, detail="Invalid swap ID")
+        updated_swap = await self._transition(swap_id, user_id, "reject")
+        return SwapOut(**SwapModel.from_dict(updated_swap).dict())
 
     async def cancel_swap(self, swap_id: str, user_id: str) -> dict:
         """Cancel a pending swap."""
-        try:
-            swap = await self.collection.find_one({"_id": ObjectId(swap_id)})
-            if not swap:
-                raise HTTPException(status_code=404, detail="Swap not found")
-            
-            # Handle legacy swaps where requester_id might be ObjectId
-            requester_id = swap["requester_id"]
-            if isinstance(requester_id, ObjectId):
-                # Convert ObjectId to string for comparison
-                requester_id = str(requester_id)
-            
-            if requester_id != user_id:
-                raise HTTPException(status_code=403, detail="Only requester can cancel swap")
-            
-            if swap["status"] != "pending":
-                raise HTTPException(status_code=400, detail="Only pending swaps can be cancelled")
-            
-            result = await self.collection.update_one(
-                {"_id": ObjectId(swap_id)},
-                {
-                    "$set": {
-                        "status": "cancelled",
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
-            
-            if result.matched_count == 0:
-                raise HTTPException(status_code=404, detail="Swap not found")
-            
-            return {"message": "Swap cancelled successfully"}
-        except Exception as e:
-            raise HTTPException(status_code=400, detail="Invalid swap ID")
+        await self._transition(swap_id, user_id, "cancel")
+        return {"message": "Swap cancelled successfully"}
 
     async def submit_swap_feedback(self, swap_id: str, user_id: str, feedback: str, rating: int) -> dict:
         """Submit feedback and rating for a swap."""
@@ -260,6 +281,7 @@ class SwapController:
             
             if result.matched_count == 0:
                 raise HTTPException(status_code=404, detail="Swap not found")
+            self._swaps_changed(requester_id, receiver_id)
             
             # Update the rated user's ratings array
             from_user_id = user_id
@@ -269,34 +291,17 @@ class SwapController:
                 "feedback": feedback,
                 "date": datetime.utcnow()
             }
-            from ..database.mongo import get_collection
-            users_collection = get_collection("users")
-            await users_collection.update_one(
-                {"clerk_id": rated_user_id},
-                {"$push": {"ratings": rating_entry}, "$set": {"updated_at": datetime.utcnow()}}
-            )
-
-            # Recalculate and update the average rating for the rated user
-            rated_user = await users_collection.find_one({"clerk_id": rated_user_id})
-            ratings = rated_user.get("ratings", [])
-            if ratings:
-                total_rating = sum(r.get("rating", r.get("score", 0)) for r in ratings)
-                avg_rating = total_rating / len(ratings)
-                await users_collection.update_one(
-                    {"clerk_id": rated_user_id},
-                    {"$set": {"rating": round(avg_rating, 2)}}
-                )
+            # Append the rating and refresh the rated user's aggregates in one write
+            await record_rating(get_collection("users"), {"clerk_id": rated_user_id}, rating_entry)
+            await user_cache.invalidate(rated_user_id)
             
             # Get updated swap
             updated_swap = await self.collection.find_one({"_id": ObjectId(swap_id)})
             swap_out = SwapOut(**SwapModel.from_dict(updated_swap).dict())
             # Add names to swap_details
-            users_collection = get_collection("users")
-            requester = await users_collection.find_one({"clerk_id": swap_out.requester_id})
-            receiver = await users_collection.find_one({"clerk_id": swap_out.receiver_id})
             swap_details = swap_out.dict()
-            swap_details["requester_name"] = requester.get("fullname") if requester else None
-            swap_details["receiver_name"] = receiver.get("fullname") if receiver else None
+            names = await self._resolve_names([swap_out.requester_id, swap_out.receiver_id])
+            self._apply_names(swap_details, names)
             return {
                 "message": f"Feedback submitted successfully as {user_role}",
                 "swap_id": swap_out.id,
@@ -308,8 +313,9 @@ class SwapController:
         except HTTPException:
             # Re-raise HTTP exceptions as-is
             raise
-        except Exception as e:
-            print(f"Debug - Exception in submit_swap_feedback: {e}")
-            raise HTTPException(status_code=400, detail=f"Error processing feedback: {str(e)}")
+        except Exception:
+            # Details go to the log, not to the client
+            logger.exception("Failed to submit feedback for swap %s", swap_id)
+            raise HTTPException(status_code=500, detail="Error processing feedback")
 
 
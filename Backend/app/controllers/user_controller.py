@@ -1,14 +1,35 @@
 # type: ignore
 from fastapi import HTTPException, UploadFile
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from bson import ObjectId
 from datetime import datetime
+from pymongo.errors import BulkWriteError
 from ..database.mongo import get_collection
 from ..models.user import UserModel
-from ..schemas.user_schema import UserCreate, UserUpdate, UserOut, RatingEntry
-from ..services.cloudinary_service import CloudinaryService
+from ..schemas.user_schema import UserCreate, UserUpdate, UserOut, RatingEntry, InboxEntryOut
+from ..services.storage_service import get_storage_service
+from ..services.matching_service import skill_match_index
+from ..services.search_service import user_search_index
+from ..services.rating_service import record_rating
+from ..services.stats_service import record_users_created, record_user_deleted
+from ..services.user_cache import user_cache
+from ..utils.auth import invalidate_admin_role
+from ..utils.etag import weak_etag, etag_matches
+from ..utils.pagination import fetch_page, clamp_limit
+from ..utils.single_flight import read_flights
+from ..utils.serialization import compile_encoder, schema_projection
 from ..config import settings
 
+# MongoDB error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+encode_user_out = compile_encoder(UserOut)
+encode_inbox_entry = compile_encoder(InboxEntryOut)
+# created_at is needed to build the next-page cursor
+USER_OUT_PROJECTION = schema_projection(UserOut, extra=["created_at"])
+# updated_at is needed for the profile ETag
+USER_PROFILE_PROJECTION = schema_projection(UserOut, extra=["updated_at"])
+
 class UserController:
     def __init__(self):
         self.collection_name = "users"
@@ -30,6 +51,19 @@ class UserController:
         if existing_user:
             raise HTTPException(status_code=400, detail="User already exists")
         
+        user_dict = self._new_user_document(user_data)
+        
+        result = await self.collection.insert_one(user_dict)
+        
+        # Get the created user with proper ID conversion
+        created_user = await self.collection.find_one({"_id": result.inserted_id})
+        await self._index_new_user(created_user)
+        await record_users_created()
+        return UserOut(**UserModel.from_dict(created_user).dict())
+
+    @staticmethod
+    def _new_user_document(user_data: UserCreate) -> dict:
+        """Users-collection document for a new registration, with defaults for fields not in UserCreate."""
         user_data_dict = user_data.dict()
         # Convert HttpUrl to string if present
         if user_data_dict.get("profile_url"):
@@ -39,34 +73,214 @@ class UserController:
         user_data_dict.update({
             "is_banned": False,
             "rating": 0.0,
+            "rating_count": 0,
+            "rating_sum": 0,
+            "rating_histogram": {},
             "role": "user",
             "ratings": []
         })
         
-        user_model = UserModel(**user_data_dict)
-        user_dict = user_model.to_dict()
-        
-        result = await self.collection.insert_one(user_dict)
-        
-        # Get the created user with proper ID conversion
-        created_user = await self.collection.find_one({"_id": result.inserted_id})
-        return UserOut(**UserModel.from_dict(created_user).dict())
+        return UserModel(**user_data_dict).to_dict()
 
-    async def get_all_users(self) -> List[UserOut]:
-        """Get all users."""
-        users = []
-        cursor = self.collection.find({"is_banned": False})  # type: ignore
-        
-        async for user in cursor:  # type: ignore
-            users.append(UserOut(**UserModel.from_dict(user).dict()))
-        
-        return users
+    @staticmethod
+    async def _index_new_user(user: dict):
+        skill_match_index.upsert(user)
+        user_search_index.upsert(user)
+        # Drop any cached "no such user" entry
+        await user_cache.invalidate(user.get("clerk_id"))
+
+    async def batch_create_users(self, users: List[UserCreate]) -> dict:
+        """
+        Register many users with one unordered insert_many. Uniqueness of
+        clerk_id and email is enforced by the unique indexes, so duplicates
+        are reported per item while the rest of the batch is inserted.
+        Repeats within the batch itself are caught before the insert: the
+        first occurrence is inserted and later ones are duplicates.
+        """
+        if len(users) > settings.USER_BATCH_CREATE_MAX_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.USER_BATCH_CREATE_MAX_SIZE} users per batch"
+            )
+        if not users:
+            return {"created": 0, "duplicates": 0, "failed": 0, "results": []}
+        docs = [self._new_user_document(user_data) for user_data in users]
+
+        # Batch index -> the earlier item's conflicting fields, for repeats within the batch
+        repeated = {}
+        seen = {"clerk_id": set(), "email": set()}
+        for index, doc in enumerate(docs):
+            fields = [field for field in seen if doc[field] in seen[field]]
+            if fields:
+                repeated[index] = fields
+                continue
+            for field in seen:
+                seen[field].add(doc[field])
+        to_insert = [index for index in range(len(docs)) if index not in repeated]
+
+        write_errors = {}
+        try:
+            await self.collection.insert_many([docs[index] for index in to_insert], ordered=False)
+        except BulkWriteError as e:
+            # writeErrors index into the inserted subset; map them back to batch positions
+            write_errors = {to_insert[error["index"]]: error for error in e.details.get("writeErrors", [])}
+
+        results = []
+        counts = {"created": 0, "duplicate": 0, "error": 0}
+        for index, doc in enumerate(docs):
+            error = write_errors.get(index)
+            if index in repeated:
+                result = {"index": index, "clerk_id": doc["clerk_id"], "status": "duplicate",
+                          "error": f"User with this {' and '.join(repeated[index])} appears earlier in the batch"}
+            elif error is None:
+                await self._index_new_user(doc)
+                result = {"index": index, "clerk_id": doc["clerk_id"], "status": "created", "user": encode_user_out(doc)}
+            elif error.get("code") == DUPLICATE_KEY_ERROR:
+                fields = ", ".join(error.get("keyValue", {})) or "clerk_id or email"
+                result = {"index": index, "clerk_id": doc["clerk_id"], "status": "duplicate",
+                          "error": f"User with this {fields} already exists"}
+            else:
+                result = {"index": index, "clerk_id": doc["clerk_id"], "status": "error", "error": error.get("errmsg")}
+            counts[result["status"]] += 1
+            results.append(result)
+        await record_users_created(counts["created"])
+        return {
+            "created": counts["created"],
+            "duplicates": counts["duplicate"],
+            "failed": counts["error"],
+            "results": results
+        }
+
+    async def batch_get_users(self, clerk_ids: List[str]) -> dict:
+        """Users for up to USER_BATCH_GET_MAX_SIZE clerk_ids in request order, plus the ids not found."""
+        if len(clerk_ids) > settings.USER_BATCH_GET_MAX_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.USER_BATCH_GET_MAX_SIZE} clerk_ids per request"
+            )
+        ordered = list(dict.fromkeys(clerk_ids))
+        # Cache hits are free; every miss is loaded by a single $in query
+        found = await user_cache.get_many(ordered)
+        return {
+            "users": [encode_user_out(found[clerk_id]) for clerk_id in ordered if clerk_id in found],
+            "not_found": [clerk_id for clerk_id in ordered if clerk_id not in found]
+        }
+
+    async def get_all_users(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of users encoded as UserOut, newest first, plus the cursor for the next page."""
+        docs, next_cursor = await fetch_page(self.collection, {"is_banned": False}, cursor, limit,
+                                             projection=USER_OUT_PROJECTION)
+        return [encode_user_out(user) for user in docs], next_cursor
+
+    async def get_user_by_id(self, clerk_id: str) -> dict:
+        """Get a single user encoded as UserOut."""
+        user, _ = await self.get_user_profile(clerk_id)
+        return user
+
+    async def get_user_profile(self, clerk_id: str, if_none_match: Optional[str] = None) -> Tuple[Optional[dict], str]:
+        """
+        Get a single user encoded as UserOut plus its ETag, through the user
+        cache. When the client's If-None-Match still matches, the user is
+        returned as None; on a cache miss that check is only the covered
+        updated_at lookup. Concurrent requests for the same profile share
+        one lookup and one encoded result.
+        """
+        if if_none_match:
+            etag = await read_flights.do(("user", clerk_id, "etag"), self._load_profile_etag, clerk_id)
+            if etag and etag_matches(if_none_match, etag):
+                return None, etag
+        return await read_flights.do(("user", clerk_id, "profile"), self._load_profile, clerk_id)
 
-    async def get_user_by_id(self, clerk_id: str) -> UserOut:
-        user = await self.collection.find_one({"clerk_id": clerk_id})
+    async def _load_profile_etag(self, clerk_id: str) -> Optional[str]:
+        found, current = await user_cache.peek(clerk_id)
+        if not found:
+            current = await self.collection.find_one(
+                {"clerk_id": clerk_id},
+                {"_id": 0, "updated_at": 1}
+            )
+        return weak_etag(current.get("updated_at")) if current else None
+
+    async def _load_profile(self, clerk_id: str) -> Tuple[dict, str]:
+        user = await user_cache.get(clerk_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        return UserOut(**UserModel.from_dict(user).dict())
+        return encode_user_out(user), weak_etag(user.get("updated_at"))
+
+    async def search_users(self, query: str, limit: Optional[int] = None) -> List[dict]:
+        """Top matching public, non-banned users for a free-text query, encoded as UserOut."""
+        limit = clamp_limit(limit)
+        if not query.strip():
+            return []
+        if user_search_index.ready:
+            ranked = [clerk_id for clerk_id, _ in user_search_index.search(query, limit)]
+            if not ranked:
+                return []
+            users = {}
+            # The index can lag writes made on other workers; re-check visibility here
+            cursor = self.collection.find(
+                {"clerk_id": {"$in": ranked}, "is_banned": False, "is_public": True},
+                USER_OUT_PROJECTION
+            )
+            async for user in cursor:
+                users[user["clerk_id"]] = user
+            for clerk_id in ranked:
+                if clerk_id not in users:
+                    # Deleted, banned or made private since the last refresh
+                    user_search_index.remove(clerk_id)
+            return [encode_user_out(users[clerk_id]) for clerk_id in ranked if clerk_id in users]
+
+        if not settings.SEARCH_TEXT_FALLBACK:
+            raise HTTPException(status_code=503, detail="Search index is warming up, retry shortly")
+        # Index still loading: fall back to MongoDB's $text index
+        projection = dict(USER_OUT_PROJECTION, score={"$meta": "textScore"})
+        cursor = self.collection.find(
+            {"$text": {"$search": query}, "is_banned": False, "is_public": True},
+            projection
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return [encode_user_out(user) async for user in cursor]
+
+    async def get_matches(self, clerk_id: str, limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        """Rank users by reciprocal skill overlap with the given user, encoded as UserMatchOut."""
+        if not skill_match_index.ready:
+            raise HTTPException(status_code=503, detail="Match index is warming up, retry shortly")
+        ranked = skill_match_index.matches(clerk_id, clamp_limit(limit), max(offset, 0))
+        if ranked is None:
+            # Created on another worker since the last index refresh
+            user = await user_cache.get(clerk_id)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+            skill_match_index.upsert(user)
+            ranked = skill_match_index.matches(clerk_id, clamp_limit(limit), max(offset, 0))
+        if not ranked:
+            return []
+
+        # Load the page of matched profiles (cache misses in one query), then keep rank order
+        users = await user_cache.get_many(match[0] for match in ranked)
+
+        matches = []
+        for match_id, gives, takes in ranked:
+            user = users.get(match_id)
+            if not user:
+                # Deleted on another worker
+                skill_match_index.remove(match_id)
+                continue
+            if user.get("is_banned") or not user.get("is_public", True):
+                # Banned or made private on another worker since the last refresh
+                skill_match_index.upsert(user)
+                continue
+            they_offer, they_want = skill_match_index.overlap(clerk_id, match_id)
+            matches.append({
+                "user": encode_user_out(user),
+                "score": gives + takes,
+                "skills_they_offer": they_offer,
+                "skills_they_want": they_want
+            })
+        return matches
+
+    async def get_inbox(self, clerk_id: str, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of broadcast messages delivered to the user, newest first."""
+        docs, next_cursor = await fetch_page(get_collection("inbox"), {"clerk_id": clerk_id}, cursor, limit)
+        return [encode_inbox_entry(entry) for entry in docs], next_cursor
 
     async def update_user(self, user_id: str, user_data: UserUpdate) -> UserOut:
         """Update user profile."""
@@ -88,6 +302,9 @@ class UserController:
             
             # Get updated user
             updated_user = await self.collection.find_one({"clerk_id": user_id})
+            await user_cache.invalidate(user_id)
+            skill_match_index.upsert(updated_user)
+            user_search_index.upsert(updated_user)
             return UserOut(**UserModel.from_dict(updated_user).dict())
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
@@ -95,10 +312,18 @@ class UserController:
     async def delete_user(self, user_id: str) -> dict:
         """Delete a user."""
         try:
-            result = await self.collection.delete_one({"_id": ObjectId(user_id)})
-            if result.deleted_count == 0:
+            deleted_user = await self.collection.find_one_and_delete(
+                {"_id": ObjectId(user_id)},
+                projection={"clerk_id": 1, "is_banned": 1}
+            )
+            if not deleted_user:
                 raise HTTPException(status_code=404, detail="User not found")
             
+            await record_user_deleted(deleted_user.get("is_banned", False))
+            skill_match_index.remove(deleted_user.get("clerk_id"))
+            user_search_index.remove(deleted_user.get("clerk_id"))
+            invalidate_admin_role(deleted_user.get("clerk_id"))
+            await user_cache.invalidate(deleted_user.get("clerk_id"))
             return {"message": "User deleted successfully"}
         except Exception as e:
             raise HTTPException(status_code=400, detail="Invalid user ID")
@@ -113,27 +338,11 @@ class UserController:
                 "feedback": rating_data.feedback,
                 "date": rating_data.rated_at if hasattr(rating_data, 'rated_at') else datetime.utcnow()
             }
-            result = await self.collection.update_one(
-                {"_id": ObjectId(user_id)},
-                {
-                    "$push": {"ratings": rating_dict},
-                    "$set": {"updated_at": datetime.utcnow()}
-                }
-            )
-            if result.matched_count == 0:
+            # Append the rating and refresh the aggregates in one atomic write
+            updated_user = await record_rating(self.collection, {"_id": ObjectId(user_id)}, rating_dict)
+            if not updated_user:
                 raise HTTPException(status_code=404, detail="User not found")
-            # Calculate new average rating
-            user = await self.collection.find_one({"_id": ObjectId(user_id)})
-            ratings = user.get("ratings", [])
-            if ratings:
-                total_rating = sum(r.get("rating", r.get("score", 0)) for r in ratings)
-                avg_rating = total_rating / len(ratings)
-                await self.collection.update_one(
-                    {"_id": ObjectId(user_id)},
-                    {"$set": {"rating": round(avg_rating, 2)}}
-                )
-            # Get updated user
-            updated_user = await self.collection.find_one({"_id": ObjectId(user_id)})
+            await user_cache.invalidate(updated_user.get("clerk_id"))
             return UserOut(**UserModel.from_dict(updated_user).dict())
         except Exception as e:
             raise HTTPException(status_code=400, detail="Invalid user ID")
@@ -141,46 +350,29 @@ class UserController:
     async def upload_profile_photo(self, user_id: str, file: UploadFile) -> UserOut:
         """Upload or update profile picture."""
         try:
-            # Check if Cloudinary is configured
-            if not settings.CLOUDINARY_CLOUD_NAME or not settings.CLOUDINARY_API_KEY:
-                # Fallback to local/mock storage for testing
-                file_content = await file.read()
-                if len(file_content) == 0:
-                    raise HTTPException(status_code=400, detail="Empty file")
-                
-                # Create a mock profile URL for testing
-                mock_profile_url = f"https://example.com/profile_photos/{user_id}_{file.filename}"
-                
-                # Update user profile with mock URL
-                result = await self.collection.update_one(
-                    {"_id": ObjectId(user_id)},
-                    {
-                        "$set": {
-                            "profile_url": mock_profile_url,
-                            "updated_at": datetime.utcnow()
-                        }
-                    }
-                )
-            else:
-                # Use Cloudinary if configured
-                upload_result = await CloudinaryService.update_profile_picture(file, user_id)
-                
-                # Update user profile with Cloudinary URL
-                result = await self.collection.update_one(
-                    {"_id": ObjectId(user_id)},
-                    {
-                        "$set": {
-                            "profile_url": upload_result["url"],
-                            "updated_at": datetime.utcnow()
-                        }
+            # Cloudinary when configured, otherwise local content-addressed storage
+            storage = get_storage_service()
+            upload_result = await storage.update_profile_picture(file, user_id)
+            
+            result = await self.collection.update_one(
+                {"_id": ObjectId(user_id)},
+                {
+                    "$set": {
+                        "profile_url": upload_result["url"],
+                        "updated_at": datetime.utcnow()
                     }
-                )
+                }
+            )
             
             if result.matched_count == 0:
                 raise HTTPException(status_code=404, detail="User not found")
             
             # Get updated user
             updated_user = await self.collection.find_one({"_id": ObjectId(user_id)})
+            await user_cache.invalidate(updated_user.get("clerk_id"))
             return UserOut(**UserModel.from_dict(updated_user).dict())
+        except HTTPException:
+            # Keep 404s and upload back-pressure (503) intact
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
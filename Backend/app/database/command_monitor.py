@@ -0,0 +1,58 @@
+from pymongo import monitoring
+from ..utils.metrics import (
+    current_route, MONGO_COMMAND_DURATION, MONGO_DOCUMENTS_RETURNED, MONGO_COMMAND_FAILURES
+)
+
+# Commands whose reply carries documents in a cursor batch
+_CURSOR_BATCHES = ("firstBatch", "nextBatch")
+
+def _collection_name(event: monitoring.CommandStartedEvent) -> str:
+    command = event.command
+    if event.command_name == "getMore":
+        return command.get("collection", "-")
+    target = command.get(event.command_name)
+    return target if isinstance(target, str) else "-"
+
+def _documents_returned(command_name: str, reply) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        for key in _CURSOR_BATCHES:
+            if key in cursor:
+                return len(cursor[key])
+    if command_name.lower() == "findandmodify":
+        return 1 if reply.get("value") is not None else 0
+    return 0
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Records duration, documents returned and failures for every MongoDB
+    command, labelled with collection, command name and the route of the
+    request that issued it.
+
+    The collection is only present on the started event, so it is kept by
+    request id until the matching succeeded/failed event arrives.
+    """
+
+    def __init__(self):
+        self._started = {}
+
+    def started(self, event):
+        self._started[(event.connection_id, event.request_id)] = (_collection_name(event), current_route())
+
+    def _labels(self, event):
+        collection, route = self._started.pop((event.connection_id, event.request_id), ("-", current_route()))
+        return (collection, event.command_name, route)
+
+    def succeeded(self, event):
+        labels = self._labels(event)
+        MONGO_COMMAND_DURATION.observe(labels, event.duration_micros / 1e6)
+        returned = _documents_returned(event.command_name, event.reply)
+        if returned:
+            MONGO_DOCUMENTS_RETURNED.inc(labels, returned)
+
+    def failed(self, event):
+        labels = self._labels(event)
+        MONGO_COMMAND_DURATION.observe(labels, event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.inc(labels)
+
+command_metrics = CommandMetricsListener()
@@ -0,0 +1,238 @@
+import logging
+from typing import List
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from bson import ObjectId
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Declared index set, keyed by collection. ensure_indexes() creates anything
+# missing; create_indexes is a no-op for indexes that already exist.
+INDEXES = {
+    "users": [
+        IndexModel([("clerk_id", ASCENDING)], name="clerk_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel(
+            [("is_banned", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="is_banned_created_at_id"
+        ),
+        # Covers the profile ETag lookup (no document fetch)
+        IndexModel([("clerk_id", ASCENDING), ("updated_at", DESCENDING)], name="clerk_id_updated_at"),
+        # Periodic refresh of the in-memory match and search indexes
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+        # Backs /users/search while the in-memory index is still loading
+        IndexModel(
+            [("fullname", TEXT), ("username", TEXT), ("address", TEXT),
+             ("skills_offered", TEXT), ("skills_wanted", TEXT)],
+            name="profile_text"
+        ),
+    ],
+    "swaps": [
+        # One per side of the my-swaps $or, in page order, so keyset pages
+        # merge two index scans instead of sorting in memory
+        IndexModel(
+            [("requester_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="requester_created_at_id"
+        ),
+        IndexModel(
+            [("receiver_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="receiver_created_at_id"
+        ),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        # Admin export filtered by status
+        IndexModel(
+            [("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="status_created_at_id"
+        ),
+        # Cover the my-swaps ETag lookup (including the other participant's
+        # id), one index per side of the $or
+        IndexModel(
+            [("requester_id", ASCENDING), ("updated_at", DESCENDING), ("receiver_id", ASCENDING)],
+            name="requester_updated_at_receiver"
+        ),
+        IndexModel(
+            [("receiver_id", ASCENDING), ("updated_at", DESCENDING), ("requester_id", ASCENDING)],
+            name="receiver_updated_at_requester"
+        ),
+    ],
+    "inbox": [
+        IndexModel(
+            [("clerk_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="clerk_id_created_at_id"
+        ),
+        # Makes replaying a fan-out chunk after a restart idempotent
+        IndexModel([("broadcast_id", ASCENDING), ("clerk_id", ASCENDING)], name="broadcast_clerk_id_unique", unique=True),
+    ],
+    "broadcasts": [
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "stats_daily": [
+        # Drops daily stats buckets once they fall out of the window
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "media": [
+        # Dropping the dedupe records of a deleted image
+        IndexModel([("public_id", ASCENDING)], name="public_id"),
+    ],
+}
+
+# Representative shape of every query the controllers issue. Used by
+# verify_query_plans() to make sure none of them falls back to a COLLSCAN.
+_SAMPLE_CLERK_ID = "user_query_plan_check"
+_SAMPLE_ID = ObjectId()
+_SAMPLE_DATE = datetime(2024, 1, 1)
+
+# Keyset condition fetch_page adds for every page after the first
+_AFTER_CURSOR = {"$or": [
+    {"created_at": {"$lt": _SAMPLE_DATE}},
+    {"created_at": _SAMPLE_DATE, "_id": {"$lt": _SAMPLE_ID}},
+    {"created_at": None}
+]}
+_FOR_USER = {"$or": [{"requester_id": _SAMPLE_CLERK_ID}, {"receiver_id": _SAMPLE_CLERK_ID}]}
+
+QUERY_SHAPES = [
+    # UserController
+    ("users.by_clerk_id", "users", {"clerk_id": _SAMPLE_CLERK_ID}, None),
+    ("users.by_id", "users", {"_id": _SAMPLE_ID}, None),
+    ("users.exists", "users", {
+        "$or": [{"clerk_id": _SAMPLE_CLERK_ID}, {"email": "check@example.com"}]
+    }, None),
+    ("users.list_page", "users", {
+        "$and": [{"is_banned": False}, _AFTER_CURSOR]
+    }, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("users.etag", "users", {"clerk_id": _SAMPLE_CLERK_ID}, None),
+    ("users.text_search", "users", {
+        "$text": {"$search": "python"}, "is_banned": False, "is_public": True
+    }, None),
+    ("users.search_hydrate", "users", {
+        "clerk_id": {"$in": [_SAMPLE_CLERK_ID]}, "is_banned": False, "is_public": True
+    }, None),
+    # SwapController
+    ("users.names", "users", {"clerk_id": {"$in": [_SAMPLE_CLERK_ID]}}, None),
+    ("swaps.by_id", "swaps", {"_id": _SAMPLE_ID}, None),
+    ("swaps.pending_pair", "swaps", {
+        "requester_id": _SAMPLE_CLERK_ID, "receiver_id": "user_other", "status": "pending"
+    }, None),
+    ("swaps.for_user", "swaps", _FOR_USER, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("swaps.for_user_next_page", "swaps", {
+        "$and": [_FOR_USER, _AFTER_CURSOR]
+    }, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    # AdminController
+    ("users.admin_list", "users", {
+        "role": {"$not": {"$regex": "^(admin|administrator)$", "$options": "i"}}
+    }, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("users.is_admin", "users", {
+        "clerk_id": _SAMPLE_CLERK_ID, "role": {"$in": ["admin", "Admin"]}, "is_banned": {"$ne": True}
+    }, None),
+    ("swaps.admin_list", "swaps", {}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("users.export_range", "users", {"created_at": {"$gte": _SAMPLE_DATE, "$lt": _SAMPLE_DATE}}, None),
+    ("users.export_banned", "users", {"is_banned": True, "created_at": {"$gte": _SAMPLE_DATE}}, None),
+    ("swaps.export_range", "swaps", {"created_at": {"$gte": _SAMPLE_DATE, "$lt": _SAMPLE_DATE}}, None),
+    ("swaps.export_status", "swaps", {"status": "accepted"}, None),
+    ("swaps.export_status_range", "swaps", {"status": "accepted", "created_at": {"$gte": _SAMPLE_DATE}}, None),
+    # Stats rebuild: the per-day windows (the $facet totals tally the whole collection by design)
+    ("users.stats_created", "users", {"created_at": {"$gte": _SAMPLE_DATE}}, None),
+    ("swaps.stats_created", "swaps", {"created_at": {"$gte": _SAMPLE_DATE}}, None),
+    # Uploaded-media dedupe
+    ("media.by_key", "media", {"_id": "sha256-variant"}, None),
+    ("media.by_public_id", "media", {"public_id": "sha256"}, None),
+    # In-memory index refresh
+    ("users.changed_since", "users", {"updated_at": {"$gte": _SAMPLE_DATE}}, [("updated_at", ASCENDING)]),
+    # Broadcast fan-out and inbox
+    ("users.broadcast_recipients", "users", {
+        "is_banned": {"$ne": True}, "_id": {"$gt": _SAMPLE_ID}
+    }, [("_id", ASCENDING)]),
+    ("broadcasts.pending", "broadcasts", {"status": {"$in": ["queued", "delivering"]}}, None),
+    ("inbox.page", "inbox", {"clerk_id": _SAMPLE_CLERK_ID}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+]
+
+# Aggregations the controllers run, checked the same way: (name, collection, pipeline)
+PIPELINE_SHAPES = [
+    # SwapController: the my-swaps ETag
+    ("swaps.etag", "swaps", [
+        {"$match": _FOR_USER},
+        {"$group": {
+            "_id": None,
+            "updated_at": {"$max": "$updated_at"},
+            "count": {"$sum": 1},
+            "requesters": {"$addToSet": "$requester_id"},
+            "receivers": {"$addToSet": "$receiver_id"}
+        }}
+    ]),
+]
+
+async def ensure_indexes(database) -> List[str]:
+    """
+    Idempotently create the declared index set. Returns the indexes that
+    could not be built, as "collection.index_name", each logged as an error.
+    Raises RuntimeError if a unique index is among them: without it, user
+    creation can't detect duplicates, so the API must not start.
+    """
+    failed = []
+    failed_unique = []
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        try:
+            await collection.create_indexes(indexes)
+        except OperationFailure:
+            # Usually a conflicting existing index or duplicate data under a
+            # unique key; retry one at a time to find which ones failed
+            for index in indexes:
+                try:
+                    await collection.create_indexes([index])
+                except OperationFailure as e:
+                    name = index.document["name"]
+                    logger.error("Failed to create index %s.%s: %s", collection_name, name, e)
+                    failed.append(f"{collection_name}.{name}")
+                    if index.document.get("unique"):
+                        failed_unique.append(f"{collection_name}.{name}")
+    if failed_unique:
+        raise RuntimeError(f"Unique indexes could not be built: {', '.join(failed_unique)}")
+    if failed:
+        logger.error("MongoDB indexes missing: %s", ", ".join(failed))
+    else:
+        print("MongoDB indexes ensured.")
+    return failed
+
+def _find_stages(plan, stages=None):
+    """Collect every stage name in an explain() plan tree, skipping rejected plans."""
+    if stages is None:
+        stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key, value in plan.items():
+            if key != "rejectedPlans":
+                _find_stages(value, stages)
+    elif isinstance(plan, list):
+        for item in plan:
+            _find_stages(item, stages)
+    return stages
+
+async def verify_query_plans(database):
+    """
+    Run explain() on every declared controller query and aggregation and
+    raise if any of them uses a collection scan.
+    """
+    offenders = []
+    for name, collection_name, query, sort in QUERY_SHAPES:
+        cursor = database[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        stages = _find_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages:
+            offenders.append(name)
+    for name, collection_name, pipeline in PIPELINE_SHAPES:
+        # The plan sits under queryPlanner or, when not pushed down, under the $cursor stage
+        explanation = await database.command({
+            "explain": {"aggregate": collection_name, "pipeline": pipeline, "cursor": {}},
+            "verbosity": "queryPlanner"
+        })
+        if "COLLSCAN" in _find_stages(explanation):
+            offenders.append(name)
+    if offenders:
+        raise RuntimeError(f"Queries using COLLSCAN: {', '.join(offenders)}")
+    print(f"Verified {len(QUERY_SHAPES) + len(PIPELINE_SHAPES)} query plans.")
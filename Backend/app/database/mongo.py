@@ -1,5 +1,13 @@
+import asyncio
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
 from ..config import settings
+from .indexes import ensure_indexes, verify_query_plans
+from .pool_monitor import pool_stats
+from .command_monitor import command_metrics
+
+# Python module each wire compressor needs
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
 
 class Database:
     def __init__(self):
@@ -8,12 +16,54 @@ class Database:
 
 db = Database()
 
+def available_compressors() -> list:
+    """Configured compressors whose library is installed, in preference order."""
+    compressors = []
+    for name in settings.MONGODB_COMPRESSORS.split(","):
+        name = name.strip().lower()
+        module = _COMPRESSOR_MODULES.get(name)
+        if not module:
+            continue
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        compressors.append(name)
+    return compressors
+
+def client_options() -> dict:
+    """Keyword arguments for the Motor client, built from settings."""
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGODB_SOCKET_TIMEOUT_MS,
+        "event_listeners": [pool_stats]
+    }
+    if settings.METRICS_ENABLED:
+        options["event_listeners"].append(command_metrics)
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+async def warm_pool(connections: int):
+    """Open pool connections with concurrent pings so the first requests don't pay for handshakes."""
+    connections = min(connections, settings.MONGODB_MAX_POOL_SIZE)
+    if connections > 0:
+        await asyncio.gather(*(db.database.command("ping") for _ in range(connections)))
+
 async def connect_to_mongo():
-    """Create database connection."""
-    db.client = AsyncIOMotorClient(settings.MONGODB_URL)  # type: ignore
+    """Create database connection, warming the pool while the indexes are ensured."""
+    db.client = AsyncIOMotorClient(settings.MONGODB_URL, **client_options())  # type: ignore
     if db.client:
         db.database = db.client[settings.DATABASE_NAME]  # type: ignore
     print("Connected to MongoDB.")
+    await asyncio.gather(ensure_indexes(db.database), warm_pool(settings.MONGODB_WARM_CONNECTIONS))
+    if settings.VERIFY_QUERY_PLANS:
+        await verify_query_plans(db.database)
 
 async def close_mongo_connection():
     """Close database connection."""
@@ -21,6 +71,14 @@ async def close_mongo_connection():
         db.client.close()
         print("Disconnected from MongoDB.")
 
+async def ping_mongo() -> float:
+    """Round-trip a ping to MongoDB and return the latency in milliseconds."""
+    if db.database is None:
+        raise RuntimeError("Database not connected")
+    started = time.perf_counter()
+    await db.database.command("ping")
+    return (time.perf_counter() - started) * 1000
+
 def get_collection(collection_name: str):  # type: ignore
     """Get a collection from the database."""
     if db.database is None:
@@ -1,15 +1,76 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import user_routes, swap_routes, admin_routes
-from .database.mongo import connect_to_mongo, close_mongo_connection
+from .routes import user_routes, swap_routes, admin_routes, media_routes
+from .database.mongo import connect_to_mongo, close_mongo_connection, get_collection, ping_mongo, available_compressors
+from .database.pool_monitor import pool_stats
+from .services.matching_service import skill_match_index
+from .services.search_service import user_search_index
+from .services.index_refresh import keep_indexes_fresh
+from .services.broadcast_service import resume_pending_deliveries, running_deliveries
+from .services.user_cache import user_cache
+from .services.stats_service import ensure_stats
 from .config import settings
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.etag import ETAG_HEADER
+from .utils.metrics import MetricsMiddleware, render_metrics, PROMETHEUS_CONTENT_TYPE
+from .utils.rate_limit import RateLimitMiddleware, rate_limiter
+
+def log_worker_settings():
+    """One line per worker with the settings it actually runs with."""
+    loop = type(asyncio.get_running_loop())
+    compressors = ",".join(available_compressors()) or "none"
+    print(
+        f"Worker {os.getpid()} started: loop={loop.__module__}.{loop.__name__}, "
+        f"mongo pool={settings.MONGODB_MIN_POOL_SIZE}-{settings.MONGODB_MAX_POOL_SIZE}, compressors={compressors}, "
+        f"metrics={settings.METRICS_ENABLED}, shared user cache={bool(settings.USER_CACHE_REDIS_URL)}"
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect to MongoDB and start background work; close connections on shutdown"""
+    log_worker_settings()
+    # Independent startup steps run concurrently
+    await asyncio.gather(connect_to_mongo(), user_cache.start(), rate_limiter.start())
+    # Build the in-memory indexes in the background so startup isn't blocked
+    app.state.skill_index_task = asyncio.create_task(skill_match_index.build(get_collection("users")))
+    app.state.search_index_task = asyncio.create_task(user_search_index.build(get_collection("users")))
+    # ...and keep them in step with writes handled by other workers
+    app.state.index_refresh_task = asyncio.create_task(
+        keep_indexes_fresh(
+            get_collection("users"), [skill_match_index, user_search_index], settings.INDEX_REFRESH_SECONDS
+        )
+    )
+    # First start against a database without stats counters: count once
+    app.state.stats_task = asyncio.create_task(ensure_stats())
+    app.state.delivery_tasks = await resume_pending_deliveries()
+    yield
+    # Stop background work before the clients it uses are closed; deliveries
+    # started by requests since startup are cancelled too
+    background = [
+        app.state.skill_index_task, app.state.search_index_task, app.state.index_refresh_task,
+        app.state.stats_task, *app.state.delivery_tasks, *running_deliveries()
+    ]
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await rate_limiter.stop()
+    await user_cache.stop()
+    await close_mongo_connection()
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
+# Inside CORS, so browsers can read 429/503 responses
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -17,22 +78,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, "Retry-After"],
 )
 
+# Outermost, so latency includes every other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(user_routes.router)
 app.include_router(swap_routes.router)
 app.include_router(admin_routes.router)
-
-@app.on_event("startup")
-async def startup_event():
-    """Connect to MongoDB on startup"""
-    await connect_to_mongo()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close MongoDB connection on shutdown"""
-    await close_mongo_connection()
+app.include_router(media_routes.router)
 
 @app.get("/")
 async def root():
@@ -47,3 +104,21 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+@app.get("/metrics")
+async def metrics():
+    """Request and MongoDB command metrics in Prometheus text format"""
+    return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness check: MongoDB ping latency and live connection-pool counters"""
+    pool = {**pool_stats.snapshot(), "max_pool_size": settings.MONGODB_MAX_POOL_SIZE}
+    try:
+        ping_ms = await ping_mongo()
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "mongo": {"error": str(e)}, "pool": pool}
+        )
+    return {"status": "ready", "mongo": {"ping_ms": round(ping_ms, 3)}, "pool": pool}
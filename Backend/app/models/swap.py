@@ -3,6 +3,32 @@ from typing import Optional
 from bson import ObjectId
 from pydantic import BaseModel, Field
 
+# Allowed swap status transitions, shared by the accept/reject/cancel handlers.
+# actor: the participant field that must match the caller.
+SWAP_TRANSITIONS = {
+    "accept": {
+        "actor": "receiver_id",
+        "from": "pending",
+        "to": "accepted",
+        "forbidden": "Only receiver can accept swap",
+        "invalid_state": "Swap is not pending",
+    },
+    "reject": {
+        "actor": "receiver_id",
+        "from": "pending",
+        "to": "rejected",
+        "forbidden": "Only receiver can reject swap",
+        "invalid_state": "Swap is not pending",
+    },
+    "cancel": {
+        "actor": "requester_id",
+        "from": "pending",
+        "to": "cancelled",
+        "forbidden": "Only requester can cancel swap",
+        "invalid_state": "Only pending swaps can be cancelled",
+    },
+}
+
 class SwapModel(BaseModel):
     id: Optional[str] = Field(default=None, alias="_id")
     requester_id: str
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from bson import ObjectId
 from pydantic import BaseModel, Field
 
@@ -17,6 +17,10 @@ class UserModel(BaseModel):
     is_public: bool = True
     is_banned: bool = False
     rating: Optional[float] = None
+    # Maintained by rating_service alongside the ratings array
+    rating_count: int = 0
+    rating_sum: float = 0
+    rating_histogram: Dict[str, int] = {}
     role: str = "user"
     ratings: List[dict] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
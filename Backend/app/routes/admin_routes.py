@@ -1,14 +1,32 @@
-from fastapi import APIRouter, HTTPException, Header, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Header, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import datetime
 from ..controllers.admin_controller import AdminController
 from ..schemas.user_schema import UserOut
 from ..schemas.swap_schema import SwapOut
-from ..schemas.admin_schema import AdminBroadcast, AdminUserBanRequest
+from ..schemas.admin_schema import AdminBroadcast, AdminUserBanRequest, BroadcastOut
+from ..utils.pagination import page_response
+from ..utils.serialization import FastJSONResponse
+from ..utils.export import EXPORT_FORMATS, DEFAULT_EXPORT_BATCH_SIZE
+from ..utils.auth import admin_role_cache
+from ..services.user_cache import user_cache
+from ..utils.single_flight import read_flights
 
 router = APIRouter(prefix="/admin", tags=["admin"])
-admin_controller = AdminController()
+_admin_controller: Optional[AdminController] = None
 
-async def verify_admin(x_clerk_user_id: str = Header(...)):
+def get_admin_controller() -> AdminController:
+    """The shared AdminController, created on first use rather than at import."""
+    global _admin_controller
+    if _admin_controller is None:
+        _admin_controller = AdminController()
+    return _admin_controller
+
+async def verify_admin(
+    x_clerk_user_id: str = Header(...),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
     """Verify that the user is an admin"""
     is_admin = await admin_controller.is_admin(x_clerk_user_id)
     if not is_admin:
@@ -16,21 +34,107 @@ async def verify_admin(x_clerk_user_id: str = Header(...)):
     return x_clerk_user_id
 
 @router.get("/users", response_model=List[UserOut])
-async def get_all_users(admin_id: str = Depends(verify_admin)):
-    """List all users (admin only)"""
-    return await admin_controller.get_all_users()
+async def get_all_users(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
+    """List one page of users (admin only); next cursor is in the X-Next-Cursor header"""
+    users, next_cursor = await admin_controller.get_all_users(cursor, limit)
+    return page_response(users, next_cursor)
 
 @router.put("/ban/{user_id}", response_model=UserOut)
-async def ban_user(ban_request: AdminUserBanRequest, admin_id: str = Depends(verify_admin)):
+async def ban_user(
+    ban_request: AdminUserBanRequest,
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
     """Ban a user (admin only)"""
-    return await admin_controller.ban_user(ban_request)
+    return FastJSONResponse(await admin_controller.ban_user(ban_request))
 
 @router.get("/swaps", response_model=List[SwapOut])
-async def get_all_swaps(admin_id: str = Depends(verify_admin)):
-    """View all swap requests (admin only)"""
-    return await admin_controller.get_all_swaps()
+async def get_all_swaps(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
+    """View one page of swap requests (admin only); next cursor is in the X-Next-Cursor header"""
+    swaps, next_cursor = await admin_controller.get_all_swaps(cursor, limit)
+    return page_response(swaps, next_cursor)
+
+def _export_response(stream, name: str, fmt: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+@router.get("/export/users")
+async def export_users(
+    format: str = "csv",
+    batch_size: int = Query(DEFAULT_EXPORT_BATCH_SIZE, ge=1),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    banned: Optional[bool] = None,
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
+    """Stream all matching users as CSV (default) or NDJSON (admin only)"""
+    stream = admin_controller.export_users(format, batch_size, created_from, created_to, banned)
+    return _export_response(stream, "users", format)
+
+@router.get("/export/swaps")
+async def export_swaps(
+    format: str = "csv",
+    batch_size: int = Query(DEFAULT_EXPORT_BATCH_SIZE, ge=1),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    status: Optional[str] = None,
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
+    """Stream all matching swaps as CSV (default) or NDJSON (admin only)"""
+    stream = admin_controller.export_swaps(format, batch_size, created_from, created_to, status)
+    return _export_response(stream, "swaps", format)
 
 @router.post("/broadcast")
-async def send_broadcast(broadcast_data: AdminBroadcast, admin_id: str = Depends(verify_admin)):
-    """Send a platform-wide message (admin only)"""
-    return await admin_controller.send_broadcast(broadcast_data)
+async def send_broadcast(
+    broadcast_data: AdminBroadcast,
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
+    """Send a platform-wide message (admin only); delivery to inboxes runs in the background"""
+    return await admin_controller.send_broadcast(broadcast_data, admin_id)
+
+@router.get("/broadcast/{broadcast_id}", response_model=BroadcastOut)
+async def get_broadcast(
+    broadcast_id: str,
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
+    """Delivery progress of a broadcast (admin only)"""
+    return await admin_controller.get_broadcast(broadcast_id)
+
+@router.get("/stats")
+async def get_stats(
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
+    """User and swap counters plus daily buckets, from the precomputed stats (admin only)"""
+    return await admin_controller.get_stats()
+
+@router.post("/stats/rebuild")
+async def rebuild_stats(
+    apply: bool = True,
+    admin_id: str = Depends(verify_admin),
+    admin_controller: AdminController = Depends(get_admin_controller)
+):
+    """Recount stats from the collections; apply=false only reports drift (admin only)"""
+    return await admin_controller.rebuild_stats(apply)
+
+@router.get("/cache-stats")
+async def get_cache_stats(admin_id: str = Depends(verify_admin)):
+    """Hit/miss counters for in-process caches and coalesced reads (admin only)"""
+    return {"admin_roles": admin_role_cache.stats(), "users": user_cache.stats(), "single_flight": read_flights.stats()}
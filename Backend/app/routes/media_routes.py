@@ -0,0 +1,24 @@
+import os
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from ..services.local_storage_service import MEDIA_HASH_RE, media_path, sniff_content_type
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+# Content-addressed files never change, so clients may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/{digest}")
+async def get_media(digest: str, request: Request):
+    """Serve a locally stored image by its content hash"""
+    if not MEDIA_HASH_RE.match(digest):
+        raise HTTPException(status_code=404, detail="Media not found")
+    path = media_path(digest)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=sniff_content_type(path), headers=headers)
@@ -1,33 +1,72 @@
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from typing import List, Optional
 from ..controllers.swap_controller import SwapController
 from ..schemas.swap_schema import SwapCreate, SwapOut, SwapOutWithNames, SwapFeedbackResponse
+from ..utils.pagination import page_response
+from ..utils.etag import ETAG_HEADER, not_modified
 
 router = APIRouter(prefix="/swaps", tags=["swaps"])
-swap_controller = SwapController()
+_swap_controller: Optional[SwapController] = None
+
+def get_swap_controller() -> SwapController:
+    """The shared SwapController, created on first use rather than at import."""
+    global _swap_controller
+    if _swap_controller is None:
+        _swap_controller = SwapController()
+    return _swap_controller
 
 @router.post("/request", response_model=SwapOutWithNames)
-async def create_swap_request(swap_data: SwapCreate, x_clerk_user_id: str = Header(...)):
+async def create_swap_request(
+    swap_data: SwapCreate,
+    x_clerk_user_id: str = Header(...),
+    swap_controller: SwapController = Depends(get_swap_controller)
+):
     """Send a swap request to another user"""
     return await swap_controller.create_swap_request(x_clerk_user_id, swap_data)
 
 @router.get("/my-swaps", response_model=List[SwapOutWithNames])
-async def get_my_swaps(x_clerk_user_id: str = Header(...)):
-    """Get all swaps (sent & received) for user"""
-    return await swap_controller.get_user_swaps(x_clerk_user_id)
+async def get_my_swaps(
+    x_clerk_user_id: str = Header(...),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    if_none_match: Optional[str] = Header(None),
+    swap_controller: SwapController = Depends(get_swap_controller)
+):
+    """
+    Get one page of swaps (sent & received) for user; next cursor is in the X-Next-Cursor header.
+    Answers 304 when If-None-Match matches the current ETag.
+    """
+    swaps, next_cursor, etag = await swap_controller.get_user_swaps_conditional(
+        x_clerk_user_id, cursor, limit, if_none_match
+    )
+    if swaps is None:
+        return not_modified(etag)
+    return page_response(swaps, next_cursor, headers={ETAG_HEADER: etag})
 
 @router.put("/accept/{swap_id}")
-async def accept_swap(swap_id: str, x_clerk_user_id: str = Header(...)):
+async def accept_swap(
+    swap_id: str,
+    x_clerk_user_id: str = Header(...),
+    swap_controller: SwapController = Depends(get_swap_controller)
+):
     """Accept a swap request"""
     return await swap_controller.accept_swap(swap_id, x_clerk_user_id)
 
 @router.put("/reject/{swap_id}", response_model=SwapOut)
-async def reject_swap(swap_id: str, x_clerk_user_id: str = Header(...)):
+async def reject_swap(
+    swap_id: str,
+    x_clerk_user_id: str = Header(...),
+    swap_controller: SwapController = Depends(get_swap_controller)
+):
     """Reject a swap request"""
     return await swap_controller.reject_swap(swap_id, x_clerk_user_id)
 
 @router.delete("/cancel/{swap_id}")
-async def cancel_swap(swap_id: str, x_clerk_user_id: str = Header(...)):
+async def cancel_swap(
+    swap_id: str,
+    x_clerk_user_id: str = Header(...),
+    swap_controller: SwapController = Depends(get_swap_controller)
+):
     """Cancel a pending swap"""
     return await swap_controller.cancel_swap(swap_id, x_clerk_user_id)
 
@@ -40,7 +79,8 @@ async def submit_swap_feedback(
     swap_id: str, 
     feedback: str, 
     rating: int, 
-    x_clerk_user_id: str = Header(...)
+    x_clerk_user_id: str = Header(...),
+    swap_controller: SwapController = Depends(get_swap_controller)
 ):
     """Submit feedback and rating for a swap. 
     Both requester and receiver can submit their own feedback.
@@ -1,33 +1,114 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Header
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header, Query
 from typing import List, Optional
 from ..controllers.user_controller import UserController
-from ..schemas.user_schema import UserCreate, UserUpdate, UserOut, RatingEntry
+from ..schemas.user_schema import (
+    UserCreate, UserUpdate, UserOut, RatingEntry, UserMatchOut, InboxEntryOut,
+    UserBatchGetRequest, UserBatchGetOut, UserBatchCreateRequest, UserBatchCreateOut
+)
+from ..utils.pagination import DEFAULT_PAGE_LIMIT, page_response
+from ..utils.serialization import FastJSONResponse
+from ..utils.etag import ETAG_HEADER, not_modified
 
 router = APIRouter(prefix="/users", tags=["users"])
-user_controller = UserController()
+_user_controller: Optional[UserController] = None
+
+def get_user_controller() -> UserController:
+    """The shared UserController, created on first use rather than at import."""
+    global _user_controller
+    if _user_controller is None:
+        _user_controller = UserController()
+    return _user_controller
 
 @router.post("/", response_model=UserOut)
-async def create_user(user_data: UserCreate):
+async def create_user(
+    user_data: UserCreate,
+    user_controller: UserController = Depends(get_user_controller)
+):
     """Create/register a new user"""
     return await user_controller.create_user(user_data)
 
+@router.post("/batch-create", response_model=UserBatchCreateOut)
+async def batch_create_users(
+    batch: UserBatchCreateRequest,
+    user_controller: UserController = Depends(get_user_controller)
+):
+    """Register many users in one request; duplicates are reported per item instead of failing the batch"""
+    return FastJSONResponse(await user_controller.batch_create_users(batch.users))
+
+@router.post("/batch-get", response_model=UserBatchGetOut)
+async def batch_get_users(
+    batch: UserBatchGetRequest,
+    user_controller: UserController = Depends(get_user_controller)
+):
+    """Get many users by Clerk ID in one request"""
+    return FastJSONResponse(await user_controller.batch_get_users(batch.clerk_ids))
+
 @router.get("/", response_model=List[UserOut])
-async def get_all_users():
-    """Get all users"""
-    return await user_controller.get_all_users()
+async def get_all_users(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    user_controller: UserController = Depends(get_user_controller)
+):
+    """Get one page of users; the next page's cursor is returned in the X-Next-Cursor header"""
+    users, next_cursor = await user_controller.get_all_users(cursor, limit)
+    return page_response(users, next_cursor)
+
+@router.get("/search", response_model=List[UserOut])
+async def search_users(
+    q: str,
+    limit: int = Query(20, ge=1),
+    user_controller: UserController = Depends(get_user_controller)
+):
+    """Full-text search over name, username, address and skills, tolerant of small typos"""
+    return FastJSONResponse(await user_controller.search_users(q, limit))
 
 @router.get("/{clerk_id}", response_model=UserOut)
-async def get_user_by_clerk_id(clerk_id: str):
-    """Get single user by Clerk ID"""
-    return await user_controller.get_user_by_id(clerk_id)
+async def get_user_by_clerk_id(
+    clerk_id: str,
+    if_none_match: Optional[str] = Header(None),
+    user_controller: UserController = Depends(get_user_controller)
+):
+    """Get single user by Clerk ID; answers 304 when If-None-Match matches the current ETag"""
+    user, etag = await user_controller.get_user_profile(clerk_id, if_none_match)
+    if user is None:
+        return not_modified(etag)
+    return FastJSONResponse(user, headers={ETAG_HEADER: etag})
+
+@router.get("/{clerk_id}/matches", response_model=List[UserMatchOut])
+async def get_user_matches(
+    clerk_id: str,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1),
+    offset: int = Query(0, ge=0),
+    user_controller: UserController = Depends(get_user_controller)
+):
+    """Users who offer what this user wants AND want what this user offers, best matches first"""
+    return FastJSONResponse(await user_controller.get_matches(clerk_id, limit, offset))
+
+@router.get("/{clerk_id}/inbox", response_model=List[InboxEntryOut])
+async def get_user_inbox(
+    clerk_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1),
+    user_controller: UserController = Depends(get_user_controller)
+):
+    """Get one page of broadcast messages for a user; next cursor is in the X-Next-Cursor header"""
+    entries, next_cursor = await user_controller.get_inbox(clerk_id, cursor, limit)
+    return page_response(entries, next_cursor)
 
 @router.put("/{clerk_id}", response_model=UserOut)
-async def update_user(clerk_id: str, user_data: UserUpdate):
+async def update_user(
+    clerk_id: str,
+    user_data: UserUpdate,
+    user_controller: UserController = Depends(get_user_controller)
+):
     """Update user profile by Clerk ID"""
     return await user_controller.update_user(clerk_id, user_data)
 
 @router.delete("/{clerk_id}")
-async def delete_user(clerk_id: str):
+async def delete_user(
+    clerk_id: str,
+    user_controller: UserController = Depends(get_user_controller)
+):
     """Delete a user by Clerk ID"""
     return await user_controller.delete_user(clerk_id)
 
@@ -37,7 +118,11 @@ async def delete_user(clerk_id: str):
 #     return await user_controller.rate_user(user_id, rating_data)
 
 @router.post("/{clerk_id}/upload-photo", response_model=UserOut)
-async def upload_profile_photo(clerk_id: str, file: UploadFile = File(...)):
+async def upload_profile_photo(
+    clerk_id: str,
+    file: UploadFile = File(...),
+    user_controller: UserController = Depends(get_user_controller)
+):
     """Upload or update profile picture via Cloudinary (by Clerk ID)"""
     if not file.content_type or not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 
 class AdminBroadcast(BaseModel):
     title: str
@@ -8,3 +9,15 @@ class AdminBroadcast(BaseModel):
 class AdminUserBanRequest(BaseModel):
     user_id: str
     reason: Optional[str] = None
+
+class BroadcastOut(BaseModel):
+    id: str
+    title: str
+    message: str
+    sent_by: Optional[str] = None
+    status: str = "queued"  # queued, delivering, delivered, failed
+    total_recipients: int = 0
+    delivered: int = 0
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    error: Optional[str] = None
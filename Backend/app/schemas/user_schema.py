@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, HttpUrl, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 import uuid
 import datetime
 
@@ -24,6 +24,8 @@ class UserBase(BaseModel):
     is_public: bool = True
     is_banned: bool = False
     rating: Optional[float] = None
+    rating_count: int = 0
+    rating_histogram: Dict[str, int] = {}
     role: str = "user"
     ratings: List[RatingEntry] = []
 
@@ -50,3 +52,40 @@ class UserUpdate(BaseModel):
 
 class UserOut(UserBase):
     id: str
+
+class UserMatchOut(BaseModel):
+    user: UserOut
+    score: int
+    skills_they_offer: List[str] = []
+    skills_they_want: List[str] = []
+
+class InboxEntryOut(BaseModel):
+    id: str
+    broadcast_id: str
+    title: str
+    message: str
+    read: bool = False
+    created_at: datetime.datetime
+
+class UserBatchGetRequest(BaseModel):
+    clerk_ids: List[str]
+
+class UserBatchGetOut(BaseModel):
+    users: List[UserOut] = []
+    not_found: List[str] = []
+
+class UserBatchCreateRequest(BaseModel):
+    users: List[UserCreate]
+
+class UserBatchCreateItemOut(BaseModel):
+    index: int
+    clerk_id: str
+    status: str  # created, duplicate, error
+    user: Optional[UserOut] = None
+    error: Optional[str] = None
+
+class UserBatchCreateOut(BaseModel):
+    created: int
+    duplicates: int
+    failed: int
+    results: List[UserBatchCreateItemOut] = []
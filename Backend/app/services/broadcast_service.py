@@ -0,0 +1,159 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from ..config import settings
+from ..database.mongo import get_collection
+
+# How long a worker owns a broadcast's delivery before another may take over
+LEASE_SECONDS = 60
+
+# Strong references to running deliveries so they aren't garbage collected
+_delivery_tasks: Set[asyncio.Task] = set()
+
+def schedule_delivery(broadcast_id: ObjectId) -> asyncio.Task:
+    """Run a broadcast's fan-out in the background, off the request path."""
+    task = asyncio.create_task(deliver_broadcast(broadcast_id))
+    _delivery_tasks.add(task)
+    task.add_done_callback(_delivery_tasks.discard)
+    return task
+
+async def _claim(broadcasts, broadcast_id: ObjectId, owner: str) -> Optional[dict]:
+    """Take the delivery lease for owner; None if another worker holds it or it's done."""
+    now = datetime.utcnow()
+    return await broadcasts.find_one_and_update(
+        {
+            "_id": broadcast_id,
+            "status": {"$in": ["queued", "delivering"]},
+            "$or": [{"lease_until": {"$exists": False}}, {"lease_until": {"$lt": now}}]
+        },
+        {"$set": {
+            "status": "delivering",
+            "lease_owner": owner,
+            "lease_until": now + timedelta(seconds=LEASE_SECONDS)
+        }}
+    )
+
+class LeaseLost(Exception):
+    """The lease expired and another worker took the delivery over."""
+
+async def _update_owned(broadcasts, broadcast_id: ObjectId, owner: str, update: dict):
+    """Apply update only while owner still holds the lease."""
+    result = await broadcasts.update_one({"_id": broadcast_id, "lease_owner": owner}, update)
+    if result.matched_count == 0:
+        raise LeaseLost()
+
+async def deliver_broadcast(broadcast_id: ObjectId):
+    """
+    Fan a broadcast out to one inbox entry per non-banned user.
+
+    Recipients are walked in _id order and written with unordered
+    insert_many in chunks of BROADCAST_CHUNK_SIZE, pausing between chunks
+    so normal traffic keeps its share of Mongo. Progress (delivered count
+    and last recipient _id) is saved after every chunk, so an interrupted
+    delivery resumes where it stopped; the unique (broadcast_id, clerk_id)
+    index makes a replayed chunk harmless. Every write after the claim is
+    conditioned on this delivery's lease_owner token, so a worker whose
+    lease expired stops instead of renewing a lease another worker holds.
+    """
+    broadcasts = get_collection("broadcasts")
+    inbox = get_collection("inbox")
+    users = get_collection("users")
+
+    owner = uuid.uuid4().hex
+    broadcast = await _claim(broadcasts, broadcast_id, owner)
+    if not broadcast:
+        return
+
+    chunk_size = settings.BROADCAST_CHUNK_SIZE
+    last_user_id = broadcast.get("last_user_id")
+    try:
+        if not broadcast.get("recipients_counted"):
+            # send_broadcast only stored an estimate, to keep the count off the request path
+            total = await users.count_documents({"is_banned": {"$ne": True}})
+            await _update_owned(
+                broadcasts, broadcast_id, owner,
+                {"$set": {"total_recipients": total, "recipients_counted": True}}
+            )
+        while True:
+            query = {"is_banned": {"$ne": True}}
+            if last_user_id is not None:
+                query["_id"] = {"$gt": last_user_id}
+            recipients = await users.find(query, {"clerk_id": 1}) \
+                .sort("_id", 1) \
+                .limit(chunk_size) \
+                .to_list(length=chunk_size)
+            if not recipients:
+                break
+
+            entries = [
+                {
+                    "clerk_id": user["clerk_id"],
+                    "broadcast_id": broadcast_id,
+                    "title": broadcast["title"],
+                    "message": broadcast["message"],
+                    "read": False,
+                    "created_at": broadcast["created_at"]
+                }
+                for user in recipients if user.get("clerk_id")
+            ]
+            inserted = len(entries)
+            if entries:
+                try:
+                    await inbox.insert_many(entries, ordered=False)
+                except BulkWriteError as e:
+                    # Duplicates from a resumed chunk; everything else still landed
+                    inserted = e.details.get("nInserted", 0)
+
+            last_user_id = recipients[-1]["_id"]
+            await _update_owned(
+                broadcasts, broadcast_id, owner,
+                {
+                    "$inc": {"delivered": inserted},
+                    "$set": {
+                        "last_user_id": last_user_id,
+                        "lease_until": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+                    }
+                }
+            )
+            await asyncio.sleep(settings.BROADCAST_CHUNK_PAUSE_SECONDS)
+
+        await _update_owned(
+            broadcasts, broadcast_id, owner,
+            {
+                "$set": {"status": "delivered", "completed_at": datetime.utcnow()},
+                "$unset": {"lease_until": "", "lease_owner": ""}
+            }
+        )
+        print(f"Broadcast {broadcast_id} delivered.")
+    except LeaseLost:
+        print(f"Broadcast {broadcast_id} lease lost; another worker continues the delivery.")
+    except asyncio.CancelledError:
+        # Shutting down: release the lease so the next start resumes right away
+        await broadcasts.update_one(
+            {"_id": broadcast_id, "lease_owner": owner},
+            {"$unset": {"lease_until": "", "lease_owner": ""}}
+        )
+        raise
+    except Exception as e:
+        # Mark it failed rather than leave it "delivering" and retried on every start;
+        # the progress fields stay, so it can be requeued to resume
+        await broadcasts.update_one(
+            {"_id": broadcast_id, "lease_owner": owner},
+            {"$set": {"status": "failed", "error": str(e)}, "$unset": {"lease_until": "", "lease_owner": ""}}
+        )
+        print(f"Broadcast {broadcast_id} delivery failed: {e}")
+
+def running_deliveries() -> List[asyncio.Task]:
+    """Deliveries still in progress in this process, for shutdown to cancel."""
+    return list(_delivery_tasks)
+
+async def resume_pending_deliveries() -> List[asyncio.Task]:
+    """Restart fan-out for broadcasts left unfinished by a previous process."""
+    cursor = get_collection("broadcasts").find(
+        {"status": {"$in": ["queued", "delivering"]}},
+        {"_id": 1}
+    )
+    return [schedule_delivery(broadcast["_id"]) async for broadcast in cursor]
@@ -1,53 +1,103 @@
-import cloudinary
-import cloudinary.uploader
-from fastapi import UploadFile
+import asyncio
+import functools
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, UploadFile
 from ..config import settings
+from .image_service import forget_upload, store_profile_image
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-    api_key=settings.CLOUDINARY_API_KEY,
-    api_secret=settings.CLOUDINARY_API_SECRET
-)
+# The Cloudinary SDK is blocking, so its calls run on a dedicated, bounded
+# pool instead of the event loop. The SDK and the pool are set up on the
+# first call, keeping them out of startup.
+_executor: Optional[ThreadPoolExecutor] = None
+_uploader = None
+# Calls running or waiting for a pool thread
+_in_flight = 0
+
+def _get_uploader():
+    """The configured cloudinary.uploader module, imported on first use."""
+    global _uploader
+    if _uploader is None:
+        import cloudinary
+        import cloudinary.uploader
+        cloudinary.config(
+            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
+            api_key=settings.CLOUDINARY_API_KEY,
+            api_secret=settings.CLOUDINARY_API_SECRET
+        )
+        _uploader = cloudinary.uploader
+    return _uploader
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.UPLOAD_MAX_CONCURRENCY,
+            thread_name_prefix="cloudinary"
+        )
+    return _executor
+
+async def _run_blocking(method: str, *args, **kwargs):
+    """Run a blocking cloudinary.uploader call on the upload pool, shedding load when it is full."""
+    global _in_flight
+    if _in_flight >= settings.UPLOAD_MAX_CONCURRENCY + settings.UPLOAD_MAX_QUEUE:
+        raise HTTPException(
+            status_code=503,
+            detail="Upload service busy, retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    _in_flight += 1
+    try:
+        func = getattr(_get_uploader(), method)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+    finally:
+        _in_flight -= 1
 
 class CloudinaryService:
     @staticmethod
-    async def upload_image(file: UploadFile, folder: str = "skill_swap_profiles"):
-        """Upload an image to Cloudinary."""
+    async def delete_image(public_id: str):
+        """Delete an image from Cloudinary."""
+        try:
+            await forget_upload(public_id)
+            result = await _run_blocking("destroy", public_id)
+            return result
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to delete image: {str(e)}")
+
+    @staticmethod
+    async def upload_bytes(data: bytes, folder: str = "skill_swap_profiles", public_id: str = None):
+        """Upload already-processed image bytes to Cloudinary without further transformation."""
         try:
-            # Read the file content
-            file_content = await file.read()
-            
-            # Reset file pointer for potential future reads
-            await file.seek(0)
-            
-            result = cloudinary.uploader.upload(
-                file_content,
+            result = await _run_blocking(
+                "upload",
+                io.BytesIO(data),
                 folder=folder,
-                resource_type="auto",
-                transformation=[
-                    {"width": 400, "height": 400, "crop": "fill"},
-                    {"quality": "auto"}
-                ]
+                public_id=public_id,
+                overwrite=False,
+                resource_type="image"
             )
             return {
                 "url": result.get("secure_url"),
                 "public_id": result.get("public_id")
             }
+        except HTTPException:
+            raise
         except Exception as e:
             raise Exception(f"Failed to upload image: {str(e)}")
 
-    @staticmethod
-    async def delete_image(public_id: str):
-        """Delete an image from Cloudinary."""
-        try:
-            result = cloudinary.uploader.destroy(public_id)
-            return result
-        except Exception as e:
-            raise Exception(f"Failed to delete image: {str(e)}")
-
     @staticmethod
     async def update_profile_picture(file: UploadFile, user_id: str):
-        """Upload or update a user's profile picture."""
-        folder = f"skill_swap_profiles/{user_id}"
-        return await CloudinaryService.upload_image(file, folder)
+        """
+        Upload or update a user's profile picture. The image is resized
+        locally before upload, and content that was uploaded before is not
+        uploaded again.
+        """
+        async def store(processed: bytes, key: str) -> dict:
+            # Named by content hash so identical images share one Cloudinary asset
+            return await CloudinaryService.upload_bytes(processed, "skill_swap_profiles", public_id=key)
+
+        return await store_profile_image(file, store)
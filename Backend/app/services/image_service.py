@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import io
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from ..config import settings
+from ..database.mongo import get_collection
+
+# (Image, ImageOps, UnidentifiedImageError) once loaded, False if Pillow is missing
+_pillow = None
+
+_CONTENT_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+    return _process_pool
+
+def _load_pillow():
+    """The Pillow modules, imported on first use rather than at startup; None without Pillow."""
+    global _pillow
+    if _pillow is None:
+        try:
+            from PIL import Image, ImageOps, UnidentifiedImageError
+            _pillow = (Image, ImageOps, UnidentifiedImageError)
+        except ImportError:  # pragma: no cover - Pillow is optional
+            _pillow = False
+    return _pillow or None
+
+def _process_image(data: bytes, size: int, fmt: str, quality: int) -> bytes:
+    """Decode, apply EXIF orientation, center-crop to size x size and re-encode. Runs in a worker process."""
+    Image, ImageOps, _ = _load_pillow()
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = ImageOps.fit(image, (size, size), method=Image.LANCZOS)
+        if fmt == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB" if fmt == "JPEG" else "RGBA")
+        output = io.BytesIO()
+        image.save(output, format=fmt, quality=quality)
+        return output.getvalue()
+
+def image_variant() -> str:
+    """Identifies the current preprocessing settings; part of every dedupe key."""
+    return f"{settings.IMAGE_TARGET_SIZE}-{settings.IMAGE_OUTPUT_FORMAT.lower()}-q{settings.IMAGE_QUALITY}"
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+async def hash_upload(file: UploadFile) -> Tuple[str, int]:
+    """
+    (sha256 hex digest, size) of an upload, read in UPLOAD_CHUNK_SIZE chunks
+    from its spooled temp file. Raises 413 as soon as it passes UPLOAD_MAX_BYTES.
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"File too large (max {settings.UPLOAD_MAX_BYTES} bytes)"
+    )
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise too_large
+    digest = hashlib.sha256()
+    size = 0
+    await file.seek(0)
+    while True:
+        chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > settings.UPLOAD_MAX_BYTES:
+            raise too_large
+        digest.update(chunk)
+    return digest.hexdigest(), size
+
+def media_key(digest: str) -> str:
+    """Dedupe key for an original's content hash under the current preprocessing settings."""
+    return f"{digest}-{image_variant()}"
+
+async def preprocess_image(data: bytes) -> Tuple[bytes, str]:
+    """
+    Resize and re-encode an uploaded image in the process pool.
+    Returns (bytes, content_type); without Pillow the original is returned unchanged.
+    """
+    pillow = _load_pillow()
+    if pillow is None:
+        return data, "application/octet-stream"
+    Image, _, UnidentifiedImageError = pillow
+    fmt = settings.IMAGE_OUTPUT_FORMAT.upper()
+    loop = asyncio.get_running_loop()
+    try:
+        processed = await loop.run_in_executor(
+            _get_process_pool(),
+            _process_image,
+            data,
+            settings.IMAGE_TARGET_SIZE,
+            fmt,
+            settings.IMAGE_QUALITY
+        )
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise HTTPException(status_code=400, detail="File is not a valid image")
+    return processed, _CONTENT_TYPES.get(fmt, "application/octet-stream")
+
+async def find_uploaded(digest: str) -> Optional[dict]:
+    """Previously stored upload of identical content under the current variant, if any."""
+    return await get_collection("media").find_one({"_id": media_key(digest)})
+
+async def remember_upload(digest: str, url: str, public_id: Optional[str]):
+    """Record an upload so identical content can be served without re-uploading."""
+    await get_collection("media").update_one(
+        {"_id": media_key(digest)},
+        {"$setOnInsert": {"url": url, "public_id": public_id, "created_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def forget_upload(public_id: str):
+    """Drop the records pointing at a stored image, so deleting it doesn't leave dedupe hits to a missing file."""
+    await get_collection("media").delete_many({"public_id": public_id})
+
+async def store_profile_image(file: UploadFile, store: Callable[[bytes, str], Awaitable[dict]]) -> dict:
+    """
+    Shared profile-photo pipeline for every storage backend: skip work for
+    content uploaded before, otherwise preprocess and hand the result to
+    `store(processed_bytes, key)`, which returns {"url", "public_id"}.
+
+    The upload is hashed in chunks, so a repeat upload is answered without
+    loading it into memory; only a new image, already checked against
+    UPLOAD_MAX_BYTES, is read whole for the process pool.
+    """
+    digest, size = await hash_upload(file)
+    if not size:
+        raise HTTPException(status_code=400, detail="Empty file")
+    existing = await find_uploaded(digest)
+    if existing:
+        return {"url": existing["url"], "public_id": existing.get("public_id")}
+
+    await file.seek(0)
+    processed, _ = await preprocess_image(await file.read())
+    result = await store(processed, media_key(digest))
+    await remember_upload(digest, result["url"], result["public_id"])
+    return result
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+
+# updated_at comes from each worker's clock; re-read a little before the
+# last pass so small skew between workers doesn't lose a write. Upserts are
+# idempotent, so seeing a user twice is harmless.
+_CLOCK_SKEW = timedelta(seconds=5)
+
+async def refresh_indexes(collection, indexes: Sequence, since: datetime) -> int:
+    """Upsert every user updated at or after `since` into each index; returns the count."""
+    projection = {"_id": 0, "clerk_id": 1, "updated_at": 1}
+    for index in indexes:
+        projection.update(index.PROJECTION)
+    count = 0
+    cursor = collection.find({"updated_at": {"$gte": since}}, projection).sort("updated_at", ASCENDING)
+    async for user in cursor:
+        for index in indexes:
+            index.upsert(user)
+        count += 1
+    return count
+
+async def keep_indexes_fresh(collection, indexes: Sequence, interval: float, since: Optional[datetime] = None):
+    """
+    Every `interval` seconds, apply users changed since the previous pass to
+    the in-process indexes, so writes handled by other workers show up here.
+    Start it together with the indexes' build(): anything written before the
+    first pass is picked up by the build. Deletions aren't visible this way;
+    callers drop ids whose documents are gone when they hydrate results.
+    """
+    since = since or datetime.utcnow()
+    while True:
+        await asyncio.sleep(interval)
+        started = datetime.utcnow()
+        try:
+            await refresh_indexes(collection, indexes, since - _CLOCK_SKEW)
+        except PyMongoError as e:
+            print(f"Failed to refresh in-memory user indexes: {e}")
+            continue
+        since = started
@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+from fastapi import UploadFile
+from ..config import settings
+from .image_service import forget_upload, store_profile_image
+
+MEDIA_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Leading bytes of the formats we store, used to pick a Content-Type when serving
+_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+def media_path(digest: str) -> str:
+    """Sharded on-disk location of a stored file: <MEDIA_ROOT>/ab/cd/<digest>."""
+    return os.path.join(settings.MEDIA_ROOT, digest[:2], digest[2:4], digest)
+
+def media_url(digest: str) -> str:
+    return f"{settings.PUBLIC_BASE_URL.rstrip('/')}/media/{digest}"
+
+def sniff_content_type(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(12)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return "application/octet-stream"
+
+def _write_file(data: bytes, digest: str) -> str:
+    path = media_path(digest)
+    if os.path.exists(path):
+        # Content-addressed: identical bytes are already stored
+        return path
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temp file and rename so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+class LocalStorageService:
+    """
+    On-disk, content-addressed image storage with the same interface as
+    CloudinaryService, for deployments without Cloudinary. Files are named
+    by the SHA-256 of their bytes and served by GET /media/{hash}.
+    """
+
+    @staticmethod
+    async def upload_bytes(data: bytes, folder: str = "skill_swap_profiles", public_id: Optional[str] = None):
+        """Store bytes; `folder` and `public_id` are ignored since the content hash names the file."""
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            await asyncio.to_thread(_write_file, data, digest)
+        except OSError as e:
+            raise Exception(f"Failed to store image: {str(e)}")
+        return {
+            "url": media_url(digest),
+            "public_id": digest
+        }
+
+    @staticmethod
+    async def delete_image(public_id: str):
+        """Delete a stored image."""
+        if not MEDIA_HASH_RE.match(public_id or ""):
+            raise Exception("Failed to delete image: invalid id")
+        await forget_upload(public_id)
+        try:
+            await asyncio.to_thread(os.remove, media_path(public_id))
+            return {"result": "ok"}
+        except FileNotFoundError:
+            return {"result": "not found"}
+
+    @staticmethod
+    async def update_profile_picture(file: UploadFile, user_id: str):
+        """Preprocess and store a user's profile picture, reusing identical earlier uploads."""
+        return await store_profile_image(file, LocalStorageService.upload_bytes)
@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+def normalize_skill(skill: str) -> str:
+    """Normalize a skill string for matching ("  Web  Design" -> "web design")."""
+    return " ".join(str(skill).lower().split())
+
+def normalize_skills(skills: Optional[Iterable[str]]) -> FrozenSet[str]:
+    return frozenset(s for s in (normalize_skill(skill) for skill in skills or []) if s)
+
+class _Profile:
+    __slots__ = ("offered", "wanted", "eligible")
+
+    def __init__(self, offered: FrozenSet[str], wanted: FrozenSet[str], eligible: bool):
+        self.offered = offered
+        self.wanted = wanted
+        self.eligible = eligible
+
+class SkillMatchIndex:
+    """
+    In-process inverted index from normalized skill to clerk_ids, kept in
+    both directions (who offers a skill, who wants it).
+
+    Only public, non-banned users are placed in the posting sets, so they
+    are the only ones that can appear as matches. Every user's skills are
+    still tracked so anyone can look up their own matches.
+
+    The index is per process: each worker builds it at startup, applies
+    the writes it handles itself and picks up other workers' writes from
+    index_refresh.keep_indexes_fresh().
+    """
+
+    # Fields of a users-collection document the index reads
+    PROJECTION = {"skills_offered": 1, "skills_wanted": 1, "is_public": 1, "is_banned": 1}
+
+    def __init__(self):
+        self.offered: Dict[str, Set[str]] = defaultdict(set)
+        self.wanted: Dict[str, Set[str]] = defaultdict(set)
+        self.profiles: Dict[str, _Profile] = {}
+        self.ready = False
+        # Writes seen while build() is running, replayed onto the new index
+        self._pending: Optional[list] = None
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def upsert(self, user: dict):
+        """Add or refresh a user from a users-collection document."""
+        clerk_id = user.get("clerk_id")
+        if not clerk_id:
+            return
+        if self._pending is not None:
+            self._pending.append(("upsert", user))
+        self._unindex(clerk_id)
+        profile = _Profile(
+            normalize_skills(user.get("skills_offered")),
+            normalize_skills(user.get("skills_wanted")),
+            bool(user.get("is_public", True)) and not user.get("is_banned", False)
+        )
+        self.profiles[clerk_id] = profile
+        if profile.eligible:
+            for skill in profile.offered:
+                self.offered[skill].add(clerk_id)
+            for skill in profile.wanted:
+                self.wanted[skill].add(clerk_id)
+
+    def remove(self, clerk_id: str):
+        """Drop a user from the index."""
+        if self._pending is not None:
+            self._pending.append(("remove", clerk_id))
+        self._unindex(clerk_id)
+
+    def _unindex(self, clerk_id: str):
+        profile = self.profiles.pop(clerk_id, None)
+        if not profile or not profile.eligible:
+            return
+        for skill in profile.offered:
+            self._discard(self.offered, skill, clerk_id)
+        for skill in profile.wanted:
+            self._discard(self.wanted, skill, clerk_id)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[str]], skill: str, clerk_id: str):
+        users = postings.get(skill)
+        if users is None:
+            return
+        users.discard(clerk_id)
+        if not users:
+            del postings[skill]
+
+    def matches(self, clerk_id: str, limit: int, offset: int = 0) -> Optional[List[Tuple[str, int, int]]]:
+        """
+        Rank users by reciprocal overlap with clerk_id: they must offer at
+        least one skill clerk_id wants AND want at least one skill clerk_id
+        offers. Returns (clerk_id, gives, takes) tuples ordered by total
+        overlap, or None if clerk_id is not indexed.
+        """
+        me = self.profiles.get(clerk_id)
+        if me is None:
+            return None
+
+        gives_postings = [self.offered[s] for s in me.wanted if s in self.offered]
+        takes_postings = [self.wanted[s] for s in me.offered if s in self.wanted]
+        if not gives_postings or not takes_postings:
+            return []
+
+        # Count the cheaper direction first, then only score its candidates
+        # on the other side, so the work is bounded by the smaller side.
+        if sum(map(len, gives_postings)) > sum(map(len, takes_postings)):
+            first, second, swapped = takes_postings, gives_postings, True
+        else:
+            first, second, swapped = gives_postings, takes_postings, False
+
+        first_counts: Dict[str, int] = defaultdict(int)
+        for users in first:
+            for user_id in users:
+                first_counts[user_id] += 1
+        first_counts.pop(clerk_id, None)
+
+        second_counts: Dict[str, int] = defaultdict(int)
+        for users in second:
+            for user_id in users:
+                if user_id in first_counts:
+                    second_counts[user_id] += 1
+
+        scored = []
+        for user_id, second_count in second_counts.items():
+            first_count = first_counts[user_id]
+            gives, takes = (second_count, first_count) if swapped else (first_count, second_count)
+            scored.append((user_id, gives, takes))
+
+        top = heapq.nsmallest(offset + limit, scored, key=lambda m: (-(m[1] + m[2]), -min(m[1], m[2]), m[0]))
+        return top[offset:]
+
+    def overlap(self, clerk_id: str, other_id: str) -> Tuple[List[str], List[str]]:
+        """Skills other_id offers that clerk_id wants, and vice versa."""
+        me, other = self.profiles.get(clerk_id), self.profiles.get(other_id)
+        if me is None or other is None:
+            return [], []
+        return sorted(other.offered & me.wanted), sorted(other.wanted & me.offered)
+
+    async def build(self, collection, batch_size: int = 5000):
+        """Load every user from MongoDB into a fresh index."""
+        fresh = SkillMatchIndex()
+        self._pending = []
+        projection = {"_id": 0, "clerk_id": 1, **self.PROJECTION}
+        count = 0
+        try:
+            async for user in collection.find({}, projection).batch_size(batch_size):
+                fresh.upsert(user)
+                count += 1
+                if count % batch_size == 0:
+                    # Let request handlers run while a large index loads
+                    await asyncio.sleep(0)
+            for op, arg in self._pending:
+                if op == "upsert":
+                    fresh.upsert(arg)
+                else:
+                    fresh.remove(arg)
+        finally:
+            self._pending = None
+        self.offered, self.wanted, self.profiles = fresh.offered, fresh.wanted, fresh.profiles
+        self.ready = True
+        print(f"Skill match index built for {count} users.")
+
+skill_match_index = SkillMatchIndex()
@@ -0,0 +1,101 @@
+from datetime import datetime
+from pymongo import ReturnDocument
+
+RATING_STARS = [1, 2, 3, 4, 5]
+
+# Value of a single entry in the embedded ratings array; older entries used "score"
+_ENTRY_VALUE = {"$ifNull": ["$$r.rating", {"$ifNull": ["$$r.score", 0]}]}
+
+_AVERAGE_STAGE = {
+    "$set": {
+        "rating": {
+            "$cond": [
+                {"$gt": ["$rating_count", 0]},
+                {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 2]},
+                "$rating"
+            ]
+        }
+    }
+}
+
+def _rating_histogram(ratings) -> dict:
+    """Expression for the {"1".."5": count} histogram of a ratings array."""
+    return {
+        "$arrayToObject": {
+            "$map": {
+                "input": RATING_STARS,
+                "as": "star",
+                "in": {
+                    "k": {"$toString": "$$star"},
+                    "v": {"$size": {"$filter": {
+                        "input": ratings,
+                        "as": "r",
+                        "cond": {"$eq": [_ENTRY_VALUE, "$$star"]}
+                    }}}
+                }
+            }
+        }
+    }
+
+def _rating_update_pipeline(rating_entry: dict) -> list:
+    """
+    Update pipeline that appends a rating and maintains the user's count,
+    sum, 1-5 histogram and average in a single atomic write.
+    """
+    rating = rating_entry["rating"]
+    existing = {"$ifNull": ["$ratings", []]}
+    return [
+        # Users rated before the aggregates existed start from their array
+        {
+            "$set": {
+                "rating_count": {"$ifNull": ["$rating_count", {"$size": existing}]},
+                "rating_sum": {"$ifNull": [
+                    "$rating_sum", {"$sum": {"$map": {"input": existing, "as": "r", "in": _ENTRY_VALUE}}}
+                ]},
+                "rating_histogram": {"$cond": [
+                    {"$eq": [{"$ifNull": ["$rating_count", None]}, None]},
+                    _rating_histogram(existing),
+                    "$rating_histogram"
+                ]}
+            }
+        },
+        {
+            "$set": {
+                "ratings": {"$concatArrays": [existing, [{"$literal": rating_entry}]]},
+                "rating_count": {"$add": ["$rating_count", 1]},
+                "rating_sum": {"$add": ["$rating_sum", rating]},
+                f"rating_histogram.{rating}": {"$add": [
+                    {"$ifNull": [f"$rating_histogram.{rating}", 0]}, 1
+                ]},
+                "updated_at": datetime.utcnow()
+            }
+        },
+        _AVERAGE_STAGE
+    ]
+
+async def record_rating(users_collection, user_filter: dict, rating_entry: dict):
+    """Append a rating to a user and return the updated document (None if no match)."""
+    return await users_collection.find_one_and_update(
+        user_filter,
+        _rating_update_pipeline(rating_entry),
+        return_document=ReturnDocument.AFTER
+    )
+
+async def backfill_rating_aggregates(users_collection) -> int:
+    """
+    Recompute rating_count, rating_sum, rating_histogram and rating from the
+    embedded ratings array for every user, server-side. Returns the number
+    of modified users.
+    """
+    existing = {"$ifNull": ["$ratings", []]}
+    result = await users_collection.update_many({}, [
+        {
+            "$set": {
+                "rating_count": {"$size": existing},
+                "rating_sum": {"$sum": {"$map": {"input": existing, "as": "r", "in": _ENTRY_VALUE}}},
+                "rating_histogram": _rating_histogram(existing)
+            }
+        },
+        _AVERAGE_STAGE
+    ])
+    return result.modified_count
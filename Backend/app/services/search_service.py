@@ -0,0 +1,181 @@
+import asyncio
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+SEARCH_FIELDS = ["fullname", "username", "address", "skills_offered", "skills_wanted"]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(str(text).lower())
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def user_tokens(user: dict) -> List[str]:
+    """All searchable tokens of a users-collection document."""
+    tokens = []
+    for field in SEARCH_FIELDS:
+        value = user.get(field)
+        if isinstance(value, list):
+            for item in value:
+                tokens.extend(tokenize(item))
+        elif value:
+            tokens.extend(tokenize(value))
+    return tokens
+
+class UserSearchIndex:
+    """
+    Incrementally maintained BM25 index over user profile text, with
+    trigram expansion of query terms so small typos still match.
+
+    Only public, non-banned users are indexed. Like the skill match index
+    it is per process: built at startup, updated by the writes this worker
+    handles and refreshed with other workers' writes by
+    index_refresh.keep_indexes_fresh().
+    """
+
+    # Fields of a users-collection document the index reads
+    PROJECTION = {**{field: 1 for field in SEARCH_FIELDS}, "is_public": 1, "is_banned": 1}
+
+    K1 = 1.2
+    B = 0.75
+    # Minimum trigram Jaccard similarity for a vocabulary term to stand in for a query term
+    FUZZY_THRESHOLD = 0.25
+    # Fuzzy matches count for less than exact ones
+    FUZZY_WEIGHT = 0.6
+    MAX_FUZZY_TERMS = 5
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_tokens: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self.trigram_terms: Dict[str, Set[str]] = defaultdict(set)
+        self.ready = False
+        # Writes seen while build() is running, replayed onto the new index
+        self._pending: Optional[list] = None
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def upsert(self, user: dict):
+        """Add or refresh a user from a users-collection document."""
+        clerk_id = user.get("clerk_id")
+        if not clerk_id:
+            return
+        if self._pending is not None:
+            self._pending.append(("upsert", user))
+        self._unindex(clerk_id)
+        if not user.get("is_public", True) or user.get("is_banned", False):
+            return
+
+        counts: Dict[str, int] = defaultdict(int)
+        for token in user_tokens(user):
+            counts[token] += 1
+        for token, tf in counts.items():
+            if token not in self.postings:
+                for gram in trigrams(token):
+                    self.trigram_terms[gram].add(token)
+            self.postings[token][clerk_id] = tf
+        length = sum(counts.values())
+        self.doc_tokens[clerk_id] = dict(counts)
+        self.doc_lengths[clerk_id] = length
+        self.total_length += length
+
+    def remove(self, clerk_id: Optional[str]):
+        """Drop a user from the index."""
+        if not clerk_id:
+            return
+        if self._pending is not None:
+            self._pending.append(("remove", clerk_id))
+        self._unindex(clerk_id)
+
+    def _unindex(self, clerk_id: str):
+        counts = self.doc_tokens.pop(clerk_id, None)
+        if counts is None:
+            return
+        self.total_length -= self.doc_lengths.pop(clerk_id, 0)
+        for token in counts:
+            docs = self.postings.get(token)
+            if docs is None:
+                continue
+            docs.pop(clerk_id, None)
+            if not docs:
+                del self.postings[token]
+                for gram in trigrams(token):
+                    terms = self.trigram_terms.get(gram)
+                    if terms is not None:
+                        terms.discard(token)
+                        if not terms:
+                            del self.trigram_terms[gram]
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Exact term plus the closest vocabulary terms by trigram similarity."""
+        expansions = []
+        if token in self.postings:
+            expansions.append((token, 1.0))
+        query_grams = trigrams(token)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for term in self.trigram_terms.get(gram, ()):
+                overlap[term] += 1
+        candidates = []
+        for term, shared in overlap.items():
+            if term == token:
+                continue
+            similarity = shared / (len(query_grams) + len(trigrams(term)) - shared)
+            if similarity >= self.FUZZY_THRESHOLD:
+                candidates.append((similarity, term))
+        for similarity, term in heapq.nlargest(self.MAX_FUZZY_TERMS, candidates):
+            expansions.append((term, self.FUZZY_WEIGHT * similarity))
+        return expansions
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """Top `limit` (clerk_id, score) pairs for a free-text query."""
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+        avg_length = self.total_length / n_docs
+        scores: Dict[str, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            for term, weight in self._expand(token):
+                docs = self.postings[term]
+                df = len(docs)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for clerk_id, tf in docs.items():
+                    norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[clerk_id] / avg_length)
+                    scores[clerk_id] += weight * idf * tf * (self.K1 + 1) / (tf + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+    async def build(self, collection, batch_size: int = 5000):
+        """Load every user from MongoDB into a fresh index."""
+        fresh = UserSearchIndex()
+        self._pending = []
+        projection = {"_id": 0, "clerk_id": 1, **self.PROJECTION}
+        count = 0
+        try:
+            async for user in collection.find({}, projection).batch_size(batch_size):
+                fresh.upsert(user)
+                count += 1
+                if count % batch_size == 0:
+                    # Let request handlers run while a large index loads
+                    await asyncio.sleep(0)
+            for op, arg in self._pending:
+                if op == "upsert":
+                    fresh.upsert(arg)
+                else:
+                    fresh.remove(arg)
+        finally:
+            self._pending = None
+        self.postings, self.doc_tokens = fresh.postings, fresh.doc_tokens
+        self.doc_lengths, self.total_length = fresh.doc_lengths, fresh.total_length
+        self.trigram_terms = fresh.trigram_terms
+        self.ready = True
+        print(f"User search index built for {len(fresh)} users.")
+
+user_search_index = UserSearchIndex()
@@ -0,0 +1,204 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from ..config import settings
+from ..database.mongo import get_collection
+
+# Single document holding the platform-wide counters
+STATS_ID = "platform"
+SWAP_STATUSES = ["pending", "accepted", "rejected", "cancelled"]
+
+# Daily bucket counters. Only the "created" ones can be recomputed from the
+# collections; ban and transition days aren't recorded on the documents.
+DAILY_COUNTERS = {
+    "users": ["created", "banned"],
+    "swaps": ["created", "accepted", "rejected", "cancelled"],
+}
+
+def _day(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+def _window_start(now: datetime) -> datetime:
+    """Midnight of the oldest day kept in the daily buckets."""
+    today = datetime(now.year, now.month, now.day)
+    return today - timedelta(days=settings.STATS_DAILY_BUCKET_DAYS - 1)
+
+async def _increment(counters: Dict[str, int], daily: Optional[Dict[str, int]] = None):
+    """
+    $inc the platform counters and, if given, today's bucket. A failure is
+    logged rather than raised: the write being counted has already happened,
+    and rebuild_stats() repairs the drift.
+    """
+    now = datetime.utcnow()
+    writes = [
+        get_collection("stats").update_one(
+            {"_id": STATS_ID},
+            {"$inc": counters, "$set": {"updated_at": now}},
+            upsert=True
+        )
+    ]
+    if daily:
+        today = datetime(now.year, now.month, now.day)
+        writes.append(get_collection("stats_daily").update_one(
+            {"_id": _day(now)},
+            {
+                "$inc": daily,
+                # Buckets older than the window are removed by the TTL index
+                "$setOnInsert": {"expires_at": today + timedelta(days=settings.STATS_DAILY_BUCKET_DAYS)}
+            },
+            upsert=True
+        ))
+    try:
+        await asyncio.gather(*writes)
+    except PyMongoError as e:
+        print(f"Failed to update stats counters: {e}")
+
+async def record_users_created(count: int = 1):
+    if count:
+        await _increment({"users.total": count}, {"users.created": count})
+
+async def record_user_deleted(was_banned: bool):
+    counters = {"users.total": -1}
+    if was_banned:
+        counters["users.banned"] = -1
+    await _increment(counters)
+
+async def record_user_banned():
+    await _increment({"users.banned": 1}, {"users.banned": 1})
+
+async def record_swap_created():
+    await _increment({"swaps.total": 1, "swaps.pending": 1}, {"swaps.created": 1})
+
+async def record_swap_transition(from_status: str, to_status: str):
+    await _increment({f"swaps.{from_status}": -1, f"swaps.{to_status}": 1}, {f"swaps.{to_status}": 1})
+
+def _empty_day(day: str) -> dict:
+    return {"date": day, **{group: {name: 0 for name in names} for group, names in DAILY_COUNTERS.items()}}
+
+async def get_stats() -> dict:
+    """
+    Dashboard counters: platform totals plus one bucket per day for the
+    last STATS_DAILY_BUCKET_DAYS days (oldest first, empty days as zeros).
+    Reads one document and at most that many buckets.
+    """
+    now = datetime.utcnow()
+    start = _window_start(now)
+    platform, buckets = await asyncio.gather(
+        get_collection("stats").find_one({"_id": STATS_ID}),
+        get_collection("stats_daily").find({"_id": {"$gte": _day(start)}}, {"expires_at": 0})
+            .to_list(length=settings.STATS_DAILY_BUCKET_DAYS)
+    )
+    platform = platform or {}
+    by_day = {bucket["_id"]: bucket for bucket in buckets}
+    daily = []
+    for offset in range(settings.STATS_DAILY_BUCKET_DAYS):
+        day = _day(start + timedelta(days=offset))
+        entry = _empty_day(day)
+        bucket = by_day.get(day, {})
+        for group, names in DAILY_COUNTERS.items():
+            for name in names:
+                entry[group][name] = bucket.get(group, {}).get(name, 0)
+        daily.append(entry)
+    users = platform.get("users", {})
+    swaps = platform.get("swaps", {})
+    return {
+        "users": {"total": users.get("total", 0), "banned": users.get("banned", 0)},
+        "swaps": {"total": swaps.get("total", 0), **{status: swaps.get(status, 0) for status in SWAP_STATUSES}},
+        "daily": daily,
+        "updated_at": platform.get("updated_at"),
+        "rebuilt_at": platform.get("rebuilt_at")
+    }
+
+def _created_per_day(since: datetime) -> list:
+    return [
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": {"$sum": 1}}}
+    ]
+
+def _count(facet_result: list) -> int:
+    return facet_result[0]["count"] if facet_result else 0
+
+async def rebuild_stats(apply: bool = True) -> dict:
+    """
+    Recompute the counters with one $facet aggregation per collection for
+    the totals, plus a per-day count over the window (kept out of the
+    $facet so it can use the created_at indexes), and report where the
+    stored values drifted. With apply, the totals and the
+    daily "created" counters are overwritten; the other daily counters are
+    kept as recorded. Writes that land while the aggregation runs may be
+    missed, so run it when traffic is low.
+    """
+    now = datetime.utcnow()
+    start = _window_start(now)
+    users_facets, swaps_facets, users_created, swaps_created = await asyncio.gather(
+        get_collection("users").aggregate([{"$facet": {
+            "total": [{"$count": "count"}],
+            "banned": [{"$match": {"is_banned": True}}, {"$count": "count"}],
+        }}]).to_list(length=1),
+        get_collection("swaps").aggregate([{"$facet": {
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+        }}]).to_list(length=1),
+        get_collection("users").aggregate(_created_per_day(start)).to_list(length=None),
+        get_collection("swaps").aggregate(_created_per_day(start)).to_list(length=None)
+    )
+    users_facets, swaps_facets = users_facets[0], swaps_facets[0]
+    swaps_by_status = {entry["_id"]: entry["count"] for entry in swaps_facets["by_status"]}
+    actual = {
+        "users": {"total": _count(users_facets["total"]), "banned": _count(users_facets["banned"])},
+        "swaps": {
+            "total": sum(swaps_by_status.values()),
+            **{status: swaps_by_status.get(status, 0) for status in SWAP_STATUSES}
+        },
+    }
+    actual_daily = {}
+    for group, created in (("users", users_created), ("swaps", swaps_created)):
+        for entry in created:
+            actual_daily.setdefault(entry["_id"], {})[f"{group}.created"] = entry["count"]
+
+    stored = await get_stats()
+    drift = {}
+    for group, counters in actual.items():
+        for name, value in counters.items():
+            if stored[group][name] != value:
+                drift[f"{group}.{name}"] = {"stored": stored[group][name], "actual": value}
+    for entry in stored["daily"]:
+        for group in DAILY_COUNTERS:
+            value = actual_daily.get(entry["date"], {}).get(f"{group}.created", 0)
+            if entry[group]["created"] != value:
+                drift[f"daily.{entry['date']}.{group}.created"] = {"stored": entry[group]["created"], "actual": value}
+
+    if apply:
+        await get_collection("stats").update_one(
+            {"_id": STATS_ID},
+            {"$set": {**actual, "updated_at": now, "rebuilt_at": now}},
+            upsert=True
+        )
+        day_writes = []
+        for entry in stored["daily"]:
+            day = entry["date"]
+            if not any(f"daily.{day}.{group}.created" in drift for group in DAILY_COUNTERS):
+                continue
+            values = actual_daily.get(day, {})
+            counters = {f"{group}.created": values.get(f"{group}.created", 0) for group in DAILY_COUNTERS}
+            expires_at = datetime.strptime(day, "%Y-%m-%d") + timedelta(days=settings.STATS_DAILY_BUCKET_DAYS)
+            day_writes.append(UpdateOne(
+                {"_id": day},
+                {"$set": counters, "$setOnInsert": {"expires_at": expires_at}},
+                upsert=True
+            ))
+        if day_writes:
+            await get_collection("stats_daily").bulk_write(day_writes, ordered=False)
+    return {"applied": apply, "stats": actual, "drift": drift}
+
+async def ensure_stats():
+    """Build the counters once for a database that has never had them rebuilt."""
+    try:
+        platform = await get_collection("stats").find_one({"_id": STATS_ID}, {"rebuilt_at": 1})
+        if platform and platform.get("rebuilt_at"):
+            return
+        result = await rebuild_stats()
+        print(f"Stats counters built: {result['stats']}")
+    except PyMongoError as e:
+        print(f"Failed to build stats counters: {e}")
@@ -0,0 +1,9 @@
+from ..config import settings
+
+def get_storage_service():
+    """Cloudinary when it is configured, otherwise the local on-disk store."""
+    if settings.CLOUDINARY_CLOUD_NAME and settings.CLOUDINARY_API_KEY:
+        from .cloudinary_service import CloudinaryService
+        return CloudinaryService
+    from .local_storage_service import LocalStorageService
+    return LocalStorageService
@@ -0,0 +1,190 @@
+import asyncio
+from typing import Dict, Iterable, Optional
+import bson
+from ..config import settings
+from ..database.mongo import get_collection
+from ..utils.cache import TTLCache
+from ..utils.single_flight import read_flights
+
+# redis is optional and only imported when a shared backend is configured
+aioredis = None
+RedisError = Exception
+
+def _load_redis() -> bool:
+    global aioredis, RedisError
+    if aioredis is None:
+        try:
+            import redis.asyncio as module
+            from redis.exceptions import RedisError as error
+        except ImportError:  # pragma: no cover - redis is optional
+            return False
+        aioredis, RedisError = module, error
+    return True
+
+_KEY_PREFIX = "user:"
+_INVALIDATION_CHANNEL = "user-cache:invalidate"
+# Shared-backend marker for "no such user"
+_MISSING = b""
+
+class UserCache:
+    """
+    Read-through cache of users-collection documents keyed by clerk_id.
+
+    Each worker keeps an in-process LRU with a TTL. When USER_CACHE_REDIS_URL
+    is set, Redis acts as a shared second level, and invalidations are
+    published so every worker drops its local copy right away instead of
+    serving it until the TTL runs out.
+
+    Cached documents are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float, redis_url: str = ""):
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl, negative_ttl=negative_ttl)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.redis_url = redis_url
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        # Bumped on every invalidation; a load that overlaps one isn't cached
+        self._generation = 0
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+
+    async def start(self):
+        """Connect the shared backend, if configured, and listen for invalidations."""
+        if not self.redis_url:
+            return
+        if not _load_redis():
+            print("USER_CACHE_REDIS_URL is set but the redis package is not installed; using the local cache only.")
+            return
+        self._redis = aioredis.from_url(self.redis_url)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _listen(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(_INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self._generation += 1
+                    self.local.invalidate(message["data"].decode())
+        except asyncio.CancelledError:
+            raise
+        except RedisError as e:
+            print(f"User cache invalidation listener stopped: {e}")
+        finally:
+            await pubsub.close()
+
+    async def _shared_get(self, clerk_id: str):
+        """(found, user) from the shared backend."""
+        if self._redis is None:
+            return False, None
+        try:
+            raw = await self._redis.get(_KEY_PREFIX + clerk_id)
+        except RedisError:
+            self.shared_errors += 1
+            return False, None
+        if raw is None:
+            self.shared_misses += 1
+            return False, None
+        self.shared_hits += 1
+        return True, (bson.decode(raw) if raw != _MISSING else None)
+
+    async def _store(self, clerk_id: str, user: Optional[dict], generation: int):
+        if generation != self._generation:
+            # Invalidated while loading; the document may already be stale
+            return
+        self.local.set(clerk_id, user)
+        if self._redis is not None:
+            ttl = self.ttl if user else self.negative_ttl
+            try:
+                await self._redis.set(
+                    _KEY_PREFIX + clerk_id, bson.encode(user) if user else _MISSING, px=int(ttl * 1000)
+                )
+            except RedisError:
+                self.shared_errors += 1
+
+    async def get(self, clerk_id: str) -> Optional[dict]:
+        """The user document for clerk_id, or None if there is no such user."""
+        found, user = self.local.get(clerk_id)
+        if found:
+            return user
+        generation = self._generation
+        found, user = await self._shared_get(clerk_id)
+        if found:
+            if generation == self._generation:
+                self.local.set(clerk_id, user)
+            return user
+        user = await get_collection("users").find_one({"clerk_id": clerk_id})
+        await self._store(clerk_id, user, generation)
+        return user
+
+    async def peek(self, clerk_id: str):
+        """(found, user) from the cache only, without loading from MongoDB."""
+        found, user = self.local.get(clerk_id)
+        if found:
+            return found, user
+        return await self._shared_get(clerk_id)
+
+    async def get_many(self, clerk_ids: Iterable[str]) -> Dict[str, dict]:
+        """Users by clerk_id for every id that exists; misses are loaded with one $in query."""
+        users = {}
+        missing = []
+        for clerk_id in set(clerk_ids):
+            if not clerk_id:
+                continue
+            found, user = self.local.get(clerk_id)
+            if found:
+                if user:
+                    users[clerk_id] = user
+            else:
+                missing.append(clerk_id)
+        if not missing:
+            return users
+        generation = self._generation
+        cursor = get_collection("users").find({"clerk_id": {"$in": missing}})
+        async for user in cursor:
+            users[user["clerk_id"]] = user
+        for clerk_id in missing:
+            await self._store(clerk_id, users.get(clerk_id), generation)
+        return users
+
+    async def invalidate(self, clerk_id: Optional[str]):
+        """Drop a user everywhere; call after any write to that user's document."""
+        if not clerk_id:
+            return
+        self._generation += 1
+        self.local.invalidate(clerk_id)
+        read_flights.forget("user", clerk_id)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(_KEY_PREFIX + clerk_id)
+                await self._redis.publish(_INVALIDATION_CHANNEL, clerk_id)
+            except RedisError:
+                self.shared_errors += 1
+
+    def stats(self) -> dict:
+        stats = self.local.stats()
+        stats["shared"] = {
+            "enabled": self._redis is not None,
+            "hits": self.shared_hits,
+            "misses": self.shared_misses,
+            "errors": self.shared_errors,
+        }
+        return stats
+
+user_cache = UserCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    negative_ttl=settings.USER_CACHE_NEGATIVE_TTL_SECONDS,
+    redis_url=settings.USER_CACHE_REDIS_URL
+)
@@ -1,5 +1,35 @@
 from fastapi import HTTPException, Header
 from typing import Optional
+from .cache import TTLCache
+from .single_flight import read_flights
+from ..config import settings
+
+# Admin-role decisions keyed by clerk_id, shared by every verify_admin call
+admin_role_cache = TTLCache(
+    maxsize=settings.ADMIN_CACHE_MAX_SIZE,
+    ttl=settings.ADMIN_CACHE_TTL_SECONDS,
+    negative_ttl=settings.ADMIN_CACHE_NEGATIVE_TTL_SECONDS
+)
+
+# Bumped on every invalidation; a lookup that overlaps one isn't cached
+_admin_role_generation = 0
+
+def admin_role_generation() -> int:
+    """Read before looking up a role, and pass to cache_admin_role() with the result."""
+    return _admin_role_generation
+
+def cache_admin_role(clerk_id: str, is_admin: bool, generation: int):
+    """Cache a role lookup unless an invalidation happened while it ran."""
+    if generation == _admin_role_generation:
+        admin_role_cache.set(clerk_id, is_admin)
+
+def invalidate_admin_role(clerk_id: Optional[str]):
+    """Drop a cached admin decision; call whenever a user's role or ban status changes."""
+    global _admin_role_generation
+    if clerk_id:
+        _admin_role_generation += 1
+        admin_role_cache.invalidate(clerk_id)
+        read_flights.forget("admin", clerk_id)
 
 async def get_current_user_id(x_clerk_user_id: str = Header(...)) -> str:
     """
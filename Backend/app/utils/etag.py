@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import Response
+
+ETAG_HEADER = "ETag"
+
+def weak_etag(updated_at: Optional[datetime], count: Optional[int] = None) -> str:
+    """
+    Weak validator from a last-modified time, plus the item count for lists
+    (so removing an item that wasn't the newest still changes it).
+    """
+    stamp = updated_at.strftime("%Y%m%d%H%M%S%f") if isinstance(updated_at, datetime) else "0"
+    return f'W/"{stamp}"' if count is None else f'W/"{stamp}-{count}"'
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of an If-None-Match header against the current ETag."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={ETAG_HEADER: etag})
@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List
+from bson import ObjectId
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+MAX_EXPORT_BATCH_SIZE = 10000
+
+def _json_value(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value, default=str)
+    return _json_value(value)
+
+async def stream_documents(cursor, fields: List[str], fmt: str, batch_size: int) -> AsyncIterator[bytes]:
+    """
+    Stream a Motor cursor as NDJSON or CSV, one chunk per batch_size rows,
+    so memory stays flat no matter how many documents match.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(fields)
+
+    rows = 0
+    async for doc in cursor:
+        if writer:
+            writer.writerow([_csv_value(doc.get(field)) for field in fields])
+        else:
+            row = {field: _json_value(doc.get(field)) for field in fields}
+            buffer.write(json.dumps(row, default=str))
+            buffer.write("\n")
+        rows += 1
+        if rows % batch_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
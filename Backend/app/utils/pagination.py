@@ -0,0 +1,89 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple, List
+from bson import ObjectId
+from fastapi import HTTPException
+from .serialization import FastJSONResponse
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
+# Newest first; _id breaks ties between documents created in the same instant
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """Clamp a requested page size to [1, MAX_PAGE_LIMIT]."""
+    if not limit:
+        return DEFAULT_PAGE_LIMIT
+    return max(1, min(int(limit), MAX_PAGE_LIMIT))
+
+def encode_cursor(created_at: Optional[datetime], _id: ObjectId) -> str:
+    """Build an opaque cursor token from a document's sort key (created_at is None for legacy rows)."""
+    payload = json.dumps({"t": created_at.isoformat() if created_at else None, "id": str(_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str) -> Tuple[Optional[datetime], ObjectId]:
+    """Decode a cursor token back into its (created_at, _id) sort key."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["t"]) if payload["t"] is not None else None
+        return created_at, ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict a query to documents strictly after the cursor position."""
+    if not cursor:
+        return query
+    created_at, _id = decode_cursor(cursor)
+    if created_at is None:
+        # Already among the legacy rows without created_at, which sort last; page by _id alone
+        after_cursor = {"created_at": None, "_id": {"$lt": _id}}
+    else:
+        after_cursor = {
+            "$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": _id}},
+                {"created_at": None}
+            ]
+        }
+    if not query:
+        return after_cursor
+    return {"$and": [query, after_cursor]}
+
+async def fetch_page(collection, query: dict, cursor: Optional[str], limit: Optional[int],
+                     projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    Fetch one page of raw documents using range predicates instead of skip.
+    Returns the documents and the cursor for the next page (None on the last page).
+
+    With neither a cursor nor a limit, every matching document is returned
+    in one response, as these endpoints did before they were paginated.
+    """
+    if cursor is None and limit is None:
+        docs = await collection.find(query, projection).sort(KEYSET_SORT).to_list(length=None)
+        return docs, None
+    limit = clamp_limit(limit)
+    docs = await collection.find(keyset_filter(query, cursor), projection) \
+        .sort(KEYSET_SORT) \
+        .limit(limit + 1) \
+        .to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        created_at = last.get("created_at")
+        next_cursor = encode_cursor(created_at if isinstance(created_at, datetime) else None, last["_id"])
+    return docs, next_cursor
+
+def page_response(items: list, next_cursor: Optional[str], headers: Optional[dict] = None) -> FastJSONResponse:
+    """Wrap pre-encoded page items in a JSON response carrying the next-page cursor header."""
+    headers = dict(headers or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return FastJSONResponse(items, headers=headers or None)
@@ -0,0 +1,279 @@
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+from ..config import settings
+from ..database.pool_monitor import pool_stats
+from .metrics import HTTP_REQUESTS_REJECTED
+
+# Infrastructure endpoints are never limited or shed
+EXEMPT_PATHS = {"/health", "/health/ready", "/metrics"}
+
+# (requests per second, burst) for routes that cost more than the default;
+# they get their own bucket on top of each identity's default bucket.
+ROUTE_LIMITS: Dict[Tuple[str, str], Tuple[float, int]] = {
+    ("POST", "/swaps/request"): (0.2, 5),
+    ("GET", "/users/"): (2.0, 20),
+    ("GET", "/users/search"): (2.0, 20),
+    ("POST", "/users/batch-get"): (1.0, 5),
+    ("POST", "/users/batch-create"): (0.1, 2),
+}
+
+# Token buckets in Redis, refilled from the server clock so every worker
+# agrees. ARGV holds a (rate, burst) pair per key; a token is taken from
+# every bucket only when all of them have one. Returns {allowed, seconds
+# until the emptiest bucket has a token}.
+_REDIS_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local updated = tonumber(state[2]) or now
+    tokens[i] = math.min(burst, (tonumber(state[1]) or burst) + math.max(0, now - updated) * rate)
+    if tokens[i] < 1 then
+        wait = math.max(wait, (1 - tokens[i]) / rate)
+    end
+end
+local allowed = 0
+if wait == 0 then
+    allowed = 1
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tokens[i] - allowed, 'updated', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return {allowed, tostring(wait)}
+"""
+_KEY_PREFIX = "ratelimit:"
+
+# redis is optional and only imported when a shared backend is configured
+aioredis = None
+RedisError = Exception
+
+def _load_redis() -> bool:
+    global aioredis, RedisError
+    if aioredis is None:
+        try:
+            import redis.asyncio as module
+            from redis.exceptions import RedisError as error
+        except ImportError:  # pragma: no cover - redis is optional
+            return False
+        aioredis, RedisError = module, error
+    return True
+
+class TokenBuckets:
+    """
+    Size-bounded LRU of token buckets, each stored as [tokens, last refill].
+    A take() is O(1) per bucket: refill from the elapsed time, then spend
+    one token.
+    Not thread-safe; meant for use from the event loop.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _refill(self, key: Hashable, rate: float, burst: int, now: float) -> List[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket
+
+    def take_all(self, limits: Sequence[Tuple[Hashable, float, int]]) -> Tuple[bool, float]:
+        """
+        Spend one token from each (key, rate, burst) bucket, or none when any
+        of them is empty. (allowed, seconds until every bucket has a token).
+        """
+        now = time.monotonic()
+        buckets = [(self._refill(key, rate, burst, now), rate) for key, rate, burst in limits]
+        wait = max([(1 - bucket[0]) / rate for bucket, rate in buckets if bucket[0] < 1], default=0.0)
+        if wait:
+            return False, wait
+        for bucket, _ in buckets:
+            bucket[0] -= 1
+        return True, 0.0
+
+    def take(self, key: Hashable, rate: float, burst: int) -> Tuple[bool, float]:
+        """(allowed, seconds until the next token)."""
+        return self.take_all([(key, rate, burst)])
+
+class RateLimiter:
+    """
+    A token bucket per identity (the Clerk user id, or the client address
+    for anonymous requests), plus a per-identity route bucket for
+    ROUTE_LIMITS. A request takes a token from each of its buckets only
+    when all of them have one, so a rejected request costs nothing.
+
+    Buckets live in-process by default, so each worker enforces the limits
+    on its own. When RATE_LIMIT_REDIS_URL is set they are kept in Redis and
+    shared by every worker; if Redis fails, the local buckets take over.
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int, redis_url: str = ""):
+        self.rate = rate
+        self.burst = burst
+        self.redis_url = redis_url
+        self.local = TokenBuckets(maxsize)
+        self._redis = None
+        self._script = None
+        self.shared_errors = 0
+
+    async def start(self):
+        if not self.redis_url:
+            return
+        if not _load_redis():
+            print("RATE_LIMIT_REDIS_URL is set but the redis package is not installed; using local buckets only.")
+            return
+        self._redis = aioredis.from_url(self.redis_url)
+        self._script = self._redis.register_script(_REDIS_BUCKET_SCRIPT)
+
+    async def stop(self):
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+            self._script = None
+
+    async def _take_all(self, limits: List[Tuple[Tuple[str, ...], float, int]]) -> Tuple[bool, float]:
+        if self._script is not None:
+            try:
+                allowed, wait = await self._script(
+                    keys=[_KEY_PREFIX + ":".join(key) for key, _, _ in limits],
+                    args=[value for _, rate, burst in limits for value in (rate, burst)]
+                )
+                return bool(allowed), float(wait)
+            except RedisError:
+                self.shared_errors += 1
+        return self.local.take_all(limits)
+
+    async def check(self, identity: str, method: str, path: str) -> Tuple[bool, float]:
+        """(allowed, seconds until a retry can succeed) for one request from identity."""
+        limits = [((identity,), self.rate, self.burst)]
+        route_limit = ROUTE_LIMITS.get((method, path))
+        if route_limit is not None:
+            limits.append(((identity, method, path), *route_limit))
+        return await self._take_all(limits)
+
+    def stats(self) -> dict:
+        return {
+            "local_buckets": len(self.local),
+            "maxsize": self.local.maxsize,
+            "shared": {"enabled": self._redis is not None, "errors": self.shared_errors},
+        }
+
+rate_limiter = RateLimiter(
+    rate=settings.RATE_LIMIT_RATE_PER_SECOND,
+    burst=settings.RATE_LIMIT_BURST,
+    maxsize=settings.RATE_LIMIT_MAX_KEYS,
+    redis_url=settings.RATE_LIMIT_REDIS_URL
+)
+
+def trusted_proxies(value: str) -> Set[str]:
+    """Addresses from a comma-separated FORWARDED_ALLOW_IPS; "*" trusts every peer."""
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+def _client_address(scope, trusted: Set[str]) -> str:
+    """
+    The caller's address. X-Forwarded-For is only read when the connecting
+    peer is a trusted proxy, and then the right-most entry that isn't one
+    is used, the same rule uvicorn's proxy_headers applies.
+    """
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if "*" not in trusted and address not in trusted:
+        return address
+    for name, value in scope.get("headers", []):
+        if name == b"x-forwarded-for":
+            hosts = [item.strip() for item in value.decode("latin-1").split(",") if item.strip()]
+            if hosts and "*" in trusted:
+                return hosts[0]
+            for host in reversed(hosts):
+                if host not in trusted:
+                    return host
+            break
+    return address
+
+def _identity(scope, trusted: Set[str]) -> str:
+    """The bucket a request is charged to: its Clerk user id, or its client address when anonymous."""
+    for name, value in scope.get("headers", []):
+        if name == b"x-clerk-user-id" and value:
+            return "user:" + value.decode("latin-1")
+    return "ip:" + _client_address(scope, trusted)
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware that sheds load and rate limits before a request
+    reaches a route, so rejected calls never touch MongoDB.
+
+    Requests get 503 while this worker already has LOAD_SHED_MAX_IN_FLIGHT
+    requests running or LOAD_SHED_MAX_POOL_WAITING operations queued for a
+    MongoDB connection, and 429 once the caller's token bucket is empty.
+    Both carry Retry-After. A setting of 0 disables that check, and the
+    token buckets are skipped unless RATE_LIMIT_ENABLED is set.
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or (rate_limiter if settings.RATE_LIMIT_ENABLED else None)
+        self.trusted_proxies = trusted_proxies(settings.FORWARDED_ALLOW_IPS)
+        self.in_flight = 0
+
+    def _shed_reason(self) -> Optional[str]:
+        if settings.LOAD_SHED_MAX_IN_FLIGHT and self.in_flight >= settings.LOAD_SHED_MAX_IN_FLIGHT:
+            return "in_flight"
+        # Read without the listener's lock; a slightly stale value is fine here
+        if settings.LOAD_SHED_MAX_POOL_WAITING and pool_stats.waiting >= settings.LOAD_SHED_MAX_POOL_WAITING:
+            return "pool_waiting"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        reason = self._shed_reason()
+        if reason:
+            HTTP_REQUESTS_REJECTED.inc((reason,))
+            await _reject(send, 503, "Server is busy, retry shortly", settings.LOAD_SHED_RETRY_AFTER_SECONDS)
+            return
+
+        if self.limiter is not None:
+            allowed, wait = await self.limiter.check(_identity(scope, self.trusted_proxies), scope["method"], scope["path"])
+            if not allowed:
+                HTTP_REQUESTS_REJECTED.inc(("rate_limited",))
+                await _reject(send, 429, "Too many requests", wait)
+                return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,158 @@
+import copy
+import functools
+import json
+import typing
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import AnyUrl, BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    """
+    JSON response for content that is already shaped like the response
+    schema. Returning it from a route skips FastAPI's response_model
+    validation, so only use it with output from a compiled encoder.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def _model_fields(schema) -> Iterable[Tuple[str, Any, Callable[[], Any]]]:
+    """Yield (name, annotation, default factory) for a pydantic v1 or v2 model."""
+    if hasattr(schema, "model_fields"):
+        for name, field in schema.model_fields.items():
+            if field.default_factory is not None:
+                factory = field.default_factory
+            else:
+                default = None if field.is_required() else field.default
+                factory = lambda default=default: copy.copy(default)
+            yield name, field.annotation, factory
+    else:
+        for name, field in schema.__fields__.items():
+            if field.default_factory is not None:
+                factory = field.default_factory
+            else:
+                factory = lambda default=field.default: copy.copy(default)
+            yield name, field.outer_type_, factory
+
+def _unwrap_optional(annotation):
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+def _is_model(annotation) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+def _is_url(annotation) -> bool:
+    # pydantic 2.0-2.9 declares HttpUrl as Annotated[Url, UrlConstraints(...)]
+    if typing.get_origin(annotation) is typing.Annotated:
+        annotation = typing.get_args(annotation)[0]
+    return isinstance(annotation, type) and issubclass(annotation, AnyUrl)
+
+def _url_normalizer(annotation) -> Callable[[Any], Any]:
+    """
+    Map a stored URL to the string pydantic would serialize for `annotation`
+    (e.g. pydantic 2 adds a trailing slash to a bare host). Values pydantic
+    would reject are passed through unchanged.
+    """
+    try:
+        from pydantic import TypeAdapter
+        validate = TypeAdapter(annotation).validate_python
+    except ImportError:  # pydantic v1
+        from pydantic import parse_obj_as
+        validate = functools.partial(parse_obj_as, annotation)
+
+    # Profile URLs repeat across responses; parsing them is the expensive part
+    @functools.lru_cache(maxsize=4096)
+    def normalize(value):
+        try:
+            return str(validate(value))
+        except ValueError:
+            return value
+
+    return normalize
+
+_ENCODER_CACHE: Dict[type, Callable[[dict], dict]] = {}
+
+def compile_encoder(schema) -> Callable[[dict], dict]:
+    """
+    Precompile a function that turns a raw MongoDB document into a dict
+    shaped like `schema`, without running pydantic validation. `id` is
+    filled from `_id`, ObjectIds become strings, missing fields get the
+    schema default, and nested models / lists of models are encoded the
+    same way. URL fields are normalized as pydantic would serialize them.
+    Unknown document fields are dropped.
+    """
+    if schema in _ENCODER_CACHE:
+        return _ENCODER_CACHE[schema]
+
+    plan = []
+    for name, annotation, factory in _model_fields(schema):
+        annotation = _unwrap_optional(annotation)
+        source = "_id" if name == "id" else name
+        nested = None
+        many = False
+        url = _url_normalizer(annotation) if _is_url(annotation) else None
+        if _is_model(annotation):
+            nested = compile_encoder(annotation)
+        elif typing.get_origin(annotation) in (list, List):
+            args = typing.get_args(annotation)
+            if args and _is_model(_unwrap_optional(args[0])):
+                nested = compile_encoder(_unwrap_optional(args[0]))
+                many = True
+        plan.append((name, source, factory, nested, many, url))
+
+    def encode(doc: dict) -> dict:
+        out = {}
+        for name, source, factory, nested, many, url in plan:
+            value = doc.get(source)
+            if value is None:
+                out[name] = factory()
+            elif isinstance(value, ObjectId):
+                out[name] = str(value)
+            elif url is not None:
+                out[name] = url(value)
+            elif nested is None:
+                out[name] = value
+            elif many:
+                out[name] = [nested(item) for item in value if isinstance(item, dict)]
+            elif isinstance(value, dict):
+                out[name] = nested(value)
+            else:
+                out[name] = value
+        return out
+
+    _ENCODER_CACHE[schema] = encode
+    return encode
+
+def schema_projection(schema, extra: Optional[Iterable[str]] = None) -> dict:
+    """MongoDB projection fetching only the fields `schema` needs (plus `extra`)."""
+    projection = {"_id": 1}
+    for name, _, _ in _model_fields(schema):
+        if name != "id":
+            projection[name] = 1
+    for name in extra or []:
+        projection[name] = 1
+    return projection
@@ -0,0 +1,60 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads: while a call for a key is in
+    flight, later callers with the same key await its result instead of
+    running their own query.
+
+    Keys are tuples starting with (namespace, subject), e.g.
+    ("user", clerk_id, "profile"). After a write, forget(namespace, subject)
+    so reads that start afterwards don't join a call that began before it.
+
+    The shared call runs as its own task and every caller awaits it through
+    asyncio.shield, so a cancelled caller (e.g. a client that disconnected)
+    never cancels the query for the others. Results are shared between
+    callers and must not be mutated. Not thread-safe; meant for use from
+    the event loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[Hashable, ...], asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: Tuple[Hashable, ...], func: Callable[..., Awaitable[Any]], *args) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(func(*args))
+            self._calls[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Tuple[Hashable, ...], task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, namespace: str, subject: Hashable):
+        """Detach in-flight calls for a subject; callers already waiting still get their result."""
+        for key in [key for key in self._calls if key[:2] == (namespace, subject)]:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        calls = self.executed + self.shared
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "shared": self.shared,
+            "shared_ratio": round(self.shared / calls, 4) if calls else 0.0,
+        }
+
+# Shared by the controllers' hot read paths
+read_flights = SingleFlight()
@@ -0,0 +1,15 @@
+import asyncio
+from app.database.mongo import connect_to_mongo, close_mongo_connection, get_collection
+from app.services.rating_service import backfill_rating_aggregates
+
+async def main():
+    """Recompute rating aggregates for every existing user from their ratings array"""
+    await connect_to_mongo()
+    try:
+        modified = await backfill_rating_aggregates(get_collection("users"))
+        print(f"Backfilled rating aggregates for {modified} users.")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Cold import time of app.main, from `python -X importtime`.
+
+Each run imports the app in a fresh interpreter. Because absolute times
+depend on the machine, the check compares the best of --repeat wall-clock
+runs of `python -c "import app.main"` against the best bare `python -c pass`
+run on the same machine, and fails when that ratio is more than the
+baseline's tolerance above benchmarks/import_time_baseline.json. It also
+fails when an optional integration that should load lazily (Cloudinary,
+Pillow, redis, prometheus_client) is imported at startup.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_import_time [--repeat 5] [--check] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(BACKEND_DIR, "benchmarks", "import_time_baseline.json")
+# Generous: cold imports vary a lot between runs on shared machines
+DEFAULT_TOLERANCE = 0.5
+
+# Only imported on first use, never by `import app.main`
+LAZY_MODULES = ["cloudinary", "PIL", "redis", "prometheus_client"]
+
+def eager_imports(module: str = "app.main") -> List[str]:
+    """LAZY_MODULES that a fresh interpreter has loaded after importing module."""
+    script = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([name for name in {LAZY_MODULES!r} if name in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def import_once(module: str = "app.main") -> Tuple[float, Dict[str, float]]:
+    """(cumulative ms for module, {top-level package: cumulative ms}) from one fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            # Header line
+            continue
+        name = name.rstrip()
+        ms = int(cumulative) / 1000
+        if name.strip() == module:
+            total = ms
+        package = name.strip().split(".")[0]
+        packages[package] = max(packages.get(package, 0.0), ms)
+    return total, packages
+
+def wall_ms(code: str) -> float:
+    """Wall-clock ms for a fresh interpreter to run code."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def measure(repeat: int) -> Tuple[float, Dict[str, float]]:
+    """Best of `repeat` -X importtime runs; the packages are from that run."""
+    return min((import_once() for _ in range(repeat)), key=lambda run: run[0])
+
+def startup_ratio(repeat: int) -> Tuple[float, float, float]:
+    """(best `import app.main` ms, best bare interpreter ms, their ratio), best of `repeat` each."""
+    app_ms = min(wall_ms("import app.main") for _ in range(repeat))
+    bare_ms = min(wall_ms("pass") for _ in range(repeat))
+    return app_ms, bare_ms, app_ms / bare_ms
+
+def load_baseline() -> dict:
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+def check(ratio: float, eager: List[str], baseline: dict) -> List[str]:
+    """Problems found, empty when startup is within tolerance and nothing optional loads eagerly."""
+    problems = [f"{name} is imported at startup" for name in eager]
+    limit = baseline["startup_ratio"] * (1 + baseline.get("tolerance", DEFAULT_TOLERANCE))
+    if ratio > limit:
+        problems.append(f"import app.main took {ratio:.2f}x a bare interpreter start, over the {limit:.2f}x limit "
+                        f"(baseline {baseline['startup_ratio']:.2f}x)")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level packages to list")
+    parser.add_argument("--check", action="store_true", help="exit 1 on a regression against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="record this run as the baseline")
+    args = parser.parse_args()
+
+    best_ms, packages = measure(args.repeat)
+    print(f"import app.main: {best_ms:.1f} ms (-X importtime, best of {args.repeat})")
+    for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<24} {ms:8.1f} ms")
+    app_ms, bare_ms, ratio = startup_ratio(args.repeat)
+    print(f"wall clock: {app_ms:.1f} ms with app.main, {bare_ms:.1f} ms bare ({ratio:.2f}x)")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"startup_ratio": round(ratio, 2), "tolerance": DEFAULT_TOLERANCE}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+    if args.check:
+        problems = check(ratio, eager_imports(), load_baseline())
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        if problems:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
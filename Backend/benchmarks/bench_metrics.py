@@ -0,0 +1,78 @@
+"""
+Per-request cost of the metrics subsystem.
+
+before: bare ASGI app
+after:  MetricsMiddleware around it, plus one MongoDB command event pair
+        through CommandMetricsListener (what a typical read adds)
+
+Run from the Backend directory:
+    python -m benchmarks.bench_metrics [--requests 20000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import monitoring
+from app.database.command_monitor import CommandMetricsListener
+from app.utils.metrics import MetricsMiddleware
+
+class _Route:
+    path = "/users/{clerk_id}"
+
+async def bare_app(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+def make_app_with_command(listener: CommandMetricsListener):
+    started = monitoring.CommandStartedEvent({"find": "users", "filter": {}}, "db", 1, ("localhost", 27017), 1)
+    succeeded = monitoring.CommandSucceededEvent(
+        datetime.timedelta(microseconds=800), {"ok": 1, "cursor": {"firstBatch": [{}], "id": 0}},
+        "find", 1, ("localhost", 27017), 1
+    )
+
+    async def app(scope, receive, send):
+        listener.started(started)
+        listener.succeeded(succeeded)
+        await bare_app(scope, receive, send)
+    return app
+
+async def drive(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/users/x"}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    listener = CommandMetricsListener()
+    apps = {
+        "before": bare_app,
+        "after": MetricsMiddleware(make_app_with_command(listener)),
+    }
+    results = {}
+    for name, app in apps.items():
+        best = min(asyncio.run(drive(app, args.requests)) for _ in range(args.repeat))
+        results[name] = best / args.requests * 1e6
+        print(f"{name:>7}: {results[name]:8.2f} us/request")
+    print(f"overhead: {results['after'] - results['before']:.2f} us/request")
+
+if __name__ == "__main__":
+    main()
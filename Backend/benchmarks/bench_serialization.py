@@ -0,0 +1,120 @@
+"""
+Per-document serialization cost for UserOut and SwapOut responses.
+
+before: Model.from_dict(doc) -> .dict() -> Out(**...) -> response_model
+        re-validation -> jsonable_encoder -> json.dumps (the old read path)
+after:  compiled encoder -> dumps (FastJSONResponse path)
+
+Run from the Backend directory:
+    python -m benchmarks.bench_serialization [--docs 2000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import warnings
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.user import UserModel
+from app.models.swap import SwapModel
+from app.schemas.user_schema import UserOut
+from app.schemas.swap_schema import SwapOut
+from app.utils.serialization import compile_encoder, dumps
+
+def make_user(i: int) -> dict:
+    now = datetime(2024, 1, 1) + timedelta(minutes=i)
+    return {
+        "_id": ObjectId(),
+        "username": f"user{i}",
+        "fullname": f"User Number {i}",
+        "email": f"user{i}@example.com",
+        "clerk_id": f"user_{i:08d}",
+        "address": "221B Baker Street",
+        "profile_url": f"https://res.cloudinary.com/demo/image/upload/{i}.jpg",
+        "skills_offered": ["python", "guitar", "cooking"],
+        "skills_wanted": ["spanish", "design"],
+        "availability": "weekends",
+        "is_public": True,
+        "is_banned": False,
+        "rating": 4.5,
+        "rating_count": 4,
+        "rating_sum": 18,
+        "rating_histogram": {"4": 2, "5": 2},
+        "role": "user",
+        "ratings": [
+            {"from_user_id": f"user_{j:08d}", "rating": 4 + j % 2, "feedback": "Great swap", "date": now}
+            for j in range(4)
+        ],
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def make_swap(i: int) -> dict:
+    now = datetime(2024, 1, 1) + timedelta(minutes=i)
+    return {
+        "_id": ObjectId(),
+        "requester_id": f"user_{i:08d}",
+        "receiver_id": f"user_{i + 1:08d}",
+        "requester_message": "Happy to trade lessons",
+        "status": "accepted",
+        "requester_feedback": "Great",
+        "requester_rating": 5,
+        "receiver_feedback": None,
+        "receiver_rating": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def _validate(schema, data: dict):
+    if hasattr(schema, "model_validate"):
+        return schema.model_validate(data)
+    return schema.parse_obj(data)
+
+def before(model, schema, docs):
+    for doc in docs:
+        out = schema(**model.from_dict(doc).dict())
+        # FastAPI validates the returned object against response_model again
+        validated = _validate(schema, out.dict())
+        json.dumps(jsonable_encoder(validated)).encode()
+
+def after(encoder, docs):
+    for doc in docs:
+        dumps(encoder(doc))
+
+def measure(name: str, model, schema, docs, repeat: int) -> dict:
+    encoder = compile_encoder(schema)
+    before_s = min(timeit.repeat(lambda: before(model, schema, docs), number=1, repeat=repeat))
+    after_s = min(timeit.repeat(lambda: after(encoder, docs), number=1, repeat=repeat))
+    result = {
+        "schema": name,
+        "docs": len(docs),
+        "before_us_per_doc": round(before_s / len(docs) * 1e6, 2),
+        "after_us_per_doc": round(after_s / len(docs) * 1e6, 2),
+    }
+    result["speedup"] = round(result["before_us_per_doc"] / max(result["after_us_per_doc"], 1e-9), 1)
+    return result
+
+def main():
+    # Keep pydantic's .dict() deprecation warnings out of the timings
+    warnings.simplefilter("ignore", DeprecationWarning)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [
+        measure("UserOut", UserModel, UserOut, [make_user(i) for i in range(args.docs)], args.repeat),
+        measure("SwapOut", SwapModel, SwapOut, [make_swap(i) for i in range(args.docs)], args.repeat),
+    ]
+    for result in results:
+        print(f"{result['schema']:8} before {result['before_us_per_doc']:8.2f} us/doc   "
+              f"after {result['after_us_per_doc']:8.2f} us/doc   x{result['speedup']}")
+    print(json.dumps(results))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+Drive every user, swap and admin route at fixed concurrency against a
+running API and record throughput, latency percentiles and MongoDB
+commands per request.
+
+Seed a scratch database first and point the API at it:
+    python -m benchmarks.seed_data --database skill_swap_platform_loadtest --drop
+    DATABASE_NAME=skill_swap_platform_loadtest RATE_LIMIT_ENABLED=False uvicorn app.main:app --port 8000
+
+Then, from the Backend directory:
+    python -m benchmarks.load_test [--base-url http://localhost:8000] [--concurrency 16] [--requests 500]
+        [--routes users.get,swaps.my] [--compare benchmarks/results/<earlier run>.json]
+
+Fixtures (user ids, pending swaps, ...) are sampled from the database
+directly. Mongo ops per request come from the API's /metrics endpoint, so
+they are only reported when METRICS_ENABLED is on. Results are written as
+JSON to benchmarks/results/ unless --output is given.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from benchmarks.seed_data import DEFAULT_DATABASE, SKILLS, EPOCH, clerk_id_for
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+_MONGO_COUNT_RE = re.compile(r'^mongo_command_duration_seconds_count\{.*?route="((?:[^"\\]|\\.)*)"\} (\d+)$')
+
+@dataclass
+class Scenario:
+    """One route under load: `build()` returns (method, url, request kwargs) for the next request."""
+    name: str
+    method: str
+    route: str
+    build: Callable[[], tuple]
+    # Fraction of --requests to send; expensive admin routes run fewer times
+    share: float = 1.0
+    # Loads fixtures that earlier scenarios created, just before this one runs
+    prepare: Optional[Callable[[], Awaitable[None]]] = None
+
+class Fixtures:
+    """Ids sampled from the seeded database, handed out so state-changing requests don't collide."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.clerk_ids: List[str] = []
+        self.object_ids: List[str] = []
+        self.admin_id = clerk_id_for(0)
+        self.pending: List[dict] = []
+        self.accepted: List[dict] = []
+        self.ban_targets: List[str] = []
+        self.created: List[str] = []
+        self.database = None
+        self.broadcasts: List[str] = []
+        self.run_id = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+
+    async def load(self, database, requests: int):
+        self.database = database
+        sampled = await database["users"].aggregate([
+            {"$match": {"role": "user", "is_banned": {"$ne": True}}},
+            {"$sample": {"size": max(1000, requests) + requests}},
+            {"$project": {"_id": 1, "clerk_id": 1}}
+        ]).to_list(None)
+        # Ban targets are kept apart from the ids other scenarios use
+        self.ban_targets = [str(user["_id"]) for user in sampled[:requests // 2]]
+        self.clerk_ids = [user["clerk_id"] for user in sampled[requests // 2:]]
+        self.object_ids = [str(user["_id"]) for user in sampled[requests // 2:]]
+        swaps = database["swaps"]
+        # accept, reject and cancel each consume a distinct pending swap
+        self.pending = await swaps.find(
+            {"status": "pending"}, {"requester_id": 1, "receiver_id": 1}
+        ).limit(3 * requests).to_list(None)
+        self.accepted = await swaps.find(
+            {"status": "accepted", "requester_feedback": None}, {"requester_id": 1}
+        ).limit(requests).to_list(None)
+        self.rng.shuffle(self.pending)
+        if not self.clerk_ids:
+            raise SystemExit("No users found; seed the database with benchmarks.seed_data first")
+
+    async def load_created_users(self):
+        """Document ids of the users created by this run; the delete route takes the document id."""
+        self.created = [str(user["_id"]) async for user in self.database["users"].find(
+            {"clerk_id": {"$regex": f"^lt_new_{self.run_id}_"}}, {"_id": 1}
+        )]
+
+    async def load_broadcasts(self):
+        self.broadcasts = [str(b["_id"]) async for b in self.database["broadcasts"].find({}, {"_id": 1}).limit(100)]
+
+    def clerk_id(self) -> str:
+        return self.rng.choice(self.clerk_ids)
+
+    @staticmethod
+    def take(pool: list):
+        return pool.pop() if pool else None
+
+def _png(rng: random.Random) -> bytes:
+    # A different colour per request so content dedupe doesn't skip processing
+    image = Image.new("RGB", (800, 600), tuple(rng.randrange(256) for _ in range(3)))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+def build_scenarios(fx: Fixtures, requests: int) -> List[Scenario]:
+    rng = fx.rng
+    admin = {"x-clerk-user-id": fx.admin_id}
+    counter = iter(range(10 ** 9))
+    window_start = EPOCH + timedelta(days=rng.randrange(300))
+    export_window = {
+        "created_from": window_start.isoformat(),
+        "created_to": (window_start + timedelta(days=1)).isoformat()
+    }
+
+    def as_user(clerk_id: str) -> dict:
+        return {"headers": {"x-clerk-user-id": clerk_id}}
+
+    def create_user():
+        clerk_id = f"lt_new_{fx.run_id}_{next(counter)}"
+        return "POST", "/users/", {"json": {
+            "username": clerk_id, "fullname": "Load Test", "email": f"{clerk_id}@example.com",
+            "clerk_id": clerk_id, "skills_offered": rng.sample(SKILLS, 2), "skills_wanted": rng.sample(SKILLS, 2)
+        }}
+
+    def update_user():
+        return "PUT", f"/users/{fx.clerk_id()}", {"json": {
+            "fullname": "Updated Name", "address": "Mumbai", "profile_url": None,
+            "skills_offered": rng.sample(SKILLS, 3), "skills_wanted": rng.sample(SKILLS, 2),
+            "availability": "weekends", "is_public": True
+        }}
+
+    def delete_user():
+        user_id = fx.take(fx.created) or "000000000000000000000000"
+        return "DELETE", f"/users/{user_id}", {}
+
+    def upload_photo():
+        # The route takes the user's document id
+        return "POST", f"/users/{rng.choice(fx.object_ids)}/upload-photo", {
+            "files": {"file": ("photo.png", _png(rng), "image/png")}
+        }
+
+    def swap_action(path: str, method: str, actor: str):
+        def build():
+            swap = fx.take(fx.pending)
+            if swap is None:
+                return method, f"/swaps/{path}/000000000000000000000000", as_user(fx.clerk_id())
+            return method, f"/swaps/{path}/{swap['_id']}", as_user(swap[actor])
+        return build
+
+    def feedback():
+        swap = fx.take(fx.accepted)
+        swap_id = swap["_id"] if swap else "000000000000000000000000"
+        requester = swap["requester_id"] if swap else fx.clerk_id()
+        return "POST", f"/swaps/feedback/{swap_id}", {
+            "params": {"feedback": "Great swap", "rating": rng.randint(1, 5)}, **as_user(requester)
+        }
+
+    def ban_user():
+        user_id = fx.take(fx.ban_targets) or "000000000000000000000000"
+        return "PUT", f"/admin/ban/{user_id}", {"json": {"user_id": user_id, "reason": "load test"}, "headers": admin}
+
+    def get_broadcast():
+        broadcast_id = rng.choice(fx.broadcasts) if fx.broadcasts else "000000000000000000000000"
+        return "GET", f"/admin/broadcast/{broadcast_id}", {"headers": admin}
+
+    scenarios = [
+        Scenario("users.list", "GET", "/users/", lambda: ("GET", "/users/", {"params": {"limit": 50}})),
+        Scenario("users.search", "GET", "/users/search",
+                 lambda: ("GET", "/users/search", {"params": {"q": rng.choice(SKILLS)}})),
+        Scenario("users.get", "GET", "/users/{clerk_id}", lambda: ("GET", f"/users/{fx.clerk_id()}", {})),
+        Scenario("users.matches", "GET", "/users/{clerk_id}/matches",
+                 lambda: ("GET", f"/users/{fx.clerk_id()}/matches", {"params": {"limit": 20}})),
+        Scenario("users.inbox", "GET", "/users/{clerk_id}/inbox", lambda: ("GET", f"/users/{fx.clerk_id()}/inbox", {})),
+        Scenario("swaps.my", "GET", "/swaps/my-swaps", lambda: ("GET", "/swaps/my-swaps", as_user(fx.clerk_id()))),
+        Scenario("admin.users", "GET", "/admin/users", lambda: ("GET", "/admin/users", {"headers": admin})),
+        Scenario("admin.swaps", "GET", "/admin/swaps", lambda: ("GET", "/admin/swaps", {"headers": admin})),
+        Scenario("admin.cache_stats", "GET", "/admin/cache-stats",
+                 lambda: ("GET", "/admin/cache-stats", {"headers": admin})),
+        Scenario("admin.export_users", "GET", "/admin/export/users",
+                 lambda: ("GET", "/admin/export/users", {"params": export_window, "headers": admin}), share=0.1),
+        Scenario("admin.export_swaps", "GET", "/admin/export/swaps",
+                 lambda: ("GET", "/admin/export/swaps", {"params": export_window, "headers": admin}), share=0.1),
+        Scenario("users.create", "POST", "/users/", create_user),
+        Scenario("users.update", "PUT", "/users/{clerk_id}", update_user),
+        Scenario("swaps.request", "POST", "/swaps/request", lambda: ("POST", "/swaps/request", {
+            "json": {"receiver_id": fx.clerk_id(), "requester_message": "load test"}, **as_user(fx.clerk_id())
+        })),
+        Scenario("swaps.accept", "PUT", "/swaps/accept/{swap_id}", swap_action("accept", "PUT", "receiver_id")),
+        Scenario("swaps.reject", "PUT", "/swaps/reject/{swap_id}", swap_action("reject", "PUT", "receiver_id")),
+        Scenario("swaps.cancel", "DELETE", "/swaps/cancel/{swap_id}", swap_action("cancel", "DELETE", "requester_id")),
+        Scenario("swaps.feedback", "POST", "/swaps/feedback/{swap_id}", feedback),
+        # Each broadcast fans out to every user, so only a handful are sent
+        Scenario("admin.broadcast", "POST", "/admin/broadcast", lambda: ("POST", "/admin/broadcast", {
+            "json": {"title": "Load test", "message": "Load test broadcast"}, "headers": admin
+        }), share=0.02),
+        Scenario("admin.broadcast_status", "GET", "/admin/broadcast/{broadcast_id}", get_broadcast,
+                 prepare=fx.load_broadcasts),
+        Scenario("admin.ban", "PUT", "/admin/ban/{user_id}", ban_user, share=0.2),
+        Scenario("users.delete", "DELETE", "/users/{clerk_id}", delete_user, prepare=fx.load_created_users),
+    ]
+    if Image is not None:
+        scenarios.insert(-1, Scenario("users.upload_photo", "POST", "/users/{clerk_id}/upload-photo", upload_photo, share=0.2))
+    return scenarios
+
+async def mongo_command_counts(client: httpx.AsyncClient) -> Optional[Dict[str, int]]:
+    """MongoDB commands issued so far, per route template, from /metrics."""
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    counts: Counter = Counter()
+    for line in response.text.splitlines():
+        match = _MONGO_COUNT_RE.match(line)
+        if match:
+            counts[match.group(1)] += int(match.group(2))
+    return dict(counts)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            method, url, kwargs = scenario.build()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    before = await mongo_command_counts(client)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = await mongo_command_counts(client)
+
+    latencies.sort()
+    completed = len(latencies)
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    mongo_ops = None
+    if before is not None and after is not None and completed:
+        mongo_ops = round((after.get(scenario.route, 0) - before.get(scenario.route, 0)) / completed, 2)
+    return {
+        "method": scenario.method,
+        "route": scenario.route,
+        "requests": completed,
+        "errors": errors,
+        "status_counts": dict(statuses),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean": round(sum(latencies) / completed * 1000, 2) if completed else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if completed else 0.0,
+        },
+        "mongo_ops_per_request": mongo_ops,
+    }
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run_load_test(base_url: str, database, concurrency: int, requests: int, seed: int,
+                        only: Optional[List[str]] = None, client: Optional[httpx.AsyncClient] = None) -> dict:
+    """Run every scenario (or those named in `only`) in order and return the results document."""
+    fixtures = Fixtures(random.Random(seed))
+    await fixtures.load(database, requests)
+    dataset = await database["loadtest_meta"].find_one({"_id": "dataset"}, {"_id": 0}) or {}
+    scenarios = build_scenarios(fixtures, requests)
+    if only:
+        scenarios = [scenario for scenario in scenarios if scenario.name in only]
+
+    own_client = client is None
+    if own_client:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+    results = {}
+    try:
+        for scenario in scenarios:
+            if scenario.prepare:
+                await scenario.prepare()
+            count = max(1, int(requests * scenario.share))
+            result = await run_scenario(client, scenario, count, concurrency)
+            results[scenario.name] = result
+            latency = result["latency_ms"]
+            print(f"{scenario.name:<24} {result['throughput_rps']:>9.1f} req/s  "
+                  f"p50 {latency['p50']:>8.2f}  p95 {latency['p95']:>8.2f}  p99 {latency['p99']:>8.2f} ms  "
+                  f"mongo/req {result['mongo_ops_per_request']}  errors {result['errors']}")
+    finally:
+        if own_client:
+            await client.aclose()
+
+    dataset.pop("seeded_at", None)
+    return {
+        "meta": {
+            "git_revision": git_revision(),
+            "started_at": datetime.utcnow().isoformat(),
+            "base_url": base_url,
+            "concurrency": concurrency,
+            "requests_per_route": requests,
+            "seed": seed,
+            "dataset": dataset,
+        },
+        "routes": results,
+    }
+
+def compare(current: dict, baseline: dict):
+    """Print throughput and p95 changes against an earlier results file."""
+    print(f"\nvs {baseline['meta'].get('git_revision')} ({baseline['meta'].get('started_at')}):")
+    for name, result in current["routes"].items():
+        before = baseline["routes"].get(name)
+        if not before:
+            continue
+        rps_change = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+        p95_change = (result["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1) * 100 if before["latency_ms"]["p95"] else 0.0
+        print(f"{name:<24} throughput {rps_change:+7.1f}%  p95 {p95_change:+7.1f}%")
+
+async def main_async(args):
+    mongo_client = AsyncIOMotorClient(args.mongodb_url)
+    try:
+        report = await run_load_test(
+            args.base_url, mongo_client[args.database], args.concurrency, args.requests, args.seed,
+            only=args.routes.split(",") if args.routes else None
+        )
+    finally:
+        mongo_client.close()
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['meta']['git_revision'] or 'unknown'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--database", default=DEFAULT_DATABASE)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--routes", help="comma-separated scenario names to run (default: all)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>-<revision>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
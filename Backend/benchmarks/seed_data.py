@@ -0,0 +1,223 @@
+"""
+Seed a scratch MongoDB database with synthetic users and swaps for load tests.
+
+Skills follow a Zipf-like distribution over a fixed catalogue (a few skills
+are very common, most are rare), swap statuses and ratings follow fixed
+mixes, and everything is derived from --seed so runs are reproducible.
+Documents are written with unordered insert_many in batches, then the
+app's indexes are created.
+
+Run from the Backend directory:
+    python -m benchmarks.seed_data [--users 100000] [--swaps 1000000] [--database NAME] [--drop]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.database.indexes import ensure_indexes
+from app.services.rating_service import RATING_STARS
+
+DEFAULT_DATABASE = f"{settings.DATABASE_NAME}_loadtest"
+
+# Leading users get the admin role so admin routes can be driven
+ADMIN_COUNT = 5
+
+SKILL_AREAS = {
+    "programming": ["python", "javascript", "java", "rust", "go", "sql", "react", "django", "kotlin", "swift", "c++", "typescript"],
+    "music": ["guitar", "piano", "violin", "drums", "singing", "ukulele", "music theory", "music production", "bass", "saxophone"],
+    "languages": ["spanish", "french", "german", "japanese", "mandarin", "italian", "portuguese", "korean", "arabic", "hindi"],
+    "design": ["photoshop", "figma", "illustration", "ui design", "typography", "3d modeling", "animation", "video editing"],
+    "crafts": ["knitting", "woodworking", "pottery", "sewing", "calligraphy", "origami", "jewelry making", "embroidery"],
+    "food": ["cooking", "baking", "bread making", "vegan cooking", "cake decorating", "coffee brewing", "fermentation"],
+    "fitness": ["yoga", "running", "swimming", "rock climbing", "pilates", "boxing", "cycling", "dance"],
+    "business": ["excel", "public speaking", "marketing", "accounting", "negotiation", "seo", "copywriting", "project management"],
+    "other": ["photography", "gardening", "chess", "writing", "first aid", "car repair", "home repair", "tarot", "magic tricks"],
+}
+SKILLS: List[str] = [skill for skills in SKILL_AREAS.values() for skill in skills]
+
+FIRST_NAMES = ["Aarav", "Maya", "Liam", "Zara", "Noah", "Aisha", "Ethan", "Priya", "Lucas", "Sofia",
+               "Omar", "Chloe", "Ravi", "Emma", "Kenji", "Nia", "Mateo", "Leila", "Ivan", "Grace"]
+LAST_NAMES = ["Sharma", "Smith", "Garcia", "Chen", "Okafor", "Patel", "Nguyen", "Kowalski", "Silva", "Khan",
+              "Müller", "Rossi", "Tanaka", "Johnson", "Haddad", "Ivanova", "Brown", "Mehta", "Lopez", "Kim"]
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "London", "New York", "Berlin", "Lagos", "São Paulo", "Tokyo", "Toronto"]
+AVAILABILITY = ["weekends", "evenings", "weekdays", "mornings", "flexible", None]
+
+SWAP_STATUSES = ["pending", "accepted", "rejected", "cancelled"]
+SWAP_STATUS_WEIGHTS = [40, 35, 15, 10]
+# Ratings skew positive, as they do on real marketplaces
+RATING_WEIGHTS = [3, 5, 12, 35, 45]
+
+EPOCH = datetime(2024, 1, 1)
+SPAN_MINUTES = 365 * 24 * 60
+
+def object_id_for(kind: int, index: int, created: datetime) -> ObjectId:
+    """Deterministic ObjectId: creation time, then collection kind and index."""
+    seconds = int((created - datetime(1970, 1, 1)).total_seconds())
+    return ObjectId(seconds.to_bytes(4, "big") + bytes([kind]) + index.to_bytes(7, "big"))
+
+def clerk_id_for(index: int) -> str:
+    return f"lt_admin_{index:04d}" if index < ADMIN_COUNT else f"lt_user_{index:07d}"
+
+class Generator:
+    def __init__(self, seed: int, zipf_s: float = 1.1):
+        self.rng = random.Random(seed)
+        # Which skills are popular is part of the seeded data
+        self.catalogue = list(SKILLS)
+        self.rng.shuffle(self.catalogue)
+        weights = [1 / (rank ** zipf_s) for rank in range(1, len(self.catalogue) + 1)]
+        self.cum_weights = list(accumulate(weights))
+
+    def skills(self, low: int, high: int) -> List[str]:
+        count = self.rng.randint(low, high)
+        picked = set(self.rng.choices(self.catalogue, cum_weights=self.cum_weights, k=count))
+        return sorted(picked)
+
+    def created_at(self) -> datetime:
+        return EPOCH + timedelta(minutes=self.rng.randrange(SPAN_MINUTES))
+
+    def user(self, index: int) -> dict:
+        rng = self.rng
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        created = self.created_at()
+        ratings = [
+            {
+                "from_clerk_id": clerk_id_for(rng.randrange(ADMIN_COUNT, ADMIN_COUNT + 1000)),
+                "rating": rating,
+                "feedback": "Great swap",
+                "date": created + timedelta(days=rng.randrange(1, 60))
+            }
+            for rating in rng.choices(RATING_STARS, weights=RATING_WEIGHTS, k=rng.choice([0, 0, 1, 2, 3, 5, 8]))
+        ]
+        histogram = {}
+        for entry in ratings:
+            key = str(entry["rating"])
+            histogram[key] = histogram.get(key, 0) + 1
+        rating_sum = sum(entry["rating"] for entry in ratings)
+        return {
+            "_id": object_id_for(1, index, created),
+            "username": f"{first.lower()}{index}",
+            "fullname": f"{first} {last}",
+            "email": f"{first.lower()}.{index}@example.com",
+            "clerk_id": clerk_id_for(index),
+            "address": rng.choice(CITIES),
+            "profile_url": None,
+            "skills_offered": self.skills(1, 4),
+            "skills_wanted": self.skills(1, 3),
+            "availability": rng.choice(AVAILABILITY),
+            # A small share of private and banned profiles, as in production
+            "is_public": rng.random() > 0.05,
+            "is_banned": index >= ADMIN_COUNT and rng.random() < 0.01,
+            "rating": round(rating_sum / len(ratings), 2) if ratings else 0.0,
+            "rating_count": len(ratings),
+            "rating_sum": rating_sum,
+            "rating_histogram": histogram,
+            "role": "admin" if index < ADMIN_COUNT else "user",
+            "ratings": ratings,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+    def swap(self, index: int, user_count: int) -> dict:
+        rng = self.rng
+        requester = rng.randrange(ADMIN_COUNT, user_count)
+        receiver = rng.randrange(ADMIN_COUNT, user_count - 1)
+        if receiver >= requester:
+            receiver += 1
+        status = rng.choices(SWAP_STATUSES, weights=SWAP_STATUS_WEIGHTS)[0]
+        created = self.created_at()
+        swap = {
+            "_id": object_id_for(2, index, created),
+            "requester_id": clerk_id_for(requester),
+            "receiver_id": clerk_id_for(receiver),
+            "requester_message": "Would you like to swap skills?",
+            "status": status,
+            "requester_feedback": None,
+            "requester_rating": None,
+            "receiver_feedback": None,
+            "receiver_rating": None,
+            "created_at": created,
+            "updated_at": created,
+        }
+        # Half of the accepted swaps already have feedback from both sides
+        if status == "accepted" and rng.random() < 0.5:
+            swap["requester_feedback"] = swap["receiver_feedback"] = "Great swap"
+            swap["requester_rating"] = rng.choices(RATING_STARS, weights=RATING_WEIGHTS)[0]
+            swap["receiver_rating"] = rng.choices(RATING_STARS, weights=RATING_WEIGHTS)[0]
+            swap["updated_at"] = created + timedelta(days=rng.randrange(1, 30))
+        return swap
+
+def batches(make, total: int, batch_size: int) -> Iterator[List[dict]]:
+    for start in range(0, total, batch_size):
+        yield [make(i) for i in range(start, min(start + batch_size, total))]
+
+async def insert_batches(collection, docs: Iterator[List[dict]], total: int, parallel: int):
+    """Unordered insert_many per batch, keeping up to `parallel` batches in flight."""
+    in_flight = set()
+    inserted = 0
+    started = time.perf_counter()
+    for batch in docs:
+        if len(in_flight) >= parallel:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            inserted += sum(task.result() for task in done)
+        in_flight.add(asyncio.ensure_future(_insert(collection, batch)))
+    for task in asyncio.as_completed(in_flight):
+        inserted += await task
+    elapsed = time.perf_counter() - started
+    print(f"{collection.name}: inserted {inserted}/{total} in {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):.0f} docs/s)")
+
+async def _insert(collection, batch: List[dict]) -> int:
+    result = await collection.insert_many(batch, ordered=False)
+    return len(result.inserted_ids)
+
+async def seed(mongodb_url: str, database_name: str, users: int, swaps: int, seed_value: int,
+               batch_size: int, parallel: int, drop: bool):
+    if users <= ADMIN_COUNT + 1:
+        raise SystemExit(f"--users must be greater than {ADMIN_COUNT + 1}")
+    client = AsyncIOMotorClient(mongodb_url)
+    database = client[database_name]
+    try:
+        if drop:
+            await client.drop_database(database_name)
+            print(f"Dropped {database_name}.")
+        generator = Generator(seed_value)
+        await insert_batches(database["users"], batches(generator.user, users, batch_size), users, parallel)
+        await insert_batches(
+            database["swaps"], batches(lambda i: generator.swap(i, users), swaps, batch_size), swaps, parallel
+        )
+        await ensure_indexes(database)
+        await database["loadtest_meta"].replace_one(
+            {"_id": "dataset"},
+            {"users": users, "swaps": swaps, "seed": seed_value, "seeded_at": datetime.utcnow()},
+            upsert=True
+        )
+        print(f"Seeded {database_name}: {users} users, {swaps} swaps (seed {seed_value}).")
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default=settings.MONGODB_URL)
+    parser.add_argument("--database", default=DEFAULT_DATABASE)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--swaps", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--parallel", type=int, default=4, help="insert_many batches in flight")
+    parser.add_argument("--drop", action="store_true", help="drop the database first")
+    args = parser.parse_args()
+    asyncio.run(seed(args.mongodb_url, args.database, args.users, args.swaps, args.seed,
+                     args.batch_size, args.parallel, args.drop))
+
+if __name__ == "__main__":
+    main()
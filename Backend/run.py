@@ -1,11 +1,62 @@
+"""
+Start the API server.
+
+    python run.py           development: one process, auto-reload on code changes
+    python run.py --prod    production: WEB_CONCURRENCY workers, uvloop/httptools
+                            when installed, no reload
+
+On SIGTERM each worker stops accepting connections, finishes in-flight
+requests (up to SERVER_GRACEFUL_SHUTDOWN_SECONDS) and then runs the app's
+shutdown handler, which closes its MongoDB client.
+"""
+import argparse
+import importlib.util
 import uvicorn
-from app.main import app
+from app.config import settings
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def production_options(workers: int) -> dict:
+    """uvicorn.run() keyword arguments for a production launch."""
+    return {
+        "host": settings.HOST,
+        "port": settings.PORT,
+        "workers": workers,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "timeout_keep_alive": settings.SERVER_KEEP_ALIVE_SECONDS,
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.FORWARDED_ALLOW_IPS,
+        "log_level": "info",
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prod", action="store_true", help="multi-worker production server without reload")
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY,
+                        help="worker processes in --prod mode (default: WEB_CONCURRENCY or the CPU count)")
+    args = parser.parse_args()
+
+    if args.prod:
+        options = production_options(max(1, args.workers))
+        print(
+            f"Starting {options['workers']} workers on {options['host']}:{options['port']} "
+            f"(loop={options['loop']}, http={options['http']}, keep-alive={options['timeout_keep_alive']}s, "
+            f"backlog={options['backlog']}, graceful shutdown={options['timeout_graceful_shutdown']}s)"
+        )
+        uvicorn.run("app.main:app", **options)
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=True,
+            forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+            log_level="info"
+        )
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    ) 
\ No newline at end of file
+    main()
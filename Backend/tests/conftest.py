@@ -0,0 +1,12 @@
+import os
+import sys
+import pytest
+
+# Make the app package importable when pytest is run from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def mock_db():
+    """In-memory database from mongomock-motor; tests using it are skipped when it isn't installed."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    return mongomock_motor.AsyncMongoMockClient()["tests"]
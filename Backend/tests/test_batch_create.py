@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.controllers import user_controller
+from app.controllers.user_controller import UserController
+from app.schemas.user_schema import UserCreate
+
+class Users:
+    """users collection whose insert_many fails the given positions of what it is sent."""
+
+    def __init__(self, write_errors=()):
+        self.write_errors = list(write_errors)
+        self.inserted = []
+
+    async def insert_many(self, docs, ordered=True):
+        failed = {error["index"] for error in self.write_errors}
+        self.inserted = [doc for index, doc in enumerate(docs) if index not in failed]
+        self.sent = docs
+        if self.write_errors:
+            raise BulkWriteError({"writeErrors": self.write_errors, "nInserted": len(self.inserted)})
+
+@pytest.fixture
+def controller(monkeypatch):
+    created = []
+
+    async def record_users_created(count=1):
+        created.append(count)
+
+    async def index_new_user(user):
+        pass
+
+    monkeypatch.setattr(user_controller, "record_users_created", record_users_created)
+    monkeypatch.setattr(UserController, "_index_new_user", staticmethod(index_new_user))
+    controller = UserController()
+    controller.recorded = created
+    return controller
+
+def new_user(n, email=None, clerk_id=None):
+    return UserCreate(
+        username=f"user{n}", fullname=f"User {n}",
+        email=email or f"user{n}@example.com", clerk_id=clerk_id or f"clerk_{n}"
+    )
+
+def create(controller, monkeypatch, users, collection):
+    monkeypatch.setattr(user_controller, "get_collection", lambda name: collection)
+    return asyncio.run(controller.batch_create_users(users))
+
+def test_partial_failure_reports_each_item(controller, monkeypatch):
+    # Positions in what is sent: batch items 3 and 4 are dropped before the insert
+    collection = Users(write_errors=[
+        {"index": 1, "code": 11000, "keyValue": {"email": "taken@example.com"}, "errmsg": "E11000"},
+        {"index": 2, "code": 121, "errmsg": "Document failed validation"},
+    ])
+    users = [
+        new_user(0),
+        new_user(1, email="taken@example.com"),
+        new_user(2),
+        new_user(3, clerk_id="clerk_0"),
+        new_user(4, email="user2@example.com"),
+        new_user(5),
+    ]
+    result = create(controller, monkeypatch, users, collection)
+
+    assert [doc["clerk_id"] for doc in collection.sent] == ["clerk_0", "clerk_1", "clerk_2", "clerk_5"]
+    assert [(r["index"], r["status"]) for r in result["results"]] == [
+        (0, "created"), (1, "duplicate"), (2, "error"), (3, "duplicate"), (4, "duplicate"), (5, "created")
+    ]
+    assert (result["created"], result["duplicates"], result["failed"]) == (2, 3, 1)
+    assert result["results"][1]["error"] == "User with this email already exists"
+    assert result["results"][2]["error"] == "Document failed validation"
+    assert result["results"][3]["error"] == "User with this clerk_id appears earlier in the batch"
+    assert result["results"][4]["error"] == "User with this email appears earlier in the batch"
+    assert result["results"][5]["user"]["clerk_id"] == "clerk_5"
+    assert controller.recorded == [2]
+
+def test_repeat_of_both_fields(controller, monkeypatch):
+    collection = Users()
+    result = create(controller, monkeypatch, [new_user(0), new_user(0)], collection)
+    assert len(collection.sent) == 1
+    assert result["results"][1]["error"] == "User with this clerk_id and email appears earlier in the batch"
+
+def test_batch_size_limit(controller, monkeypatch):
+    monkeypatch.setattr(settings, "USER_BATCH_CREATE_MAX_SIZE", 1)
+    with pytest.raises(HTTPException) as raised:
+        create(controller, monkeypatch, [new_user(0), new_user(1)], Users())
+    assert raised.value.status_code == 400
+    assert create(controller, monkeypatch, [], Users())["results"] == []
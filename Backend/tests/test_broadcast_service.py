@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime
+import pytest
+from app.config import settings
+from app.services import broadcast_service
+from app.services.broadcast_service import deliver_broadcast
+
+class Inbox:
+    """Wraps the inbox collection to run a hook before each insert_many."""
+
+    def __init__(self, collection, before_insert):
+        self.collection = collection
+        self.before_insert = before_insert
+        self.inserts = 0
+
+    async def insert_many(self, entries, ordered=True):
+        self.inserts += 1
+        await self.before_insert(self.inserts)
+        return await self.collection.insert_many(entries, ordered=ordered)
+
+def deliver(db, monkeypatch, before_insert=None):
+    """Seed five users (one banned) and a queued broadcast, deliver it, return the broadcast and inbox."""
+    async def nothing(inserts):
+        pass
+
+    async def run():
+        await db.users.insert_many([{"clerk_id": f"u{i}", "is_banned": i == 3} for i in range(5)])
+        broadcast_id = (await db.broadcasts.insert_one({
+            "title": "Hello", "message": "Hi all", "status": "queued",
+            "delivered": 0, "created_at": datetime.utcnow()
+        })).inserted_id
+        db.broadcast_id = broadcast_id
+        await deliver_broadcast(broadcast_id)
+        broadcast = await db.broadcasts.find_one({"_id": broadcast_id})
+        inbox = sorted(entry["clerk_id"] for entry in await db.inbox.find({}).to_list(length=None))
+        return broadcast, inbox
+
+    inbox = Inbox(db.inbox, before_insert or nothing)
+    collections = {"inbox": inbox}
+    monkeypatch.setattr(broadcast_service, "get_collection", lambda name: collections.get(name) or db[name])
+    return asyncio.run(run())
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "BROADCAST_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "BROADCAST_CHUNK_PAUSE_SECONDS", 0)
+
+def test_delivers_to_every_non_banned_user(mock_db, monkeypatch):
+    broadcast, inbox = deliver(mock_db, monkeypatch)
+    assert inbox == ["u0", "u1", "u2", "u4"]
+    assert broadcast["status"] == "delivered"
+    assert broadcast["delivered"] == broadcast["total_recipients"] == 4
+    assert "lease_until" not in broadcast and "lease_owner" not in broadcast
+
+def test_stops_without_writing_after_losing_the_lease(mock_db, monkeypatch):
+    async def take_over(inserts):
+        if inserts == 2:
+            # Lease expired mid-delivery and another worker claimed it
+            await mock_db.broadcasts.update_one({"_id": mock_db.broadcast_id}, {"$set": {"lease_owner": "other"}})
+
+    broadcast, inbox = deliver(mock_db, monkeypatch, take_over)
+    # The first chunk's progress landed; nothing after the takeover did
+    assert broadcast["lease_owner"] == "other"
+    assert broadcast["status"] == "delivering"
+    assert broadcast["delivered"] == 2
+    assert inbox == ["u0", "u1", "u2", "u4"]
+
+def test_error_marks_the_broadcast_failed(mock_db, monkeypatch):
+    async def fail(inserts):
+        raise RuntimeError("inbox unavailable")
+
+    broadcast, inbox = deliver(mock_db, monkeypatch, fail)
+    assert inbox == []
+    assert broadcast["status"] == "failed"
+    assert broadcast["error"] == "inbox unavailable"
+    assert "lease_until" not in broadcast and "lease_owner" not in broadcast
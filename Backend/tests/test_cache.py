@@ -0,0 +1,71 @@
+import asyncio
+from app.controllers import admin_controller
+from app.utils import cache as cache_module
+from app.utils import auth
+from app.utils.cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock.monotonic)
+    cache = TTLCache(maxsize=10, ttl=30, negative_ttl=5)
+    cache.set("admin", True)
+    cache.set("user", False)
+
+    clock.now += 6
+    assert cache.get("admin") == (True, True)
+    assert cache.get("user") == (False, None)
+
+    clock.now += 25
+    assert cache.get("admin") == (False, None)
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+class InvalidatingUsers:
+    """users collection whose lookup overlaps an invalidation of the same user."""
+
+    def __init__(self, on_query):
+        self.on_query = on_query
+        self.queries = 0
+
+    async def find_one(self, query, projection=None):
+        self.queries += 1
+        await self.on_query()
+        return {"clerk_id": query["clerk_id"], "role": "admin"}
+
+def test_admin_role_skips_a_lookup_that_overlapped_an_invalidation(monkeypatch):
+    async def invalidate():
+        auth.invalidate_admin_role("u1")
+
+    async def run():
+        users = InvalidatingUsers(invalidate)
+        monkeypatch.setattr(admin_controller, "get_collection", lambda name: users)
+
+        assert await admin_controller.AdminController()._load_is_admin("u1") is True
+        assert auth.admin_role_cache.get("u1") == (False, None)
+
+    asyncio.run(run())
+
+def test_admin_role_caches_a_current_lookup():
+    generation = auth.admin_role_generation()
+    auth.cache_admin_role("u2", True, generation)
+    assert auth.admin_role_cache.get("u2") == (True, True)
+    auth.invalidate_admin_role("u2")
+    assert auth.admin_role_cache.get("u2") == (False, None)
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime
+from app.controllers import swap_controller
+from app.controllers.swap_controller import SwapController
+from app.services import user_cache as user_cache_module
+from app.services.user_cache import user_cache
+from app.utils.etag import etag_matches, weak_etag
+
+def test_weak_etag_includes_count_for_lists():
+    moment = datetime(2024, 1, 2, 3, 4, 5, 6)
+    assert weak_etag(moment) == 'W/"20240102030405000006"'
+    assert weak_etag(moment, 3) == 'W/"20240102030405000006-3"'
+    assert weak_etag(None) == 'W/"0"'
+
+def test_etag_matches_uses_weak_comparison():
+    etag = weak_etag(datetime(2024, 1, 1))
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag[2:], etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches("*", etag)
+
+def test_etag_mismatch_or_missing():
+    etag = weak_etag(datetime(2024, 1, 1))
+    assert not etag_matches('W/"other"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches(etag, None)
+
+def test_swap_list_etag_follows_participant_profiles(mock_db, monkeypatch):
+    monkeypatch.setattr(swap_controller, "get_collection", lambda name: mock_db[name])
+    monkeypatch.setattr(user_cache_module, "get_collection", lambda name: mock_db[name])
+
+    async def run():
+        await mock_db.users.insert_many([
+            {"clerk_id": "etag_a", "fullname": "A", "updated_at": datetime(2024, 1, 1)},
+            {"clerk_id": "etag_b", "fullname": "B", "updated_at": datetime(2024, 1, 1)},
+        ])
+        await mock_db.swaps.insert_one({
+            "requester_id": "etag_a", "receiver_id": "etag_b", "status": "pending",
+            "created_at": datetime(2024, 2, 1), "updated_at": datetime(2024, 2, 1)
+        })
+        controller = SwapController()
+        before = await controller.get_user_swaps_etag("etag_a")
+
+        # The other participant renames themselves after the swap's last change
+        await mock_db.users.update_one(
+            {"clerk_id": "etag_b"}, {"$set": {"fullname": "Bee", "updated_at": datetime(2024, 3, 1)}}
+        )
+        await user_cache.invalidate("etag_b")
+        after = await controller.get_user_swaps_etag("etag_a")
+        empty = await controller.get_user_swaps_etag("etag_nobody")
+        return before, after, empty
+
+    before, after, empty = asyncio.run(run())
+    assert before == weak_etag(datetime(2024, 2, 1), 1)
+    assert after == weak_etag(datetime(2024, 3, 1), 1)
+    assert empty == weak_etag(None, 0)
@@ -0,0 +1,73 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from app.controllers.admin_controller import AdminController
+from app.utils.export import MAX_EXPORT_BATCH_SIZE, stream_documents
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+_ID = ObjectId()
+_CREATED = datetime(2024, 5, 1, 12, 30)
+DOCS = [
+    {"_id": _ID, "name": "Ada", "skills_offered": ["python", "sql"], "created_at": _CREATED,
+     "availability": {"weekends": True}},
+    {"_id": ObjectId(), "name": "Bo, Jr.", "skills_offered": [], "created_at": None},
+    {"_id": ObjectId(), "name": "Cy"},
+]
+FIELDS = ["_id", "name", "skills_offered", "created_at", "availability"]
+
+def collect(docs, fmt, batch_size):
+    async def run():
+        return [chunk async for chunk in stream_documents(FakeCursor(docs), FIELDS, fmt, batch_size)]
+    return asyncio.run(run())
+
+def test_csv():
+    chunks = collect(DOCS, "csv", 100)
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == FIELDS
+    assert rows[1] == [str(_ID), "Ada", "python;sql", _CREATED.isoformat(), '{"weekends": true}']
+    # Quoting survives commas; missing and None fields are empty
+    assert rows[2][1:] == ["Bo, Jr.", "", "", ""]
+    assert rows[3][1:] == ["Cy", "", "", ""]
+    assert len(rows) == 4
+
+def test_ndjson():
+    chunks = collect(DOCS, "ndjson", 100)
+    lines = b"".join(chunks).decode().splitlines()
+    assert len(lines) == 3
+    first = json.loads(lines[0])
+    assert first == {"_id": str(_ID), "name": "Ada", "skills_offered": ["python", "sql"],
+                     "created_at": _CREATED.isoformat(), "availability": {"weekends": True}}
+    assert json.loads(lines[2])["created_at"] is None
+
+def test_one_chunk_per_batch():
+    assert len(collect(DOCS, "ndjson", 1)) == 3
+    assert len(collect(DOCS, "ndjson", 2)) == 2
+    # The CSV header goes out with the first batch
+    chunks = collect(DOCS, "csv", 2)
+    assert len(chunks) == 2
+    assert chunks[0].decode().splitlines()[0] == ",".join(FIELDS)
+
+def test_empty_cursor():
+    assert collect([], "ndjson", 10) == []
+    assert b"".join(collect([], "csv", 10)).decode().strip() == ",".join(FIELDS)
+
+def test_unsupported_format_is_a_400():
+    with pytest.raises(HTTPException) as raised:
+        AdminController._export_batch_size("xml", None)
+    assert raised.value.status_code == 400
+    assert AdminController._export_batch_size("csv", 10 ** 9) == MAX_EXPORT_BATCH_SIZE
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import io
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+from app.config import settings
+from app.services import image_service
+from app.services.image_service import hash_upload, store_profile_image
+
+class ChunkCountingFile(io.BytesIO):
+    """Records the size of every read()."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+@pytest.fixture(autouse=True)
+def small_limits(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 4)
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 10)
+
+def upload(data: bytes, size=None) -> UploadFile:
+    return UploadFile(ChunkCountingFile(data), size=size)
+
+def test_hash_upload_reads_in_chunks():
+    file = upload(b"0123456789")
+    assert asyncio.run(hash_upload(file)) == (hashlib.sha256(b"0123456789").hexdigest(), 10)
+    assert set(file.file.reads) == {4}
+
+@pytest.mark.parametrize("size", [None, 11])
+def test_hash_upload_rejects_large_files(size):
+    # Without a declared size the limit is enforced while reading
+    file = upload(b"x" * 11, size=size)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(hash_upload(file))
+    assert raised.value.status_code == 413
+    # Stops at the chunk that crosses the limit (before any read when the size is declared)
+    assert len(file.file.reads) == (3 if size is None else 0)
+
+def test_repeat_upload_is_not_read_whole(monkeypatch):
+    async def find_uploaded(digest):
+        return {"url": "https://cdn/known", "public_id": "known"}
+
+    async def store(processed, key):
+        raise AssertionError("a known upload must not be stored again")
+
+    monkeypatch.setattr(image_service, "find_uploaded", find_uploaded)
+    file = upload(b"abcdef")
+    assert asyncio.run(store_profile_image(file, store)) == {"url": "https://cdn/known", "public_id": "known"}
+    assert -1 not in file.file.reads
+
+def test_new_upload_is_processed_and_stored(monkeypatch):
+    stored = {}
+
+    async def find_uploaded(digest):
+        return None
+
+    async def preprocess_image(data):
+        return data.upper(), "image/webp"
+
+    async def remember_upload(digest, url, public_id):
+        stored["remembered"] = (digest, url)
+
+    async def store(processed, key):
+        stored["bytes"] = processed
+        return {"url": f"https://cdn/{key}", "public_id": key}
+
+    monkeypatch.setattr(image_service, "find_uploaded", find_uploaded)
+    monkeypatch.setattr(image_service, "preprocess_image", preprocess_image)
+    monkeypatch.setattr(image_service, "remember_upload", remember_upload)
+    result = asyncio.run(store_profile_image(upload(b"abcdef"), store))
+    assert stored["bytes"] == b"ABCDEF"
+    assert stored["remembered"] == (hashlib.sha256(b"abcdef").hexdigest(), result["url"])
+
+def test_empty_upload_is_a_400():
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(store_profile_image(upload(b""), None))
+    assert raised.value.status_code == 400
@@ -0,0 +1,19 @@
+from benchmarks.bench_import_time import LAZY_MODULES, eager_imports, load_baseline, startup_ratio
+
+def test_no_optional_integration_imported_at_startup():
+    """import app.main loads none of the integrations that are only needed on first use"""
+    eager = eager_imports()
+    assert not eager, f"imported at startup: {', '.join(eager)} (expected lazy: {', '.join(LAZY_MODULES)})"
+
+# Twice the recorded ratio: loose enough for noisy machines, tight enough
+# to catch a heavy dependency imported at startup
+STARTUP_BUDGET_FACTOR = 2.0
+
+def test_startup_within_budget():
+    """import app.main stays within a generous multiple of the baseline startup ratio"""
+    app_ms, bare_ms, ratio = startup_ratio(repeat=3)
+    limit = load_baseline()["startup_ratio"] * STARTUP_BUDGET_FACTOR
+    assert ratio <= limit, (
+        f"import app.main took {app_ms:.0f} ms, {ratio:.1f}x a bare interpreter ({bare_ms:.0f} ms); "
+        f"the budget is {limit:.1f}x"
+    )
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError
+from app.services import index_refresh
+from app.services.index_refresh import keep_indexes_fresh, refresh_indexes
+
+class FakeIndex:
+    PROJECTION = {"skills_offered": 1}
+
+    def __init__(self):
+        self.upserted = []
+
+    def upsert(self, user):
+        self.upserted.append(user["clerk_id"])
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+class FakeCollection:
+    """Records the updated_at lower bound of each find(); fails the passes listed in `fail`."""
+
+    def __init__(self, docs, fail=()):
+        self.docs = docs
+        self.fail = set(fail)
+        self.since = []
+
+    def find(self, query, projection):
+        since = query["updated_at"]["$gte"]
+        self.since.append(since)
+        if len(self.since) in self.fail:
+            raise PyMongoError("unavailable")
+        return FakeCursor([d for d in self.docs if d["updated_at"] >= since])
+
+def test_refresh_indexes_upserts_changed_users():
+    now = datetime.utcnow()
+    collection = FakeCollection([
+        {"clerk_id": "old", "updated_at": now - timedelta(hours=1)},
+        {"clerk_id": "new", "updated_at": now},
+    ])
+    first, second = FakeIndex(), FakeIndex()
+    count = asyncio.run(refresh_indexes(collection, [first, second], now - timedelta(minutes=1)))
+    assert count == 1
+    assert first.upserted == second.upserted == ["new"]
+
+def run_passes(collection, passes, since):
+    """Run keep_indexes_fresh until it has queried `passes` times."""
+    async def run():
+        task = asyncio.create_task(keep_indexes_fresh(collection, [FakeIndex()], 0, since))
+        while len(collection.since) < passes:
+            await asyncio.sleep(0)
+        task.cancel()
+    asyncio.run(run())
+
+def test_watermark_advances_to_the_start_of_each_pass():
+    since = datetime.utcnow() - timedelta(hours=1)
+    collection = FakeCollection([])
+    before = datetime.utcnow()
+    run_passes(collection, 3, since)
+    assert collection.since[0] == since - index_refresh._CLOCK_SKEW
+    # Later passes re-read from just before the previous pass started
+    for watermark in collection.since[1:]:
+        assert watermark >= before - index_refresh._CLOCK_SKEW
+        assert watermark <= datetime.utcnow() - index_refresh._CLOCK_SKEW
+    assert collection.since == sorted(collection.since)
+
+def test_watermark_kept_after_a_failed_pass():
+    since = datetime.utcnow() - timedelta(hours=1)
+    collection = FakeCollection([], fail={1})
+    run_passes(collection, 2, since)
+    assert collection.since[0] == collection.since[1] == since - index_refresh._CLOCK_SKEW
@@ -0,0 +1,17 @@
+import asyncio
+import pytest
+from app.database.indexes import ensure_indexes
+
+def test_ensure_indexes_on_clean_database(mock_db):
+    assert asyncio.run(ensure_indexes(mock_db)) == []
+
+def test_unique_index_failure_stops_startup(mock_db):
+    async def run():
+        await mock_db.users.insert_many([
+            {"clerk_id": "same", "email": "a@example.com"},
+            {"clerk_id": "same", "email": "b@example.com"},
+        ])
+        await ensure_indexes(mock_db)
+
+    with pytest.raises(RuntimeError, match="users.clerk_id_unique"):
+        asyncio.run(run())
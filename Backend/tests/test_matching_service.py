@@ -0,0 +1,68 @@
+from app.services.matching_service import SkillMatchIndex, normalize_skills
+
+def user(clerk_id, offered, wanted, **extra):
+    return {"clerk_id": clerk_id, "skills_offered": offered, "skills_wanted": wanted, **extra}
+
+def build(*users):
+    index = SkillMatchIndex()
+    for u in users:
+        index.upsert(u)
+    return index
+
+def test_normalize_skills():
+    assert normalize_skills(["  Web  Design", "PYTHON", "", "python"]) == {"web design", "python"}
+
+def test_matches_require_both_directions():
+    index = build(
+        user("me", ["python"], ["guitar"]),
+        user("both", ["guitar"], ["python"]),
+        user("gives_only", ["guitar"], ["cooking"]),
+        user("takes_only", ["cooking"], ["python"]),
+    )
+    assert index.matches("me", limit=10) == [("both", 1, 1)]
+
+def test_matches_scoring_order():
+    index = build(
+        user("me", ["python", "sql", "go"], ["guitar", "piano", "drums"]),
+        user("one_each", ["guitar"], ["python"]),
+        user("lopsided", ["guitar", "piano", "drums"], ["python"]),
+        user("balanced", ["guitar", "piano"], ["python", "sql"]),
+        user("b_tie", ["guitar", "piano"], ["python", "sql"]),
+    )
+    # Total overlap first, then the more balanced pair, then clerk_id
+    assert [m[0] for m in index.matches("me", limit=10)] == ["b_tie", "balanced", "lopsided", "one_each"]
+    assert index.matches("me", limit=2, offset=1) == [("balanced", 2, 2), ("lopsided", 3, 1)]
+
+def test_matches_unknown_user():
+    assert build().matches("nobody", limit=10) is None
+
+def test_upsert_replaces_skills():
+    index = build(user("me", ["python"], ["guitar"]), user("other", ["guitar"], ["python"]))
+    index.upsert(user("other", ["cooking"], ["python"]))
+    assert index.matches("me", limit=10) == []
+    assert "guitar" not in index.offered
+    index.upsert(user("other", ["Guitar "], ["python"]))
+    assert index.matches("me", limit=10) == [("other", 1, 1)]
+
+def test_remove():
+    index = build(user("me", ["python"], ["guitar"]), user("other", ["guitar"], ["python"]))
+    index.remove("other")
+    assert index.matches("me", limit=10) == []
+    assert len(index) == 1
+    assert "guitar" not in index.offered and "python" not in index.wanted
+
+def test_banned_and_private_users_leave_postings():
+    index = build(user("me", ["python"], ["guitar"]), user("other", ["guitar"], ["python"]))
+    index.upsert(user("other", ["guitar"], ["python"], is_banned=True))
+    assert index.matches("me", limit=10) == []
+    index.upsert(user("other", ["guitar"], ["python"], is_public=False))
+    assert index.matches("me", limit=10) == []
+    # Still tracked, so they can look up their own matches
+    assert index.matches("other", limit=10) == [("me", 1, 1)]
+    index.upsert(user("other", ["guitar"], ["python"], is_public=True))
+    assert index.matches("me", limit=10) == [("other", 1, 1)]
+
+def test_overlap():
+    index = build(user("me", ["python", "sql"], ["guitar"]), user("other", ["guitar", "go"], ["sql"]))
+    assert index.overlap("me", "other") == (["guitar"], ["sql"])
+    assert index.overlap("me", "nobody") == ([], [])
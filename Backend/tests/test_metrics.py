@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.utils.metrics import Counter, Histogram, MetricsMiddleware, UNMATCHED_ROUTE, render_metrics
+
+def test_counter_output():
+    counter = Counter("jobs_total", "Jobs by kind.", ["kind"])
+    counter.inc(("b",))
+    counter.inc(("a",), 2)
+    counter.inc(("b",), 0.5)
+    assert counter.render() == [
+        "# HELP jobs_total Jobs by kind.",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="a"} 2',
+        'jobs_total{kind="b"} 1.5',
+    ]
+
+def test_label_values_are_escaped():
+    counter = Counter("odd_total", "Odd labels.", ["value"])
+    counter.inc(('say "hi"\\\n',))
+    assert counter.render()[-1] == 'odd_total{value="say \\"hi\\"\\\\\\n"} 1'
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("/a",), value)
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+
+    @app.get("/metrics-test/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+    client.get("/metrics-test/1")
+    client.get("/metrics-test/2")
+    client.get("/metrics-test-missing/3")
+
+    output = render_metrics()
+    assert output.endswith("\n")
+    assert 'http_requests_total{method="GET",route="/metrics-test/{item_id}",status="200"} 2' in output
+    assert f'http_requests_total{{method="GET",route="{UNMATCHED_ROUTE}",status="404"}}' in output
+    assert 'http_request_duration_seconds_count{method="GET",route="/metrics-test/{item_id}"} 2' in output
+    assert "/metrics-test/1" not in output
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from app.utils.pagination import MAX_PAGE_LIMIT, clamp_limit, decode_cursor, encode_cursor, fetch_page
+
+def test_cursor_round_trip():
+    created_at, _id = datetime(2024, 5, 6, 7, 8, 9, 123456), ObjectId()
+    assert decode_cursor(encode_cursor(created_at, _id)) == (created_at, _id)
+    assert decode_cursor(encode_cursor(None, _id)) == (None, _id)
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", "eyJ0IjogMX0"])
+def test_invalid_cursor_is_a_400(token):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(token)
+    assert raised.value.status_code == 400
+
+def test_clamp_limit():
+    assert clamp_limit(None) == 50
+    assert clamp_limit(0) == 50
+    assert clamp_limit(10) == 10
+    assert clamp_limit(10_000) == MAX_PAGE_LIMIT
+
+def _walk(collection, limit):
+    async def run():
+        ids, cursor = [], None
+        while True:
+            docs, cursor = await fetch_page(collection, {}, cursor, limit)
+            ids.extend(doc["_id"] for doc in docs)
+            if cursor is None:
+                return ids
+    return asyncio.run(run())
+
+def test_pages_cover_every_document_once(mock_db):
+    start = datetime(2024, 1, 1)
+    # Two documents share each created_at, so _id has to break the ties
+    docs = [{"_id": ObjectId(), "created_at": start + timedelta(minutes=n // 2)} for n in range(7)]
+    asyncio.run(mock_db.items.insert_many(docs))
+    expected = [doc["_id"] for doc in sorted(docs, key=lambda d: (d["created_at"], d["_id"]), reverse=True)]
+
+    for limit in (1, 2, 3, 7, 8):
+        assert _walk(mock_db.items, limit) == expected
+
+def test_legacy_rows_without_created_at_come_last(mock_db):
+    dated = [{"_id": ObjectId(), "created_at": datetime(2024, 1, 1 + n)} for n in range(3)]
+    legacy = [{"_id": ObjectId()} for _ in range(3)]
+    asyncio.run(mock_db.items.insert_many(dated + legacy))
+    expected = [doc["_id"] for doc in reversed(dated)] + sorted((doc["_id"] for doc in legacy), reverse=True)
+
+    for limit in (1, 2, 4):
+        assert _walk(mock_db.items, limit) == expected
+
+def test_no_cursor_or_limit_returns_everything(mock_db):
+    asyncio.run(mock_db.items.insert_many([{"created_at": datetime(2024, 1, 1)} for _ in range(120)]))
+    docs, cursor = asyncio.run(fetch_page(mock_db.items, {}, None, None))
+    assert len(docs) == 120 and cursor is None
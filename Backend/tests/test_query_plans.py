@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.database.indexes import ensure_indexes, verify_query_plans
+
+def test_query_plans():
+    """Every controller query must be served by an index (requires a running MongoDB)"""
+    async def run():
+        try:
+            client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=2000)
+            await client.admin.command("ping")
+        except Exception:
+            pytest.skip("MongoDB is not available")
+        try:
+            database = client[f"{settings.DATABASE_NAME}_query_plans"]
+            try:
+                assert await ensure_indexes(database) == []
+                await verify_query_plans(database)
+            finally:
+                await client.drop_database(database.name)
+        finally:
+            client.close()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_query_plans()
@@ -0,0 +1,99 @@
+import asyncio
+from app.utils import rate_limit
+from app.utils.rate_limit import RateLimiter, TokenBuckets, _client_address, _identity, trusted_proxies
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+def test_bucket_allows_a_burst_then_refills(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    buckets = TokenBuckets(maxsize=10)
+
+    assert [buckets.take("ip:1", 2.0, 3)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, wait = buckets.take("ip:1", 2.0, 3)
+    assert not allowed and wait == 0.5
+
+    clock.now += 0.5
+    assert buckets.take("ip:1", 2.0, 3) == (True, 0.0)
+    assert not buckets.take("ip:1", 2.0, 3)[0]
+
+    # Refill is capped at the burst size
+    clock.now += 60
+    assert [buckets.take("ip:1", 2.0, 3)[0] for _ in range(4)] == [True, True, True, False]
+
+def test_least_recently_used_bucket_is_evicted():
+    buckets = TokenBuckets(maxsize=2)
+    buckets.take("a", 1.0, 1)
+    buckets.take("b", 1.0, 1)
+    buckets.take("a", 1.0, 1)
+    buckets.take("c", 1.0, 1)
+
+    assert len(buckets) == 2
+    # "b" was dropped, so it starts again with a full bucket
+    assert buckets.take("b", 1.0, 1)[0]
+    assert not buckets.take("c", 1.0, 1)[0]
+
+def test_a_rejected_request_takes_no_tokens(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    buckets = TokenBuckets(maxsize=10)
+    buckets.take("route", 1.0, 1)
+
+    allowed, wait = buckets.take_all([("default", 1.0, 2), ("route", 1.0, 1)])
+    assert not allowed and wait == 1.0
+    # The default bucket still has both tokens
+    assert [buckets.take("default", 1.0, 2)[0] for _ in range(3)] == [True, True, False]
+
+def _scope(user_id=None, client="10.0.0.1", forwarded_for=None):
+    headers = [(b"x-clerk-user-id", user_id.encode())] if user_id else []
+    if forwarded_for:
+        headers.append((b"x-forwarded-for", forwarded_for.encode()))
+    return {"headers": headers, "client": (client, 5000)}
+
+def test_user_bucket_is_used_and_address_only_for_anonymous_requests():
+    trusted = trusted_proxies("127.0.0.1")
+    assert _identity(_scope("user_1"), trusted) == "user:user_1"
+    assert _identity(_scope(), trusted) == "ip:10.0.0.1"
+    assert _identity({"headers": []}, trusted) == "ip:unknown"
+
+def test_forwarded_for_is_only_read_from_trusted_proxies():
+    trusted = trusted_proxies("10.0.0.1, 10.0.0.2")
+    # A direct client can't pick its own address
+    assert _client_address(_scope(client="203.0.113.9", forwarded_for="1.2.3.4"), trusted) == "203.0.113.9"
+    # Behind the proxies, the right-most address they didn't add is the client
+    assert _client_address(_scope(forwarded_for="1.2.3.4, 198.51.100.7, 10.0.0.2"), trusted) == "198.51.100.7"
+    assert _client_address(_scope(), trusted) == "10.0.0.1"
+    assert _client_address(_scope(client="203.0.113.9", forwarded_for="1.2.3.4"), trusted_proxies("*")) == "1.2.3.4"
+
+def test_users_behind_one_proxy_get_their_own_buckets():
+    async def run():
+        limiter = RateLimiter(rate=0.001, burst=2, maxsize=100)
+        trusted = trusted_proxies("10.0.0.1")
+        results = [(await limiter.check(_identity(_scope(f"user_{n}"), trusted), "GET", "/users/c1"))[0] for n in range(3)]
+        assert results == [True, True, True]
+
+        anonymous = [
+            (await limiter.check(_identity(_scope(forwarded_for="198.51.100.7"), trusted), "GET", "/users/c1"))[0]
+            for _ in range(3)
+        ]
+        assert anonymous == [True, True, False]
+        # Another client behind the same proxy is unaffected
+        assert (await limiter.check(_identity(_scope(forwarded_for="198.51.100.8"), trusted), "GET", "/users/c1"))[0]
+
+    asyncio.run(run())
+
+def test_route_limit_rejection_leaves_the_default_bucket_alone():
+    async def run():
+        limiter = RateLimiter(rate=0.001, burst=10, maxsize=100)
+        results = [(await limiter.check("user:u1", "POST", "/swaps/request"))[0] for _ in range(7)]
+        assert results == [True] * 5 + [False] * 2
+        # Only the five accepted swap requests were charged to the default bucket
+        results = [(await limiter.check("user:u1", "GET", "/users/c1"))[0] for _ in range(6)]
+        assert results == [True] * 5 + [False]
+
+    asyncio.run(run())
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.services.rating_service import backfill_rating_aggregates, record_rating
+
+def with_users_collection(test):
+    """
+    Run test(users) against a scratch database (requires a running MongoDB:
+    the update pipelines use operators mongomock can't evaluate).
+    """
+    async def run():
+        try:
+            client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=2000)
+            await client.admin.command("ping")
+        except Exception:
+            pytest.skip("MongoDB is not available")
+        try:
+            database = client[f"{settings.DATABASE_NAME}_rating_service"]
+            try:
+                await test(database.users)
+            finally:
+                await client.drop_database(database.name)
+        finally:
+            client.close()
+
+    asyncio.run(run())
+
+def test_record_rating_maintains_aggregates():
+    async def test(users):
+        await users.insert_one({"clerk_id": "u1", "rating": 0.0})
+        user = await record_rating(users, {"clerk_id": "u1"}, {"rating": 4, "from_user_id": "a"})
+        user = await record_rating(users, {"clerk_id": "u1"}, {"rating": 5, "from_user_id": "b"})
+        assert user["rating_count"] == 2
+        assert user["rating_sum"] == 9
+        assert user["rating"] == 4.5
+        assert user["rating_histogram"] == {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1}
+        assert [r["rating"] for r in user["ratings"]] == [4, 5]
+
+    with_users_collection(test)
+
+def test_record_rating_seeds_aggregates_from_legacy_ratings():
+    async def test(users):
+        # Rated before the aggregates existed; one entry uses the old "score" key
+        await users.insert_one({"clerk_id": "u1", "rating": 3.0, "ratings": [{"rating": 2}, {"score": 4}]})
+        user = await record_rating(users, {"clerk_id": "u1"}, {"rating": 5, "from_user_id": "a"})
+        assert user["rating_count"] == 3
+        assert user["rating_sum"] == 11
+        assert user["rating"] == 3.67
+        assert user["rating_histogram"] == {"1": 0, "2": 1, "3": 0, "4": 1, "5": 1}
+
+    with_users_collection(test)
+
+def test_record_rating_no_match():
+    async def test(users):
+        assert await record_rating(users, {"clerk_id": "missing"}, {"rating": 5}) is None
+
+    with_users_collection(test)
+
+def test_backfill_recomputes_drifted_aggregates():
+    async def test(users):
+        await users.insert_many([
+            {"clerk_id": "u1", "rating": 1.0, "rating_count": 7, "rating_sum": 7,
+             "ratings": [{"rating": 5}, {"rating": 3}]},
+            {"clerk_id": "u2", "rating": 0.0},
+        ])
+        assert await backfill_rating_aggregates(users) == 2
+        u1 = await users.find_one({"clerk_id": "u1"})
+        assert (u1["rating_count"], u1["rating_sum"], u1["rating"]) == (2, 8, 4.0)
+        assert u1["rating_histogram"] == {"1": 0, "2": 0, "3": 1, "4": 0, "5": 1}
+        u2 = await users.find_one({"clerk_id": "u2"})
+        # No ratings: the count is zero and the stored average is left alone
+        assert (u2["rating_count"], u2["rating_sum"], u2["rating"]) == (0, 0, 0.0)
+
+    with_users_collection(test)
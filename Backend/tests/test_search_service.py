@@ -0,0 +1,61 @@
+from app.services.search_service import UserSearchIndex, tokenize, user_tokens
+
+def user(clerk_id, fullname, offered=(), **extra):
+    return {"clerk_id": clerk_id, "fullname": fullname, "username": clerk_id,
+            "skills_offered": list(offered), "skills_wanted": [], **extra}
+
+def build(*users):
+    index = UserSearchIndex()
+    for u in users:
+        index.upsert(u)
+    return index
+
+def ranked(index, query, limit=10):
+    return [clerk_id for clerk_id, _ in index.search(query, limit)]
+
+def test_tokens():
+    assert tokenize("Web-Design, PYTHON 3") == ["web", "design", "python", "3"]
+    assert user_tokens(user("u1", "Ada Lovelace", ["Python"], address="London")) == \
+        ["ada", "lovelace", "u1", "london", "python"]
+
+def test_scoring_order():
+    index = build(
+        user("u1", "Ada Lovelace", ["python"]),
+        user("u2", "Grace Hopper", ["python", "cobol"]),
+        user("u3", "Alan Turing", ["math"]),
+        user("u4", "Python Pete", ["python"]),
+    )
+    # More matching terms outrank fewer; a term repeated in the profile outranks a single mention
+    assert ranked(index, "python cobol")[0] == "u2"
+    assert ranked(index, "python")[0] == "u4"
+    assert set(ranked(index, "python")) == {"u1", "u2", "u4"}
+    # Rarer terms weigh more than common ones
+    assert ranked(index, "python turing")[0] == "u3"
+    assert ranked(index, "python", limit=1) == ["u4"]
+
+def test_typo_tolerance():
+    index = build(user("u1", "Ada Lovelace", ["guitar"]), user("u2", "Grace Hopper", ["painting"]))
+    assert ranked(index, "gitar") == ["u1"]
+    assert ranked(index, "lovelase") == ["u1"]
+    assert ranked(index, "zzzz") == []
+
+def test_exact_match_outranks_fuzzy_match():
+    index = build(user("u1", "Sam", ["guitars"]), user("u2", "Kim", ["guitar"]))
+    assert ranked(index, "guitar") == ["u2", "u1"]
+
+def test_private_banned_and_removed_users_are_not_found():
+    index = build(user("u1", "Ada Lovelace"), user("u2", "Ada Byron"))
+    index.upsert(user("u2", "Ada Byron", is_banned=True))
+    assert ranked(index, "ada") == ["u1"]
+    index.upsert(user("u1", "Ada Lovelace", is_public=False))
+    assert ranked(index, "ada") == []
+    index.upsert(user("u1", "Ada Lovelace"))
+    index.remove("u1")
+    assert ranked(index, "ada") == [] and len(index) == 0
+    assert not index.postings and not index.trigram_terms and index.total_length == 0
+
+def test_upsert_replaces_old_text():
+    index = build(user("u1", "Ada Lovelace"))
+    index.upsert(user("u1", "Ada King"))
+    assert ranked(index, "king") == ["u1"]
+    assert "lovelace" not in index.postings
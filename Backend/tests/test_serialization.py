@@ -0,0 +1,50 @@
+from datetime import datetime
+from bson import ObjectId
+from app.schemas.swap_schema import SwapOutWithNames
+from app.schemas.user_schema import UserOut
+from app.utils.serialization import compile_encoder
+
+def _pydantic_output(doc: dict) -> dict:
+    data = dict(doc, id=str(doc["_id"]))
+    user = UserOut(**data)
+    return user.model_dump() if hasattr(user, "model_dump") else user.dict()
+
+def _as_strings(out: dict) -> dict:
+    return {key: str(value) if key == "profile_url" and value is not None else value for key, value in out.items()}
+
+def test_encoder_matches_pydantic_for_urls():
+    encode = compile_encoder(UserOut)
+    for url in ["https://example.com", "https://example.com/", "https://example.com/a/b?x=1", None]:
+        doc = {
+            "_id": ObjectId(),
+            "username": "ada",
+            "fullname": "Ada Lovelace",
+            "email": "ada@example.com",
+            "clerk_id": "user_ada",
+            "profile_url": url,
+            "skills_offered": ["math"],
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": datetime(2024, 1, 2),
+        }
+        assert encode(doc) == _as_strings(_pydantic_output(doc)), url
+
+def test_encoder_passes_invalid_urls_through():
+    encode = compile_encoder(UserOut)
+    assert encode({"_id": ObjectId(), "profile_url": "not a url"})["profile_url"] == "not a url"
+
+def test_swap_encoder_matches_pydantic():
+    encode = compile_encoder(SwapOutWithNames)
+    doc = {
+        "_id": ObjectId(),
+        "requester_id": "user_a",
+        "receiver_id": "user_b",
+        "status": "accepted",
+        "receiver_rating": 4,
+        "created_at": datetime(2024, 1, 1),
+        "updated_at": datetime(2024, 1, 2),
+        "requester_name": "A",
+        "internal_note": "dropped",
+    }
+    swap = SwapOutWithNames(**dict(doc, id=str(doc["_id"])))
+    expected = swap.model_dump() if hasattr(swap, "model_dump") else swap.dict()
+    assert encode(doc) == expected
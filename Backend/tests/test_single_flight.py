@@ -0,0 +1,91 @@
+import asyncio
+from app.utils.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_load():
+    async def run():
+        flights = SingleFlight()
+        calls = []
+
+        async def load(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return {"value": value}
+
+        results = await asyncio.gather(*(flights.do(("user", "u1", "profile"), load, 1) for _ in range(5)))
+        assert calls == [1]
+        assert all(result is results[0] for result in results)
+        assert flights.stats()["executed"] == 1
+        assert flights.stats()["shared"] == 4
+        assert flights.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+def test_forget_starts_a_new_load_for_later_callers():
+    async def run():
+        flights = SingleFlight()
+        calls = []
+
+        async def load(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        before = asyncio.ensure_future(flights.do(("user", "u1", "profile"), load, "old"))
+        await asyncio.sleep(0)
+        flights.forget("user", "u1")
+        after = await flights.do(("user", "u1", "profile"), load, "new")
+        assert await before == "old"
+        assert after == "new"
+        assert calls == ["old", "new"]
+
+    asyncio.run(run())
+
+def test_forget_only_detaches_the_subject():
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def load(value):
+            await release.wait()
+            return value
+
+        first = asyncio.ensure_future(flights.do(("user", "u1", "profile"), load, 1))
+        other = asyncio.ensure_future(flights.do(("user", "u2", "profile"), load, 2))
+        await asyncio.sleep(0)
+        flights.forget("user", "u1")
+        assert flights.stats()["in_flight"] == 1
+        release.set()
+        assert await asyncio.gather(first, other) == [1, 2]
+
+    asyncio.run(run())
+
+def test_cancelled_caller_does_not_cancel_the_shared_load():
+    async def run():
+        flights = SingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.01)
+            return 42
+
+        cancelled = asyncio.ensure_future(flights.do(("swaps", "u1"), load))
+        waiting = asyncio.ensure_future(flights.do(("swaps", "u1"), load))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert await waiting == 42
+        assert cancelled.cancelled()
+
+    asyncio.run(run())
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    async def run():
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flights.do(("admin", "u1"), fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flights.stats()["in_flight"] == 0
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from app.services import stats_service
+from app.services.stats_service import (
+    get_stats, rebuild_stats, record_swap_created, record_swap_transition,
+    record_user_banned, record_user_deleted, record_users_created
+)
+
+@pytest.fixture
+def db(mock_db, monkeypatch):
+    monkeypatch.setattr(stats_service, "get_collection", lambda name: mock_db[name])
+    return mock_db
+
+def today():
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+def day_entry(stats, day):
+    return next(entry for entry in stats["daily"] if entry["date"] == day)
+
+def test_counters_follow_recorded_writes(db):
+    async def run():
+        await record_users_created(3)
+        await record_user_banned()
+        await record_user_deleted(was_banned=True)
+        await record_swap_created()
+        await record_swap_created()
+        await record_swap_transition("pending", "accepted")
+        return await get_stats()
+
+    stats = asyncio.run(run())
+    assert stats["users"] == {"total": 2, "banned": 0}
+    assert stats["swaps"] == {"total": 2, "pending": 1, "accepted": 1, "rejected": 0, "cancelled": 0}
+    assert day_entry(stats, today()) == {
+        "date": today(),
+        "users": {"created": 3, "banned": 1},
+        "swaps": {"created": 2, "accepted": 1, "rejected": 0, "cancelled": 0},
+    }
+    assert len(stats["daily"]) == stats_service.settings.STATS_DAILY_BUCKET_DAYS
+    assert stats["daily"][-1]["date"] == today()
+
+def test_rebuild_reports_and_repairs_drift(db):
+    now = datetime.utcnow()
+    yesterday = now - timedelta(days=1)
+
+    async def run():
+        await db.users.insert_many([
+            {"clerk_id": "a", "is_banned": False, "created_at": now},
+            {"clerk_id": "b", "is_banned": True, "created_at": yesterday},
+        ])
+        await db.swaps.insert_many([
+            {"status": "pending", "created_at": now},
+            {"status": "rejected", "created_at": now},
+        ])
+        # Counters that missed some writes (e.g. a failed $inc)
+        await record_users_created(1)
+        await record_swap_transition("pending", "rejected")
+
+        report = await rebuild_stats(apply=False)
+        unchanged = await get_stats()
+        applied = await rebuild_stats()
+        return report, unchanged, applied, await get_stats(), await rebuild_stats(apply=False)
+
+    report, unchanged, applied, stats, after = asyncio.run(run())
+    yesterday_day = yesterday.strftime("%Y-%m-%d")
+    assert report["applied"] is False
+    assert report["drift"]["users.total"] == {"stored": 1, "actual": 2}
+    assert report["drift"]["users.banned"] == {"stored": 0, "actual": 1}
+    assert report["drift"]["swaps.pending"] == {"stored": -1, "actual": 1}
+    assert report["drift"][f"daily.{today()}.swaps.created"] == {"stored": 0, "actual": 2}
+    assert report["drift"][f"daily.{yesterday_day}.users.created"] == {"stored": 0, "actual": 1}
+    assert f"daily.{today()}.users.created" not in report["drift"]
+    assert unchanged["users"]["total"] == 1
+
+    assert applied["drift"] == report["drift"]
+    assert stats["users"] == {"total": 2, "banned": 1}
+    assert stats["swaps"] == {"total": 2, "pending": 1, "accepted": 0, "rejected": 1, "cancelled": 0}
+    assert stats["rebuilt_at"] is not None
+    assert day_entry(stats, yesterday_day)["users"]["created"] == 1
+    # Counters that can't be recomputed are kept as recorded
+    assert day_entry(stats, today())["swaps"]["rejected"] == 1
+    assert after["drift"] == {}
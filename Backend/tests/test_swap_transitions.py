@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from app.controllers import swap_controller
+from app.controllers.swap_controller import SwapController
+from app.models.swap import SWAP_TRANSITIONS
+
+class FakeSwaps:
+    """Just enough of the swaps collection for SwapController._transition."""
+
+    def __init__(self, *swaps):
+        self.swaps = {swap["_id"]: dict(swap) for swap in swaps}
+
+    @staticmethod
+    def _matches(swap: dict, query: dict) -> bool:
+        for field, condition in query.items():
+            if isinstance(condition, dict) and "$in" in condition:
+                if swap.get(field) not in condition["$in"]:
+                    return False
+            elif swap.get(field) != condition:
+                return False
+        return True
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        swap = self.swaps.get(query["_id"])
+        if swap is None or not self._matches(swap, query):
+            return None
+        swap.update(update["$set"])
+        return dict(swap)
+
+    async def find_one(self, query, projection=None):
+        swap = self.swaps.get(query["_id"])
+        return dict(swap) if swap else None
+
+@pytest.fixture
+def swap_id():
+    return ObjectId()
+
+@pytest.fixture
+def controller(monkeypatch, swap_id):
+    swaps = FakeSwaps({"_id": swap_id, "requester_id": "alice", "receiver_id": "bob", "status": "pending"})
+    transitions = []
+
+    async def record_swap_transition(from_status, to_status):
+        transitions.append((from_status, to_status))
+
+    monkeypatch.setattr(swap_controller, "get_collection", lambda name: swaps)
+    monkeypatch.setattr(swap_controller, "record_swap_transition", record_swap_transition)
+    controller = SwapController()
+    controller.transitions = transitions
+    return controller
+
+def _error(coro) -> HTTPException:
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(coro)
+    return raised.value
+
+def test_accept_then_accept_again_is_a_400(controller, swap_id):
+    updated = asyncio.run(controller._transition(str(swap_id), "bob", "accept"))
+    assert updated["status"] == "accepted"
+    assert controller.transitions == [("pending", "accepted")]
+
+    error = _error(controller._transition(str(swap_id), "bob", "accept"))
+    assert (error.status_code, error.detail) == (400, SWAP_TRANSITIONS["accept"]["invalid_state"])
+    assert controller.transitions == [("pending", "accepted")]
+
+def test_wrong_participant_is_a_403(controller, swap_id):
+    error = _error(controller._transition(str(swap_id), "alice", "accept"))
+    assert (error.status_code, error.detail) == (403, SWAP_TRANSITIONS["accept"]["forbidden"])
+
+    error = _error(controller._transition(str(swap_id), "bob", "cancel"))
+    assert (error.status_code, error.detail) == (403, SWAP_TRANSITIONS["cancel"]["forbidden"])
+
+def test_unknown_or_invalid_swap(controller):
+    error = _error(controller._transition(str(ObjectId()), "bob", "reject"))
+    assert (error.status_code, error.detail) == (404, "Swap not found")
+
+    error = _error(controller._transition("not-an-id", "bob", "reject"))
+    assert (error.status_code, error.detail) == (400, "Invalid swap ID")
+
+def test_cancel_after_reject_is_a_400(controller, swap_id):
+    assert asyncio.run(controller._transition(str(swap_id), "bob", "reject"))["status"] == "rejected"
+
+    error = _error(controller._transition(str(swap_id), "alice", "cancel"))
+    assert (error.status_code, error.detail) == (400, SWAP_TRANSITIONS["cancel"]["invalid_state"])
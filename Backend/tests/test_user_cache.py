@@ -0,0 +1,94 @@
+import asyncio
+from app.services import user_cache as user_cache_module
+from app.services.user_cache import UserCache
+
+class Users:
+    """users collection that counts queries and can run a hook while a lookup is in flight."""
+
+    def __init__(self, *users, during_query=None):
+        self.users = {user["clerk_id"]: user for user in users}
+        self.during_query = during_query
+        self.queries = 0
+
+    async def _query(self):
+        self.queries += 1
+        if self.during_query:
+            await self.during_query()
+
+    async def find_one(self, query, projection=None):
+        await self._query()
+        return self.users.get(query["clerk_id"])
+
+    def find(self, query, projection=None):
+        async def iterate():
+            await self._query()
+            for clerk_id in query["clerk_id"]["$in"]:
+                if clerk_id in self.users:
+                    yield self.users[clerk_id]
+        return iterate()
+
+def new_cache():
+    return UserCache(maxsize=10, ttl=30, negative_ttl=5)
+
+def test_get_reads_through_and_caches_misses(monkeypatch):
+    users = Users({"clerk_id": "u1", "fullname": "One"})
+    monkeypatch.setattr(user_cache_module, "get_collection", lambda name: users)
+
+    async def run():
+        cache = new_cache()
+        assert (await cache.get("u1"))["fullname"] == "One"
+        assert (await cache.get("u1"))["fullname"] == "One"
+        assert await cache.get("nobody") is None
+        assert await cache.get("nobody") is None
+        return cache
+
+    cache = asyncio.run(run())
+    assert users.queries == 2
+    assert cache.stats()["hits"] == 2
+
+def test_get_many_loads_only_misses(monkeypatch):
+    users = Users({"clerk_id": "u1"}, {"clerk_id": "u2"})
+    monkeypatch.setattr(user_cache_module, "get_collection", lambda name: users)
+
+    async def run():
+        cache = new_cache()
+        await cache.get("u1")
+        found = await cache.get_many(["u1", "u2", "u3", None])
+        again = await cache.get_many(["u2", "u3"])
+        return found, again
+
+    found, again = asyncio.run(run())
+    assert sorted(found) == ["u1", "u2"] and sorted(again) == ["u2"]
+    # One find_one for u1, one $in for u2 and u3, then nothing
+    assert users.queries == 2
+
+def test_load_that_overlapped_an_invalidation_is_not_stored(monkeypatch):
+    async def run():
+        cache = new_cache()
+        users = Users({"clerk_id": "u1"}, during_query=lambda: cache.invalidate("u1"))
+        monkeypatch.setattr(user_cache_module, "get_collection", lambda name: users)
+
+        assert (await cache.get("u1"))["clerk_id"] == "u1"
+        assert cache.local.get("u1") == (False, None)
+        await cache.get_many(["u1"])
+        assert cache.local.get("u1") == (False, None)
+
+        # Without a concurrent invalidation the load is cached
+        users.during_query = None
+        await cache.get("u1")
+        assert cache.local.get("u1")[0] is True
+
+    asyncio.run(run())
+
+def test_invalidate_drops_the_entry(monkeypatch):
+    users = Users({"clerk_id": "u1", "fullname": "Old"})
+    monkeypatch.setattr(user_cache_module, "get_collection", lambda name: users)
+
+    async def run():
+        cache = new_cache()
+        await cache.get("u1")
+        users.users["u1"] = {"clerk_id": "u1", "fullname": "New"}
+        await cache.invalidate("u1")
+        return await cache.get("u1")
+
+    assert asyncio.run(run())["fullname"] == "New"
@@ -685,7 +685,7 @@ export async function deleteSwapAdmin(swapId: string, adminUserId: string): Prom
 export async function exportUsersData(adminUserId: string): Promise<ApiResponse> {
   try {
     console.log("Exporting users data by admin:", adminUserId)
-    const response = await fetch(`${API_BASE_URL}/admin/export/users`, {
+    const response = await fetch(`${API_BASE_URL}/admin/export/users?format=csv`, {
       method: "GET",
       headers: {
         "Content-Type": "application/json",
@@ -725,7 +725,7 @@ export async function exportUsersData(adminUserId: string): Promise<ApiResponse>
 export async function exportSwapsData(adminUserId: string): Promise<ApiResponse> {
   try {
     console.log("Exporting swaps data by admin:", adminUserId)
-    const response = await fetch(`${API_BASE_URL}/admin/export/swaps`, {
+    const response = await fetch(`${API_BASE_URL}/admin/export/swaps?format=csv`, {
       method: "GET",
       headers: {
         "Content-Type": "application/json",